@@ -5,5 +5,5 @@ class InteractionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.interactions'
 
-def ready(self):
-    import apps.interactions.signals
\ No newline at end of file
+    def ready(self):
+        import apps.interactions.signals
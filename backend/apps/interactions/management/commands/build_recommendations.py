@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.recommendations import build_cooccurrences
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla de co-ocurrencias y la lista de populares (pensado para ejecutarse periódicamente)"
+
+    def handle(self, *args, **options):
+        pairs = build_cooccurrences()
+        self.stdout.write(self.style.SUCCESS(f"{pairs} pares de co-ocurrencia generados"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.interactions.restock import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = "Worker que drena el outbox de reposiciones y envía los avisos por correo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Segundos de espera cuando no hay eventos pendientes")
+        parser.add_argument('--once', action='store_true',
+                            help="Procesa lo pendiente y termina (útil para cron)")
+
+    def handle(self, *args, **options):
+        while True:
+            events, sent = dispatch_batch(options['batch_size'])
+            if events:
+                self.stdout.write(f"{events} eventos procesados, {sent} correos enviados")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.searches import RETENTION_DAYS, prune_history
+
+
+class Command(BaseCommand):
+    help = "Borra el historial de búsquedas más antiguo que la retención (el rollup diario se conserva)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                            help="Días de historial a conservar (SEARCH_HISTORY_RETENTION_DAYS)")
+
+    def handle(self, *args, **options):
+        deleted = prune_history(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} búsquedas anteriores a {options['days']} días eliminadas"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.interactions.ratings import reconcile_store_ratings
+
+
+class Command(BaseCommand):
+    help = "Corrige desvíos en rating/review_count de las tiendas (pensado para ejecutarse periódicamente)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        repaired = reconcile_store_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{repaired} tiendas corregidas"))
@@ -0,0 +1,15 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from apps.interactions.metrics import ANALYTICS_KEY, GROUPS, PLATFORM_KEY, recompute, rollup
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores y las listas top-N de los paneles (pensado para ejecutarse periódicamente)"
+
+    def handle(self, *args, **options):
+        for group in GROUPS:
+            recompute(group)
+        data = rollup()
+        cache.delete_many([ANALYTICS_KEY, PLATFORM_KEY])
+        self.stdout.write(self.style.SUCCESS(f"{len(GROUPS)} grupos de contadores y {len(data)} rollups actualizados"))
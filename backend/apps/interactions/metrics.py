@@ -0,0 +1,215 @@
+"""
+Capa de métricas para los paneles de administración (AnalyticsViewSet y
+PlatformStatsView).
+
+- Contadores (`MetricCounter`): usuarios por rol, tiendas, componentes, agotados,
+  stock bajo, valor del inventario y total de búsquedas (recalculado desde el
+  rollup diario SearchQueryDaily). Las señales aplican
+  deltas al escribir cada fila. Si un grupo no tiene contadores (primera vez,
+  o porque una escritura masiva lo marcó con `mark_stale`), se recalcula con
+  un único agregado al leerlo.
+- Rollups (`MetricRollup`): las listas top-N (tiendas, búsquedas, demanda de
+  stock, últimas tiendas). Las recalcula periódicamente el comando
+  `rollup_metrics`, así el panel no agrupa StockNotification completo en cada
+  visita; las búsquedas salen de SearchQueryDaily, que se poda.
+- Cada panel se cachea METRICS_CACHE_TTL segundos; `?refresh=1` recalcula
+  contadores y rollups y vuelve a llenar la caché.
+
+Un delta que llega mientras se recalcula su grupo puede perderse; el
+recálculo periódico lo corrige.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from rest_framework.fields import DateTimeField
+
+from apps.inventory.models import Component
+from apps.stores.models import Store
+from apps.users.models import User
+from .models import MetricCounter, MetricRollup, SearchQueryDaily, StockNotification
+from .searches import query_totals
+
+CACHE_TTL = getattr(settings, 'METRICS_CACHE_TTL', 60)
+TOP_N = getattr(settings, 'METRICS_TOP_N', 5)
+LOW_STOCK_THRESHOLD = 5
+
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+DATETIME_FIELD = DateTimeField()
+
+GROUPS = {
+    'users': ['users.total', *(f'users.role.{role}' for role in ROLES)],
+    'stores': ['stores.total'],
+    'inventory': [
+        'inventory.components', 'inventory.out_of_stock',
+        'inventory.low_stock', 'inventory.total_value',
+    ],
+    'search': ['search.total'],
+}
+
+ANALYTICS_KEY = 'metrics:analytics'
+PLATFORM_KEY = 'metrics:platform'
+
+
+# --- Contadores ---------------------------------------------------------------
+
+def incr(key, delta, create=False):
+    """
+    Suma `delta` al contador en un UPDATE. Si no existe solo se crea con
+    `create=True`; si no, se deja para el próximo recálculo. Devuelve si se aplicó.
+    """
+    if not delta:
+        return True
+    if MetricCounter.objects.filter(key=key).update(value=F('value') + delta):
+        return True
+    if not create:
+        return False
+    try:
+        with transaction.atomic():
+            MetricCounter.objects.create(key=key, value=delta)
+    except IntegrityError:
+        MetricCounter.objects.filter(key=key).update(value=F('value') + delta)
+    return True
+
+
+def mark_stale(group):
+    """Descarta los contadores del grupo; se recalculan en la próxima lectura."""
+    MetricCounter.objects.filter(key__in=GROUPS[group]).delete()
+    cache.delete_many([ANALYTICS_KEY, PLATFORM_KEY])
+
+
+def _compute_group(group):
+    if group == 'users':
+        by_role = dict(User.objects.values_list('role').annotate(total=Count('id')).order_by())
+        values = {f'users.role.{role}': by_role.get(role, 0) for role in ROLES}
+        values['users.total'] = sum(by_role.values())
+    elif group == 'stores':
+        values = {'stores.total': Store.objects.count()}
+    elif group == 'inventory':
+        totals = Component.objects.aggregate(
+            components=Count('id'),
+            out_of_stock=Count('id', filter=Q(stock=0)),
+            low_stock=Count('id', filter=Q(stock__lte=LOW_STOCK_THRESHOLD)),
+            total_value=Sum('price'),
+        )
+        values = {f'inventory.{name}': value or 0 for name, value in totals.items()}
+    else:
+        # Desde el rollup diario: el historial crudo se poda (apps.interactions.searches)
+        values = {'search.total': SearchQueryDaily.objects.aggregate(total=Sum('count'))['total'] or 0}
+    return values
+
+
+def recompute(group):
+    values = _compute_group(group)
+    with transaction.atomic():
+        MetricCounter.objects.filter(key__in=GROUPS[group]).delete()
+        MetricCounter.objects.bulk_create(
+            [MetricCounter(key=key, value=value) for key, value in values.items()], batch_size=1000
+        )
+    return values
+
+
+def counters(groups, refresh=False):
+    """{clave: valor} de los grupos pedidos, recalculando los que falten."""
+    keys = [key for group in groups for key in GROUPS[group]]
+    values = {} if refresh else dict(MetricCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    for group in groups:
+        if refresh or any(key not in values for key in GROUPS[group]):
+            computed = recompute(group)
+            values.update({key: computed[key] for key in GROUPS[group]})
+    return values
+
+
+# --- Rollups ------------------------------------------------------------------
+
+def _top_searches():
+    return [{'query': query, 'count': total} for query, total in query_totals()[:TOP_N]]
+
+
+ROLLUPS = {
+    'top_stores': lambda: [
+        {'name': name, 'rating': float(rating), 'review_count': review_count}
+        for name, rating, review_count in
+        Store.objects.order_by('-rating', '-review_count')[:TOP_N].values_list('name', 'rating', 'review_count')
+    ],
+    'top_searches': _top_searches,
+    'stock_demands': lambda: list(
+        StockNotification.objects.values('component__name').annotate(total=Count('id')).order_by('-total')[:TOP_N]
+    ),
+    'recent_stores': lambda: [
+        {'name': name, 'created_at': DATETIME_FIELD.to_representation(created_at)}
+        for name, created_at in Store.objects.order_by('-created_at')[:TOP_N].values_list('name', 'created_at')
+    ],
+}
+
+
+def rollup(names=None):
+    names = names or list(ROLLUPS)
+    data = {}
+    for name in names:
+        data[name] = ROLLUPS[name]()
+        MetricRollup.objects.update_or_create(name=name, defaults={'data': data[name]})
+    return data
+
+
+def rollups(names, refresh=False):
+    if refresh:
+        return rollup(names)
+    data = {row.name: row.data for row in MetricRollup.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in data]
+    if missing:
+        data.update(rollup(missing))
+    return data
+
+
+# --- Paneles ------------------------------------------------------------------
+
+def _cached(key, build, refresh):
+    if not refresh:
+        payload = cache.get(key)
+        if payload is not None:
+            return payload
+    payload = build(refresh)
+    cache.set(key, payload, CACHE_TTL)
+    return payload
+
+
+def _build_analytics(refresh):
+    values = counters(['users', 'inventory'], refresh)
+    lists = rollups(['top_stores', 'top_searches', 'stock_demands'], refresh)
+    return {
+        'user_summary': {
+            'clientes': int(values['users.role.cliente']),
+            'proveedores': int(values['users.role.proveedor']),
+            'total': int(values['users.total']),
+        },
+        'top_stores': lists['top_stores'],
+        'top_searches': lists['top_searches'],
+        'stock_demands': lists['stock_demands'],
+        'inventory_summary': {
+            'total_value': float(values['inventory.total_value'] or Decimal('0')),
+            'out_of_stock_count': int(values['inventory.out_of_stock']),
+            'total_components': int(values['inventory.components']),
+        },
+    }
+
+
+def _build_platform(refresh):
+    values = counters(['stores', 'inventory'], refresh)
+    lists = rollups(['recent_stores'], refresh)
+    return {
+        'total_stores': int(values['stores.total']),
+        'total_components': int(values['inventory.components']),
+        'low_stock_alerts': int(values['inventory.low_stock']),
+        'recent_registrations': lists['recent_stores'],
+    }
+
+
+def analytics_summary(refresh=False):
+    return _cached(ANALYTICS_KEY, _build_analytics, refresh)
+
+
+def platform_stats(refresh=False):
+    return _cached(PLATFORM_KEY, _build_platform, refresh)
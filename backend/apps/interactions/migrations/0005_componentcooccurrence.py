@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 14:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0004_restockevent'),
+        ('inventory', '0005_componentspec'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences', to='inventory.component')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.component')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['component', '-score'], name='cooccurrence_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('component', 'related'), name='cooccurrence_pair_uniq')],
+            },
+        ),
+    ]
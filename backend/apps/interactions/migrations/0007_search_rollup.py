@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-18 14:49
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_search_daily(apps, schema_editor):
+    SearchHistory = apps.get_model('interactions', 'SearchHistory')
+    SearchQueryDaily = apps.get_model('interactions', 'SearchQueryDaily')
+    rows = (
+        SearchHistory.objects.annotate(day=TruncDate('created_at')).values_list('query', 'day')
+        .annotate(total=Count('id')).order_by()
+    )
+    SearchQueryDaily.objects.bulk_create(
+        [SearchQueryDaily(query=query, day=day, count=total) for query, day, total in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0006_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchhistory',
+            index=models.Index(fields=['user', '-created_at'], name='search_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchhistory',
+            index=models.Index(fields=['created_at'], name='search_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchquerydaily',
+            index=models.Index(fields=['day'], name='search_daily_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchquerydaily',
+            constraint=models.UniqueConstraint(fields=('query', 'day'), name='search_daily_uniq'),
+        ),
+        migrations.RunPython(backfill_search_daily, migrations.RunPython.noop),
+    ]
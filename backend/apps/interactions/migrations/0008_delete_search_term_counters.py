@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def delete_search_term_counters(apps, schema_editor):
+    # top_searches ahora sale de SearchQueryDaily; los contadores por término no se podaban
+    MetricCounter = apps.get_model('interactions', 'MetricCounter')
+    MetricCounter.objects.filter(key__startswith='search.term.').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0007_search_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_search_term_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,10 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
 from apps.inventory.models import Component
 from apps.stores.models import Store
 
@@ -15,15 +20,54 @@ class Review(models.Model):
     class Meta:
         unique_together = ('user', 'store')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores con los que se cargó, para aplicar al rating de la tienda solo la diferencia
+        if 'rating' in field_names and 'store_id' in field_names:
+            instance._loaded_rating = (instance.store_id, instance.rating)
+        return instance
+
+    def save(self, *args, **kwargs):
+        # La reseña y el delta del rating de la tienda (post_save) van juntos
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.email} - {self.store.name} ({self.rating}★)"
 
+def budget_sum(prefix=''):
+    """SUM(cantidad * precio) de los items; `prefix` permite usarlo desde Wishlist."""
+    output_field = models.DecimalField(max_digits=14, decimal_places=2)
+    return Coalesce(
+        Sum(F(f'{prefix}quantity') * F(f'{prefix}component__price'), output_field=output_field),
+        Value(Decimal('0')),
+        output_field=output_field,
+    )
+
+
+class WishlistQuerySet(models.QuerySet):
+    def with_items(self):
+        """
+        Carga el grafo lista -> items -> componente (con tienda y categoría) en
+        tres consultas y anota el total del presupuesto en la de listas.
+        """
+        return self.select_related('user').annotate(
+            total_budget=budget_sum('wishlistitem__'),
+        ).prefetch_related(
+            Prefetch('wishlistitem_set', queryset=WishlistItem.objects.order_by('added_at', 'id')),
+            Prefetch('wishlistitem_set__component', queryset=Component.objects.for_listing()),
+        )
+
+
 class Wishlist(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='wishlists')
     name = models.CharField(max_length=100, default="Mi Lista de Deseos")
     components = models.ManyToManyField('inventory.Component', through='WishlistItem', related_name='in_wishlists', blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WishlistQuerySet.as_manager()
+
 class WishlistItem(models.Model):
     wishlist = models.ForeignKey(Wishlist, on_delete=models.CASCADE)
     component = models.ForeignKey('inventory.Component', on_delete=models.CASCADE)
@@ -49,4 +93,97 @@ class SearchHistory(models.Model):
 
     class Meta:
         verbose_name = "Historial de Búsqueda"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Búsquedas recientes del usuario y la última para evitar duplicados
+            models.Index(fields=['user', '-created_at'], name='search_user_recent_idx'),
+            # Poda por antigüedad (prune_search_history)
+            models.Index(fields=['created_at'], name='search_created_idx'),
+        ]
+
+class SearchQueryDaily(models.Model):
+    """
+    Búsquedas por término y día. La mantiene la señal de SearchHistory con un
+    incremento; sugerencias y analíticas leen de aquí en vez del historial crudo,
+    que se poda con `prune_search_history`.
+    """
+    query = models.CharField(max_length=255)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['query', 'day'], name='search_daily_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='search_daily_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.query} ({self.day}): {self.count}"
+
+class RestockEvent(models.Model):
+    """
+    Outbox de reposiciones: se registra en la misma transacción que el cambio de
+    stock y lo despacha el comando `process_restock_events`.
+    """
+    component_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_at', 'next_attempt_at'], name='restock_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Reposición {self.component_ids} ({self.created_at:%d/%m/%Y %H:%M})"
+
+
+class ComponentCooccurrence(models.Model):
+    """
+    Puntaje "quien guardó A también se interesó por B", precalculado a partir de
+    listas de deseos e historial de búsqueda (ver recommendations.py).
+    """
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='cooccurrences')
+    related = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['component', 'related'], name='cooccurrence_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['component', '-score'], name='cooccurrence_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.component_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class MetricCounter(models.Model):
+    """
+    Contador acumulado del panel de analíticas (usuarios por rol, valor del
+    inventario, total de búsquedas...). Lo mantienen las señales con deltas;
+    ver apps.interactions.metrics. Las búsquedas más frecuentes salen del
+    rollup diario (SearchQueryDaily), no de aquí.
+    """
+    key = models.CharField(max_length=300, unique=True)
+    value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class MetricRollup(models.Model):
+    """Listas top-N precalculadas por el comando `rollup_metrics`."""
+    name = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.computed_at:%d/%m/%Y %H:%M})"
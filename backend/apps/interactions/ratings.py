@@ -0,0 +1,63 @@
+"""
+Mantenimiento incremental de Store.rating / review_count / rating_sum.
+
+Cada alta, edición o baja de una reseña aplica su delta (count ±1, suma ± estrellas)
+en un único UPDATE con expresiones F(), sin recorrer las reseñas de la tienda.
+`reconcile_store_ratings` corrige cualquier desvío de forma masiva.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from apps.stores.models import Store
+from core.cache import bump
+from .models import Review
+
+RATING_FIELD = DecimalField(max_digits=3, decimal_places=2)
+
+
+def apply_rating_delta(store_id, count_delta, sum_delta):
+    if not count_delta and not sum_delta:
+        return
+    new_count = F('review_count') + count_delta
+    new_sum = F('rating_sum') + sum_delta
+    # En el SET las columnas valen lo que tenían antes del UPDATE
+    Store.objects.filter(pk=store_id).update(
+        review_count=new_count,
+        rating_sum=new_sum,
+        rating=Case(
+            When(review_count__lte=-count_delta, then=Value(Decimal('0'))),
+            # SQLite ignora la precisión del CAST: se redondea antes
+            default=Cast(Round(Cast(new_sum, FloatField()) / new_count, 2), RATING_FIELD),
+            output_field=RATING_FIELD,
+        ),
+    )
+
+
+def average(total, count):
+    if not count:
+        return Decimal('0')
+    return (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def reconcile_store_ratings(batch_size=1000):
+    """
+    Recalcula las estadísticas de todas las tiendas con una sola consulta agrupada
+    y guarda en lote solo las que se desviaron. Devuelve cuántas se corrigieron.
+    """
+    stats = {
+        row['store_id']: (row['total'], row['count'])
+        for row in Review.objects.values('store_id').annotate(total=Sum('rating'), count=Count('id'))
+    }
+    drifted = []
+    for store in Store.objects.only('id', 'rating', 'review_count', 'rating_sum').iterator(chunk_size=batch_size):
+        total, count = stats.get(store.pk, (0, 0))
+        rating = average(total, count)
+        if (store.rating_sum, store.review_count, store.rating) != (total, count, rating):
+            store.rating_sum, store.review_count, store.rating = total, count, rating
+            drifted.append(store)
+    Store.objects.bulk_update(drifted, ['rating', 'review_count', 'rating_sum'], batch_size=batch_size)
+    if drifted:
+        bump('stores')
+    return len(drifted)
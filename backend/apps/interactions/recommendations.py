@@ -0,0 +1,251 @@
+"""
+Recomendaciones de componentes precalculadas.
+
+- `ComponentCooccurrence` guarda, para cada componente, los componentes que
+  aparecen junto a él en las listas de deseos de un mismo usuario (peso 1) o
+  entre los resultados de sus búsquedas recientes (peso SEARCH_WEIGHT).
+  `build_cooccurrences` la reconstruye (comando `build_recommendations`) y las
+  señales de WishlistItem la mantienen al día entre reconstrucciones.
+- La lista de populares (más guardados, con stock) se cachea y reemplaza al
+  `order_by('?')`, que ordenaba toda la tabla al azar en cada petición.
+- Las recomendaciones de cada usuario (top-K) se cachean con TTL y se
+  invalidan cuando cambia su lista de deseos.
+"""
+import random
+from collections import defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from apps.inventory.models import Component
+from .models import ComponentCooccurrence, SearchHistory, WishlistItem
+
+TOP_K = getattr(settings, 'RECOMMENDATION_TOP_K', 20)
+NEIGHBOURS = getattr(settings, 'RECOMMENDATION_NEIGHBOURS', 30)
+USER_TTL = getattr(settings, 'RECOMMENDATION_CACHE_TTL', 600)
+POPULAR_SIZE = getattr(settings, 'RECOMMENDATION_POPULAR_SIZE', 50)
+POPULAR_TTL = getattr(settings, 'RECOMMENDATION_POPULAR_TTL', 900)
+SEARCH_WEIGHT = getattr(settings, 'RECOMMENDATION_SEARCH_WEIGHT', 0.5)
+RECENT_SEARCHES = 3
+RESULTS_PER_SEARCH = 3
+MAX_BASKET = 50
+
+POPULAR_KEY = 'recs:popular'
+
+
+def user_key(user_id):
+    return f'recs:user:{user_id}'
+
+
+# --- Cestas -----------------------------------------------------------------
+
+def _search_seeds(queries):
+    """Componentes que devuelven las búsquedas dadas (los primeros de cada una)."""
+    from apps.inventory.search import get_search_backend
+
+    backend = get_search_backend()
+    seeds = []
+    for query in queries:
+        results = backend.search(Component.objects.all(), query).order_by('-search_rank', '-id')
+        seeds.extend(results.values_list('pk', flat=True)[:RESULTS_PER_SEARCH])
+    return seeds
+
+
+def _recent_queries(user_id):
+    queries = []
+    for query in SearchHistory.objects.filter(user_id=user_id).values_list('query', flat=True)[:10]:
+        if query not in queries:
+            queries.append(query)
+        if len(queries) == RECENT_SEARCHES:
+            break
+    return queries
+
+
+def user_basket(user_id):
+    """{componente: peso} con lo que el usuario guardó y lo que buscó hace poco."""
+    basket = {}
+    for component_id in _search_seeds(_recent_queries(user_id)):
+        basket[component_id] = SEARCH_WEIGHT
+    wishlist_ids = (
+        WishlistItem.objects.filter(wishlist__user_id=user_id)
+        .order_by('-added_at').values_list('component_id', flat=True)[:MAX_BASKET]
+    )
+    for component_id in wishlist_ids:
+        basket[component_id] = 1.0
+    return basket
+
+
+def _all_baskets():
+    baskets = defaultdict(dict)
+    rows = (
+        WishlistItem.objects.order_by('wishlist__user_id', '-added_at')
+        .values_list('wishlist__user_id', 'component_id').iterator(chunk_size=5000)
+    )
+    for user_id, component_id in rows:
+        if len(baskets[user_id]) < MAX_BASKET:
+            baskets[user_id][component_id] = 1.0
+
+    searches = defaultdict(list)
+    rows = (
+        SearchHistory.objects.filter(user__isnull=False)
+        .order_by('user_id', '-created_at').values_list('user_id', 'query').iterator(chunk_size=5000)
+    )
+    for user_id, query in rows:
+        if query not in searches[user_id] and len(searches[user_id]) < RECENT_SEARCHES:
+            searches[user_id].append(query)
+
+    # Las búsquedas se resuelven una vez por texto distinto, no por usuario
+    resolved = {}
+    for user_id, queries in searches.items():
+        for query in queries:
+            if query not in resolved:
+                resolved[query] = _search_seeds([query])
+            for component_id in resolved[query]:
+                baskets[user_id].setdefault(component_id, SEARCH_WEIGHT)
+    return baskets.values()
+
+
+# --- Co-ocurrencias -----------------------------------------------------------
+
+def build_cooccurrences():
+    """Reconstruye la tabla completa; conserva los NEIGHBOURS mejores por componente."""
+    scores = defaultdict(lambda: defaultdict(float))
+    for basket in _all_baskets():
+        for (a, weight_a), (b, weight_b) in combinations(basket.items(), 2):
+            weight = min(weight_a, weight_b)
+            scores[a][b] += weight
+            scores[b][a] += weight
+
+    rows = []
+    for component_id, related in scores.items():
+        best = sorted(related.items(), key=lambda item: (-item[1], item[0]))[:NEIGHBOURS]
+        rows.extend(
+            ComponentCooccurrence(component_id=component_id, related_id=related_id, score=score)
+            for related_id, score in best
+        )
+
+    with transaction.atomic():
+        ComponentCooccurrence.objects.all().delete()
+        ComponentCooccurrence.objects.bulk_create(rows, batch_size=1000)
+
+    refresh_popular()
+    return len(rows)
+
+
+def _pair_filter(component_id, others):
+    return (
+        Q(component_id=component_id, related_id__in=others)
+        | Q(component_id__in=others, related_id=component_id)
+    )
+
+
+def record_wishlist_change(user_id, component_id, delta):
+    """
+    Suma (delta=1) o resta (delta=-1) el par componente <-> resto de la cesta
+    del usuario, sin recalcular la tabla. Si el componente sigue o ya estaba en
+    otra de sus listas la cesta no cambia.
+    """
+    copies = WishlistItem.objects.filter(wishlist__user_id=user_id, component_id=component_id).count()
+    if (delta > 0 and copies > 1) or (delta < 0 and copies > 0):
+        cache.delete(user_key(user_id))
+        return
+
+    others = list(
+        WishlistItem.objects.filter(wishlist__user_id=user_id)
+        .exclude(component_id=component_id)
+        .order_by('-added_at').values_list('component_id', flat=True).distinct()[:MAX_BASKET]
+    )
+    if others:
+        with transaction.atomic():
+            pairs = ComponentCooccurrence.objects.filter(_pair_filter(component_id, others))
+            if delta > 0:
+                existing = set(pairs.values_list('component_id', 'related_id'))
+                pairs.update(score=F('score') + delta)
+                missing = [
+                    ComponentCooccurrence(component_id=a, related_id=b, score=delta)
+                    for other in others
+                    for a, b in ((component_id, other), (other, component_id))
+                    if (a, b) not in existing
+                ]
+                # Si otro proceso creó el par entre medias se pierde un incremento;
+                # la reconstrucción periódica lo corrige
+                ComponentCooccurrence.objects.bulk_create(missing, ignore_conflicts=True)
+            else:
+                pairs.update(score=F('score') + delta)
+                pairs.filter(score__lte=0).delete()
+    cache.delete(user_key(user_id))
+
+
+# --- Lectura ------------------------------------------------------------------
+
+def refresh_popular():
+    popular = list(
+        Component.objects.filter(is_available=True, stock__gt=0)
+        .annotate(saves=Count('in_wishlists'))
+        .order_by('-saves', '-id')
+        .values_list('pk', 'category_id')[:POPULAR_SIZE]
+    )
+    cache.set(POPULAR_KEY, popular, POPULAR_TTL)
+    return popular
+
+
+def popular_components():
+    """[(id, categoría)] de los más guardados, desde caché."""
+    popular = cache.get(POPULAR_KEY)
+    if popular is None:
+        popular = refresh_popular()
+    return popular
+
+
+def _compute_for_user(user_id):
+    basket = user_basket(user_id)
+    if not basket:
+        return []
+
+    seeds = list(basket)
+    ranked = list(
+        ComponentCooccurrence.objects
+        .filter(component_id__in=seeds, related__is_available=True, related__stock__gt=0)
+        .exclude(related_id__in=seeds)
+        .values('related_id')
+        .annotate(total=Sum('score'))
+        .order_by('-total', 'related_id')
+        .values_list('related_id', flat=True)[:TOP_K]
+    )
+    if len(ranked) >= TOP_K:
+        return ranked
+
+    # Completamos con populares, primero de las categorías que le interesan
+    categories = set(
+        Component.objects.filter(pk__in=seeds).values_list('category_id', flat=True)
+    )
+    excluded = set(seeds) | set(ranked)
+    popular = [(pk, category) for pk, category in popular_components() if pk not in excluded]
+    ranked += [pk for pk, category in popular if category in categories]
+    ranked += [pk for pk, category in popular if category not in categories]
+    return ranked[:TOP_K]
+
+
+def recommended_ids(user=None, limit=5):
+    if user is None or not user.is_authenticated:
+        popular = [pk for pk, _ in popular_components()]
+        # Muestra aleatoria de la lista cacheada en vez de ORDER BY RANDOM()
+        return random.sample(popular, min(limit, len(popular)))
+
+    key = user_key(user.pk)
+    ranked = cache.get(key)
+    if ranked is None:
+        ranked = _compute_for_user(user.pk)
+        cache.set(key, ranked, USER_TTL)
+    if not ranked:
+        return recommended_ids(None, limit)
+    return ranked[:limit]
+
+
+def recommended_components(user=None, limit=5):
+    ids = recommended_ids(user, limit)
+    components = Component.objects.for_listing().in_bulk(ids)
+    return [components[pk] for pk in ids if pk in components]
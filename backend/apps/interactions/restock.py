@@ -0,0 +1,123 @@
+"""
+Despacho de avisos de reposición desde el outbox (RestockEvent).
+
+Cada lote de eventos pendientes se resuelve con una sola consulta de
+suscripciones, se agrupa por destinatario (un correo por usuario con todos sus
+componentes repuestos) y se envía reutilizando una única conexión SMTP.
+Cada aviso se desactiva en cuanto sale su correo; los eventos con algún
+envío fallido se reintentan con espera exponencial, solo para quien falta.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import RestockEvent, StockNotification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'RESTOCK_MAX_ATTEMPTS', 5)
+RETRY_BASE_SECONDS = getattr(settings, 'RESTOCK_RETRY_BASE_SECONDS', 30)
+# Tiempo que un worker se reserva el lote mientras envía (si se cae, otro lo retoma)
+CLAIM_SECONDS = getattr(settings, 'RESTOCK_CLAIM_SECONDS', 300)
+
+
+def pending_events(batch_size):
+    events = RestockEvent.objects.filter(
+        processed_at__isnull=True,
+        next_attempt_at__lte=timezone.now(),
+    ).order_by('id')
+    if connection.features.has_select_for_update_skip_locked:
+        # Varios workers pueden drenar el outbox sin pisarse
+        events = events.select_for_update(skip_locked=True)
+    return list(events[:batch_size])
+
+
+def build_messages(notifications):
+    """Un correo por destinatario: lista de (mensaje, avisos que cubre)."""
+    by_email = {}
+    for notification in notifications:
+        by_email.setdefault(notification['user__email'], []).append(notification)
+
+    messages = []
+    for email, items in by_email.items():
+        if len(items) == 1:
+            item = items[0]
+            subject = f"¡Ya hay stock!: {item['component__name']}"
+        else:
+            subject = f"¡Ya hay stock de {len(items)} componentes que sigues!"
+        body = '\n'.join(
+            f"El componente {item['component__name']} ya está disponible con "
+            f"{item['component__stock']} unidades."
+            for item in items
+        )
+        messages.append((EmailMessage(subject=subject, body=body, to=[email]), items))
+    return messages
+
+
+def dispatch_batch(batch_size=100):
+    """
+    Procesa un lote de eventos pendientes. Devuelve (eventos, correos enviados).
+
+    El lote se reclama en una transacción corta y los correos salen fuera de
+    ella: un fallo a mitad de envío no deshace lo ya enviado.
+    """
+    with transaction.atomic():
+        events = pending_events(batch_size)
+        if not events:
+            return 0, 0
+        RestockEvent.objects.filter(id__in=[event.id for event in events]).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=CLAIM_SECONDS)
+        )
+
+    component_ids = {pk for event in events for pk in event.component_ids}
+    notifications = list(
+        StockNotification.objects.filter(
+            component_id__in=component_ids,
+            is_active=True,
+            component__stock__gt=0,
+        ).values('id', 'user__email', 'component_id', 'component__name', 'component__stock')
+    )
+    messages = build_messages(notifications)
+
+    sent, failed, error = 0, set(), None
+    if messages:
+        try:
+            with get_connection(fail_silently=False) as mail_connection:
+                for message, items in messages:
+                    try:
+                        mail_connection.send_messages([message])
+                    except Exception as exc:
+                        error = exc
+                        failed.update(item['component_id'] for item in items)
+                        continue
+                    StockNotification.objects.filter(id__in=[item['id'] for item in items]).update(is_active=False)
+                    sent += 1
+        except Exception as exc:
+            # La conexión SMTP no abrió o no cerró: lo enviado ya quedó desactivado
+            error = exc
+            failed = component_ids
+
+    now = timezone.now()
+    done = [event for event in events if failed.isdisjoint(event.component_ids)]
+    retry = [event for event in events if not failed.isdisjoint(event.component_ids)]
+    if done:
+        RestockEvent.objects.filter(id__in=[event.id for event in done]).update(processed_at=now)
+    if retry:
+        logger.warning("Fallo al enviar avisos de reposición: %s", error)
+        for event in retry:
+            event.attempts += 1
+            event.last_error = str(error)[:1000]
+            event.next_attempt_at = now + timedelta(
+                seconds=RETRY_BASE_SECONDS * 2 ** (event.attempts - 1)
+            )
+            if event.attempts >= MAX_ATTEMPTS:
+                # Se descarta; queda registrado el último error
+                event.processed_at = now
+        RestockEvent.objects.bulk_update(
+            retry, ['attempts', 'last_error', 'next_attempt_at', 'processed_at']
+        )
+    return len(events), sent
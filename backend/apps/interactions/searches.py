@@ -0,0 +1,92 @@
+"""
+Rollup diario de búsquedas y retención del historial.
+
+Cada SearchHistory nuevo suma 1 a su fila (término, día) de SearchQueryDaily.
+Las sugerencias populares se calculan sobre esa tabla, limitada a los últimos
+SEARCH_POPULAR_WINDOW_DAYS días, y se guardan en memoria del proceso
+SEARCH_POPULAR_CACHE_TTL segundos. El historial crudo solo se conserva
+SEARCH_HISTORY_RETENTION_DAYS días (comando `prune_search_history`).
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import SearchHistory, SearchQueryDaily
+
+RETENTION_DAYS = getattr(settings, 'SEARCH_HISTORY_RETENTION_DAYS', 90)
+POPULAR_WINDOW_DAYS = getattr(settings, 'SEARCH_POPULAR_WINDOW_DAYS', 30)
+POPULAR_CACHE_TTL = getattr(settings, 'SEARCH_POPULAR_CACHE_TTL', 30)
+PRUNE_BATCH_SIZE = 5000
+
+# {límite: (expira, términos)}; por proceso, sin ir a la caché compartida
+_popular_cache = {}
+
+
+def record_search(query, created_at):
+    day = timezone.localdate(created_at)
+    if SearchQueryDaily.objects.filter(query=query, day=day).update(count=F('count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            SearchQueryDaily.objects.create(query=query, day=day, count=1)
+    except IntegrityError:
+        SearchQueryDaily.objects.filter(query=query, day=day).update(count=F('count') + 1)
+
+
+def rebuild_daily(since=None):
+    """Recalcula el rollup desde el historial crudo (backfill); devuelve las filas escritas."""
+    history = SearchHistory.objects.all()
+    daily = SearchQueryDaily.objects.all()
+    if since is not None:
+        history = history.filter(created_at__date__gte=since)
+        daily = daily.filter(day__gte=since)
+    rows = (
+        history.annotate(day=TruncDate('created_at')).values_list('query', 'day')
+        .annotate(total=Count('id')).order_by()
+    )
+    with transaction.atomic():
+        daily.delete()
+        created = SearchQueryDaily.objects.bulk_create(
+            [SearchQueryDaily(query=query, day=day, count=total) for query, day, total in rows.iterator()],
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def query_totals(since=None):
+    """Queryset (término, total) sobre el rollup, de mayor a menor."""
+    daily = SearchQueryDaily.objects.all()
+    if since is not None:
+        daily = daily.filter(day__gte=since)
+    return daily.values_list('query').annotate(total=Sum('count')).order_by('-total', 'query')
+
+
+def popular_queries(limit=5):
+    now = time.monotonic()
+    cached = _popular_cache.get(limit)
+    if cached and cached[0] > now:
+        return cached[1]
+    since = timezone.localdate() - timedelta(days=POPULAR_WINDOW_DAYS)
+    queries = [query for query, _ in query_totals(since)[:limit]]
+    _popular_cache[limit] = (now + POPULAR_CACHE_TTL, queries)
+    return queries
+
+
+def clear_popular_cache():
+    _popular_cache.clear()
+
+
+def prune_history(days=RETENTION_DAYS, batch_size=PRUNE_BATCH_SIZE):
+    """Borra por lotes el historial crudo más antiguo que `days`; el rollup se conserva."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        pks = list(SearchHistory.objects.filter(created_at__lt=cutoff).values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += SearchHistory.objects.filter(pk__in=pks).delete()[0]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Review, Wishlist, WishlistItem, StockNotification
+from .models import Review, Wishlist, WishlistItem, StockNotification, budget_sum
 from apps.inventory.serializers import ComponentSerializer
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from apps.stores.models import Store
@@ -30,7 +30,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         if user.role != 'cliente':
             raise serializers.ValidationError("Solo los clientes pueden calificar tiendas.")
 
-        if hasattr(store, 'owner') and store.owner == user:
+        if store is not None and store.owner_id == user.pk:
             raise serializers.ValidationError("No puedes calificar tu propia tienda.")
 
         # Validar si ya existe reseña
@@ -62,8 +62,11 @@ class WishlistSerializer(serializers.ModelSerializer):
         read_only_fields = ['user']
 
     def get_total_budget(self, obj):
-        items = obj.wishlistitem_set.all()
-        return sum(item.quantity * item.component.price for item in items)
+        # Anotado por Wishlist.objects.with_items()
+        total = getattr(obj, 'total_budget', None)
+        if total is None:
+            total = WishlistItem.objects.filter(wishlist=obj).aggregate(total=budget_sum())['total']
+        return total
     
 from .models import StockNotification
 
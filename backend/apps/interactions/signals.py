@@ -1,44 +1,160 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from apps.inventory.models import Component
-from .models import StockNotification, Review
-from django.db.models import Avg, Count
+from apps.stores.models import Store
+from apps.users.models import User
+from core.cache import bump
+from . import metrics
+from .models import RestockEvent, Review, SearchHistory, Wishlist, WishlistItem
+from .ratings import apply_rating_delta
+from .recommendations import record_wishlist_change
+from .searches import record_search
+
+@receiver(pre_save, sender=Component)
+def remember_previous_values(sender, instance, **kwargs):
+    """
+    (precio, stock) antes de guardar, compartido por los receptores de post_save.
+    Component.from_db los deja cargados; solo las instancias que no vienen de la
+    BD (o con esos campos diferidos) los leen, en una sola consulta.
+    """
+    if not instance.pk:
+        instance._previous_values = None
+    elif hasattr(instance, '_loaded_price') and hasattr(instance, '_loaded_stock'):
+        instance._previous_values = (instance._loaded_price, instance._loaded_stock)
+    else:
+        instance._previous_values = Component.objects.filter(pk=instance.pk).values_list('price', 'stock').first()
 
 @receiver(post_save, sender=Component)
-def notify_restock(sender, instance, **kwargs):
-    if instance.stock > 0:
-        notifications = StockNotification.objects.filter(
-            component=instance, 
-            is_active=True
-        )
-        
-        if notifications.exists():
-            emails = [n.user.email for n in notifications]
-            
-            send_mail(
-                subject=f'¡Ya hay stock!: {instance.name}',
-                message=f'El componente {instance.name} ya está disponible con {instance.stock} unidades.',
-                from_email=None, 
-                recipient_list=emails,
-                fail_silently=True,
-            )
-
-            notifications.update(is_active=False)
+def notify_restock(sender, instance, created, **kwargs):
+    """
+    Registra una reposición en el outbox solo cuando el stock pasa de 0 a >0.
+    El envío de correos lo hace el comando `process_restock_events`.
+    """
+    previous = getattr(instance, '_previous_values', None)
+    instance._loaded_stock = instance.stock
+
+    if created or previous is None:
+        return
+    if previous[1] <= 0 < instance.stock:
+        RestockEvent.objects.create(component_ids=[instance.pk])
             
-@receiver([post_save, post_delete], sender=Review)
-def update_store_rating(sender, instance, **kwargs):
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    if instance.pk and not hasattr(instance, '_loaded_rating'):
+        instance._loaded_rating = Review.objects.filter(pk=instance.pk).values_list('store_id', 'rating').first()
+
+@receiver(post_save, sender=Review)
+def update_store_rating(sender, instance, created, **kwargs):
     """
-    Recalcula el promedio de estrellas y el total de reseñas 
-    cada vez que se crea, edita o borra una Review.
+    Aplica al rating de la tienda solo la diferencia que introduce esta reseña,
+    en un único UPDATE (ver ratings.apply_rating_delta).
     """
-    store = instance.store
-    stats = Review.objects.filter(store=store).aggregate(
-        average=Avg('rating'),
-        total=Count('id')
-    )
-    
-    # Actualizamos los nuevos campos del modelo Store
-    store.rating = stats['average'] or 0
-    store.review_count = stats['total'] or 0
-    store.save()
\ No newline at end of file
+    previous = None if created else getattr(instance, '_loaded_rating', None)
+    instance._loaded_rating = (instance.store_id, instance.rating)
+
+    if previous is None:
+        apply_rating_delta(instance.store_id, 1, instance.rating)
+        return
+
+    previous_store_id, previous_rating = previous
+    if previous_store_id != instance.store_id:
+        apply_rating_delta(previous_store_id, -1, -previous_rating)
+        apply_rating_delta(instance.store_id, 1, instance.rating)
+    else:
+        apply_rating_delta(instance.store_id, 0, instance.rating - previous_rating)
+
+@receiver(post_delete, sender=Review)
+def remove_store_rating(sender, instance, **kwargs):
+    store_id, rating = getattr(instance, '_loaded_rating', (instance.store_id, instance.rating))
+    apply_rating_delta(store_id, -1, -rating)
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, instance, **kwargs):
+    # Rating, total y últimas reseñas de la tienda
+    bump('stores')
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_delete, sender=WishlistItem)
+def invalidate_wishlist_counts(sender, instance, **kwargs):
+    # times_in_wishlist del componente
+    bump('components')
+
+def _wishlist_owner(wishlist_id):
+    return Wishlist.objects.filter(pk=wishlist_id).values_list('user_id', flat=True).first()
+
+@receiver(post_save, sender=WishlistItem)
+def add_wishlist_cooccurrences(sender, instance, created, **kwargs):
+    if created:
+        user_id = _wishlist_owner(instance.wishlist_id)
+        if user_id is not None:
+            record_wishlist_change(user_id, instance.component_id, 1)
+
+@receiver(post_delete, sender=WishlistItem)
+def remove_wishlist_cooccurrences(sender, instance, **kwargs):
+    user_id = _wishlist_owner(instance.wishlist_id)
+    if user_id is not None:
+        record_wishlist_change(user_id, instance.component_id, -1)
+
+# --- Contadores del panel (apps.interactions.metrics) ---
+
+def _inventory_deltas(price, stock, sign):
+    return {
+        'inventory.components': sign,
+        'inventory.total_value': sign * price,
+        'inventory.out_of_stock': sign * (stock == 0),
+        'inventory.low_stock': sign * (stock <= metrics.LOW_STOCK_THRESHOLD),
+    }
+
+@receiver(post_save, sender=Component)
+def count_component(sender, instance, created, **kwargs):
+    # Instantánea de remember_previous_values
+    previous = getattr(instance, '_previous_values', None)
+    instance._loaded_price = instance.price
+    deltas = _inventory_deltas(instance.price, instance.stock, 1)
+    if previous is not None and not created:
+        for key, value in _inventory_deltas(*previous, -1).items():
+            deltas[key] += value
+    for key, value in deltas.items():
+        metrics.incr(key, value)
+
+@receiver(post_delete, sender=Component)
+def uncount_component(sender, instance, **kwargs):
+    for key, value in _inventory_deltas(instance.price, instance.stock, -1).items():
+        metrics.incr(key, value)
+
+@receiver(post_save, sender=User)
+def count_user(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_loaded_role', None)
+    instance._loaded_role = instance.role
+    if created:
+        metrics.incr('users.total', 1)
+        metrics.incr(f'users.role.{instance.role}', 1)
+    elif previous is not None and previous != instance.role:
+        metrics.incr(f'users.role.{previous}', -1)
+        metrics.incr(f'users.role.{instance.role}', 1)
+
+@receiver(post_delete, sender=User)
+def uncount_user(sender, instance, **kwargs):
+    metrics.incr('users.total', -1)
+    metrics.incr(f"users.role.{getattr(instance, '_loaded_role', instance.role)}", -1)
+
+@receiver(post_save, sender=Store)
+def count_store(sender, instance, created, **kwargs):
+    if created:
+        metrics.incr('stores.total', 1)
+
+@receiver(post_delete, sender=Store)
+def uncount_store(sender, instance, **kwargs):
+    metrics.incr('stores.total', -1)
+
+@receiver(post_save, sender=SearchHistory)
+def roll_up_search(sender, instance, created, **kwargs):
+    if created:
+        record_search(instance.query, instance.created_at)
+
+@receiver(post_save, sender=SearchHistory)
+def count_search(sender, instance, created, **kwargs):
+    # Los términos se cuentan en el rollup diario (roll_up_search)
+    if created:
+        metrics.incr('search.total', 1)
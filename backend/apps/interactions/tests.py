@@ -1,3 +1,453 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from apps.inventory.models import Category, Component
+from apps.stores.models import Store
+from apps.users.models import User
+from .models import (
+    ComponentCooccurrence, MetricCounter, MetricRollup, RestockEvent, Review, SearchHistory, SearchQueryDaily,
+    StockNotification, Wishlist, WishlistItem,
+)
+from .metrics import counters, rollup
+from .ratings import reconcile_store_ratings
+from .recommendations import build_cooccurrences, popular_components
+from .restock import dispatch_batch
+from .searches import clear_popular_cache, popular_queries, prune_history, rebuild_daily
+
+
+def make_store(name='Tienda'):
+    owner = User.objects.create_user(
+        email=f'{name.lower()}@test.com', username=name.lower(), password='x', role='proveedor'
+    )
+    return Store.objects.create(owner=owner, name=name, address='Calle 1')
+
+
+def make_component(store, stock=0, name='NE555', **extra):
+    category, _ = Category.objects.get_or_create(name='Integrados')
+    return Component.objects.create(
+        store=store, category=category, name=name, mpn=name,
+        description='', stock=stock, **{'price': Decimal('1.00'), **extra}
+    )
+
+
+class RestockOutboxTests(TestCase):
+    def setUp(self):
+        self.component = make_component(make_store(), stock=0)
+        self.users = [
+            User.objects.create_user(email=f'c{i}@test.com', username=f'c{i}', password='x')
+            for i in range(3)
+        ]
+        for user in self.users:
+            StockNotification.objects.create(user=user, component=self.component)
+
+    def test_event_only_on_zero_to_positive_transition(self):
+        self.component.stock = 5
+        self.component.save()
+        self.component.stock = 8
+        self.component.save()
+        Component.objects.get(pk=self.component.pk).save()
+        self.assertEqual(RestockEvent.objects.count(), 1)
+        self.assertEqual(RestockEvent.objects.get().component_ids, [self.component.pk])
+        # El guardado no envía correos por sí mismo
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_worker_sends_one_message_per_user_over_one_connection(self):
+        other = make_component(self.component.store, stock=0, name='LM317')
+        StockNotification.objects.create(user=self.users[0], component=other)
+        for component in (self.component, other):
+            component.stock = 3
+            component.save()
+
+        with mock.patch('apps.interactions.restock.get_connection', wraps=mail.get_connection) as conn:
+            # Reclamar el lote (4), avisos (1), desactivarlos por correo (3), cerrar eventos (1)
+            with self.assertNumQueries(9):
+                events, sent = dispatch_batch()
+        self.assertEqual(conn.call_count, 1)
+        self.assertEqual((events, sent), (2, 3))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['c0@test.com', 'c1@test.com', 'c2@test.com'])
+        self.assertFalse(StockNotification.objects.filter(is_active=True).exists())
+        self.assertFalse(RestockEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_failed_send_is_retried_with_backoff(self):
+        self.component.stock = 1
+        self.component.save()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('smtp caído')):
+            self.assertEqual(dispatch_batch(), (1, 0))
+        event = RestockEvent.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertIsNone(event.processed_at)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+        # Todavía no toca reintentar
+        self.assertEqual(dispatch_batch(), (0, 0))
+
+        RestockEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_batch(), (1, 3))
+        self.assertIsNotNone(RestockEvent.objects.get().processed_at)
+
+    def test_partial_failure_only_retries_pending_recipients(self):
+        self.component.stock = 1
+        self.component.save()
+        send = mail.get_connection().__class__.send_messages
+
+        def flaky(backend, messages):
+            if messages[0].to == ['c1@test.com']:
+                raise OSError('buzón lleno')
+            return send(backend, messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', flaky):
+            self.assertEqual(dispatch_batch(), (1, 2))
+        self.assertEqual(RestockEvent.objects.get().attempts, 1)
+        self.assertEqual(list(StockNotification.objects.filter(is_active=True).values_list('user__email', flat=True)),
+                         ['c1@test.com'])
+
+        RestockEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_batch(), (1, 1))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['c0@test.com', 'c1@test.com', 'c2@test.com'])
+
+
+class StoreRatingTests(TestCase):
+    def setUp(self):
+        self.store = make_store()
+        self.clients = [
+            User.objects.create_user(email=f'r{i}@test.com', username=f'r{i}', password='x')
+            for i in range(3)
+        ]
+        self.api = APIClient()
+
+    def _stats(self):
+        self.store.refresh_from_db()
+        return self.store.review_count, self.store.rating_sum, self.store.rating
+
+    def test_create_update_delete_apply_deltas(self):
+        self.api.force_authenticate(self.clients[0])
+        response = self.api.post('/api/reviews/', {'store': self.store.pk, 'rating': 5, 'comment': 'Bien'})
+        self.assertEqual(response.status_code, 201, response.content)
+        Review.objects.create(user=self.clients[1], store=self.store, rating=2, comment='Regular')
+        self.assertEqual(self._stats(), (2, 7, Decimal('3.50')))
+
+        review_id = response.json()['id']
+        self.api.patch(f'/api/reviews/{review_id}/', {'store': self.store.pk, 'rating': 4})
+        self.assertEqual(self._stats(), (2, 6, Decimal('3.00')))
+
+        self.api.delete(f'/api/reviews/{review_id}/')
+        self.assertEqual(self._stats(), (1, 2, Decimal('2.00')))
+        Review.objects.get().delete()
+        self.assertEqual(self._stats(), (0, 0, Decimal('0.00')))
+
+    def test_review_write_touches_store_once(self):
+        review = Review.objects.create(user=self.clients[0], store=self.store, rating=3, comment='Ok')
+        review.rating = 1
+        # UPDATE de la reseña + UPDATE de la tienda (más el savepoint)
+        with self.assertNumQueries(4):
+            review.save()
+
+    def test_review_list_loads_authors_in_the_same_query(self):
+        for user in self.clients:
+            Review.objects.create(user=user, store=self.store, rating=4, comment='Bien')
+        # Una sola consulta: la página con autores y tienda en el JOIN
+        with self.assertNumQueries(1):
+            response = self.api.get('/api/reviews/', {'store': self.store.pk})
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_incremental_rating_is_rounded_like_reconcile(self):
+        for user, rating in zip(self.clients, (5, 4, 4)):
+            Review.objects.create(user=user, store=self.store, rating=rating, comment='Ok')
+        self.assertEqual(self._stats(), (3, 13, Decimal('4.33')))
+        self.assertEqual(Store.objects.filter(pk=self.store.pk, rating=Decimal('4.33')).count(), 1)
+        self.assertEqual(reconcile_store_ratings(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        Review.objects.create(user=self.clients[0], store=self.store, rating=5, comment='Bien')
+        Review.objects.create(user=self.clients[1], store=self.store, rating=4, comment='Bien')
+        empty = make_store('Vacia')
+        Store.objects.filter(pk=self.store.pk).update(review_count=9, rating_sum=1, rating=Decimal('1'))
+        Store.objects.filter(pk=empty.pk).update(review_count=3, rating=Decimal('2'))
+
+        self.assertEqual(reconcile_store_ratings(), 2)
+        self.assertEqual(self._stats(), (2, 9, Decimal('4.50')))
+        empty.refresh_from_db()
+        self.assertEqual((empty.review_count, empty.rating), (0, Decimal('0')))
+        self.assertEqual(reconcile_store_ratings(), 0)
+
+
+class WishlistTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='cli@test.com', username='cli', password='x')
+        self.client.force_authenticate(self.user)
+        self.wishlist = Wishlist.objects.create(user=self.user, name='Proyecto')
+        self.store = make_store()
+
+    def _add(self, count, price='2.50'):
+        components = []
+        for _ in range(count):
+            component = make_component(self.store, stock=5, name=f'C{Component.objects.count()}',
+                                       price=Decimal(price))
+            WishlistItem.objects.create(wishlist=self.wishlist, component=component, quantity=2)
+            components.append(component)
+        return components
+
+    def _count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_list_and_export_query_counts_are_constant(self):
+        self._add(2)
+        url = f'/api/wishlist/{self.wishlist.pk}/export_budget/'
+        small_list, _ = self._count('/api/wishlist/')
+        small_export, _ = self._count(url)
+        self._add(6)
+        big_list, data = self._count('/api/wishlist/')
+        self.assertEqual(big_list, small_list)
+        self.assertEqual(data[0]['total_budget'], 40.0)
+        big_export, data = self._count(url)
+        self.assertEqual(big_export, small_export)
+        self.assertEqual(data['total_budget'], 40.0)
+        self.assertEqual(len(data['items']), 8)
+
+    def test_toggle_returns_fresh_full_wishlist(self):
+        component = make_component(self.store, stock=5, name='LM317', price=Decimal('3.00'))
+        url = f'/api/wishlist/{self.wishlist.pk}/toggle_item/'
+        data = self.client.post(url, {'product_id': component.pk}).json()
+        self.assertEqual([i['component']['id'] for i in data['items']], [component.pk])
+        self.assertEqual(data['total_budget'], 3.0)
+        data = self.client.post(url, {'product_id': component.pk}).json()
+        self.assertEqual(data['items'], [])
+
+    def test_delta_mode_returns_only_affected_item_and_totals(self):
+        self._add(5)
+        component = make_component(self.store, stock=5, name='LM317', price=Decimal('3.00'))
+        url = f'/api/wishlist/{self.wishlist.pk}/toggle_item/?delta=1'
+        data = self.client.post(url, {'product_id': component.pk}).json()
+        self.assertEqual(data['result'], 'added')
+        self.assertEqual(data['item']['component']['id'], component.pk)
+        self.assertEqual((data['items_count'], data['total_budget']), (6, 28.0))
+
+        data = self.client.post(f'/api/wishlist/{self.wishlist.pk}/update_quantity/',
+                                {'product_id': component.pk, 'quantity': 4, 'delta': True}).json()
+        self.assertEqual((data['result'], data['item']['subtotal']), ('updated', 12.0))
+        self.assertNotIn('items', data)
+
+        data = self.client.post(url, {'product_id': component.pk}).json()
+        self.assertEqual((data['result'], data['item'], data['total_budget']), ('removed', None, 25.0))
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        store = make_store()
+        self.components = [make_component(store, stock=5, name=f'C{i}') for i in range(6)]
+        self.users = [
+            User.objects.create_user(email=f'u{i}@test.com', username=f'u{i}', password='x')
+            for i in range(3)
+        ]
+        self.wishlists = [Wishlist.objects.create(user=user) for user in self.users]
+
+    def _save(self, user_index, *component_indexes):
+        for index in component_indexes:
+            WishlistItem.objects.create(
+                wishlist=self.wishlists[user_index], component=self.components[index]
+            )
+
+    def _scores(self, index):
+        return dict(
+            ComponentCooccurrence.objects.filter(component=self.components[index])
+            .values_list('related_id', 'score')
+        )
+
+    def test_build_combines_wishlists_and_searches(self):
+        self._save(0, 0, 1)
+        self._save(1, 0, 1, 2)
+        SearchHistory.objects.create(user=self.users[2], query='c3')
+        self._save(2, 0)
+        build_cooccurrences()
+        c = [component.pk for component in self.components]
+        self.assertEqual(self._scores(0), {c[1]: 2.0, c[2]: 1.0, c[3]: 0.5})
+
+    def test_incremental_updates_match_rebuild(self):
+        self._save(0, 0, 1)
+        self._save(1, 0, 2)
+        incremental = {i: self._scores(i) for i in range(3)}
+        self.assertEqual(incremental[0], {self.components[1].pk: 1.0, self.components[2].pk: 1.0})
+
+        WishlistItem.objects.filter(wishlist=self.wishlists[1], component=self.components[2]).delete()
+        self.assertEqual(self._scores(2), {})
+        incremental = {i: self._scores(i) for i in range(3)}
+        build_cooccurrences()
+        self.assertEqual({i: self._scores(i) for i in range(3)}, incremental)
+
+    def test_user_recommendations_are_cached_and_invalidated(self):
+        self._save(0, 0, 1, 2)
+        self._save(1, 0)
+        self.client.force_authenticate(self.users[1])
+        ids = [row['id'] for row in self.client.get('/api/components/recommendations/').json()]
+        self.assertEqual(ids[:2], [self.components[1].pk, self.components[2].pk])
+        self.assertNotIn(self.components[0].pk, ids)
+
+        with self.assertNumQueries(1):  # solo los componentes; el top-K sale de caché
+            self.client.get('/api/components/recommendations/')
+
+        self._save(1, 1)
+        ids = [row['id'] for row in self.client.get('/api/components/recommendations/').json()]
+        self.assertEqual(ids[0], self.components[2].pk)
+
+    def test_anonymous_users_get_cached_popular_sample(self):
+        self._save(0, 4)
+        self._save(1, 4, 5)
+        ids = [row['id'] for row in self.client.get('/api/components/recommendations/').json()]
+        self.assertEqual(len(ids), 5)
+        self.assertTrue(set(ids) <= {c.pk for c in self.components})
+        with self.assertNumQueries(1):
+            self.client.get('/api/components/recommendations/')
+        self.assertEqual(popular_components()[0][0], self.components[4].pk)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='x', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.store = make_store()
+        self.component = make_component(self.store, stock=0, price=Decimal('10.00'))
+        make_component(self.store, stock=20, name='LM358', price=Decimal('5.00'))
+
+    def _values(self):
+        return dict(MetricCounter.objects.values_list('key', 'value'))
+
+    def test_counters_follow_signals(self):
+        counters(['users', 'stores', 'inventory'])
+        self.assertEqual(self._values()['inventory.total_value'], Decimal('15.00'))
+
+        self.component.stock = 3
+        self.component.price = Decimal('12.00')
+        self.component.save()
+        make_store('Otra')
+        self.admin.role = 'proveedor'
+        self.admin.save()
+        LM358 = Component.objects.get(name='LM358')
+        LM358.delete()
+
+        values = self._values()
+        self.assertEqual(values['inventory.components'], 1)
+        self.assertEqual(values['inventory.out_of_stock'], 0)
+        self.assertEqual(values['inventory.low_stock'], 1)
+        self.assertEqual(values['inventory.total_value'], Decimal('12.00'))
+        self.assertEqual(values['stores.total'], 2)
+        self.assertEqual(values['users.total'], 3)
+        self.assertEqual(values['users.role.proveedor'], 3)
+        self.assertEqual(values['users.role.cliente'], 0)
+        # Los deltas coinciden con un recálculo completo
+        self.assertEqual(counters(['users', 'stores', 'inventory'], refresh=True), values)
+
+    def test_bulk_writes_mark_inventory_stale(self):
+        counters(['inventory'])
+        Component.objects.filter(pk=self.component.pk).update(stock=7)
+        self.assertFalse(MetricCounter.objects.filter(key__startswith='inventory.').exists())
+        self.assertEqual(counters(['inventory'])['inventory.out_of_stock'], 0)
+
+        Component.objects.filter(pk=self.component.pk).update(name='NE555P')
+        self.assertTrue(MetricCounter.objects.filter(key__startswith='inventory.').exists())
+
+    def test_analytics_is_cached_until_refresh(self):
+        SearchHistory.objects.create(user=self.admin, query='ne555')
+        SearchHistory.objects.create(user=self.admin, query='ne555')
+        SearchHistory.objects.create(user=self.admin, query='lm358')
+        data = self.client.get('/api/analytics/').json()
+        self.assertEqual(data['user_summary'], {'clientes': 1, 'proveedores': 1, 'total': 2})
+        self.assertEqual(data['inventory_summary'], {
+            'total_value': 15.0, 'out_of_stock_count': 1, 'total_components': 2,
+        })
+        self.assertEqual(data['top_searches'][0], {'query': 'ne555', 'count': 2})
+        self.assertEqual(data['top_stores'][0]['name'], 'Tienda')
+
+        make_component(self.store, stock=0, name='BC547')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/analytics/').json()
+        self.assertEqual(cached, data)
+
+        fresh = self.client.get('/api/analytics/?refresh=1').json()
+        self.assertEqual(fresh['inventory_summary']['total_components'], 3)
+        self.assertEqual(fresh['inventory_summary']['out_of_stock_count'], 2)
+
+    def test_platform_stats_from_counters_and_rollups(self):
+        data = self.client.get('/api/platform-stats/').json()
+        self.assertEqual(data['total_stores'], 1)
+        self.assertEqual(data['total_components'], 2)
+        self.assertEqual(data['low_stock_alerts'], 1)
+        self.assertEqual([row['name'] for row in data['recent_registrations']], ['Tienda'])
+        self.assertTrue(data['recent_registrations'][0]['created_at'].endswith('Z'))
+
+    def test_searches_are_counted_and_rolled_up(self):
+        counters(['search'])
+        for query in ['ne555', 'lm358', 'lm358']:
+            SearchHistory.objects.create(user=self.admin, query=query)
+        self.assertEqual(self._values()['search.total'], 3)
+        # Un contador por término crecería sin límite: los términos están en el rollup diario
+        self.assertFalse(MetricCounter.objects.filter(key__startswith='search.term.').exists())
+        top = rollup(['top_searches'])['top_searches']
+        self.assertEqual(top, [{'query': 'lm358', 'count': 2}, {'query': 'ne555', 'count': 1}])
+        self.assertEqual(MetricRollup.objects.get(name='top_searches').data, top)
+
+
+class SearchRollupTests(TestCase):
+    def setUp(self):
+        clear_popular_cache()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='u@test.com', username='u', password='x')
+        self.client.force_authenticate(self.user)
+
+    def _search(self, query, days_ago=0):
+        entry = SearchHistory.objects.create(user=self.user, query=query)
+        if days_ago:
+            SearchHistory.objects.filter(pk=entry.pk).update(created_at=timezone.now() - timezone.timedelta(days=days_ago))
+        return entry
+
+    def _daily(self):
+        return sorted(SearchQueryDaily.objects.values_list('query', 'day', 'count'))
+
+    def test_rollup_is_incremental_and_matches_rebuild(self):
+        for query in ['ne555', 'lm358', 'ne555']:
+            self._search(query)
+        today = timezone.localdate()
+        self.assertEqual(self._daily(), [('lm358', today, 1), ('ne555', today, 2)])
+        incremental = self._daily()
+        rebuild_daily()
+        self.assertEqual(self._daily(), incremental)
+
+    def test_suggestions_come_from_rollup_with_process_cache(self):
+        for query in ['ne555', 'lm358', 'lm358']:
+            self._search(query)
+        data = self.client.get('/api/wishlist/search-suggestions/').json()
+        self.assertEqual(data, {'popular': ['lm358', 'ne555'], 'recent': ['lm358', 'lm358', 'ne555']})
+
+        self._search('bc547')
+        self._search('bc547')
+        self._search('bc547')
+        with self.assertNumQueries(0):
+            self.assertEqual(popular_queries(), ['lm358', 'ne555'])
+        clear_popular_cache()
+        self.assertEqual(popular_queries()[0], 'bc547')
 
-# Create your tests here.
+    def test_prune_keeps_rollup(self):
+        old = self._search('ne555', days_ago=200)
+        self._search('lm358')
+        rebuild_daily()
+        self.assertEqual(prune_history(days=90, batch_size=1), 1)
+        self.assertFalse(SearchHistory.objects.filter(pk=old.pk).exists())
+        self.assertEqual(SearchHistory.objects.count(), 1)
+        self.assertEqual(SearchQueryDaily.objects.get(query='ne555').count, 1)
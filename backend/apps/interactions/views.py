@@ -4,18 +4,20 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 
 # MODELS IMPORTS
-from apps.users.models import User
-from .models import Review, Wishlist, WishlistItem, StockNotification, SearchHistory
-from apps.stores.models import Store
+from .models import Review, Wishlist, WishlistItem, StockNotification, SearchHistory, budget_sum
 from apps.inventory.models import Component
 
-from .serializers import ReviewSerializer, WishlistSerializer
+from .serializers import ReviewSerializer, WishlistSerializer, WishlistItemSerializer
+from .metrics import analytics_summary
+from .searches import popular_queries
 from rest_framework.permissions import IsAdminUser
-from django.db.models import Count, Sum, Q, Avg
+from django.db.models import Count
+from core.pagination import ReviewPagination
 
 class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    pagination_class = ReviewPagination
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -23,24 +25,12 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated()]
 
     def get_queryset(self):
-        queryset = Review.objects.all()
+        queryset = Review.objects.select_related('user', 'store')
         store_id = self.request.query_params.get('store')
         if store_id:
             queryset = queryset.filter(store_id=store_id)
         return queryset
 
-    def _update_store_stats(self, store):
-        """
-        Recalcula el promedio de estrellas y el total de reseñas de la tienda.
-        """
-        stats = store.reviews.aggregate(
-            avg_rating=Avg('rating'), 
-            count=Count('id')
-        )
-        store.rating = stats['avg_rating'] or 0.0
-        store.review_count = stats['count'] or 0
-        store.save()
-
     def perform_create(self, serializer):
         store = serializer.validated_data.get('store')
         
@@ -48,71 +38,99 @@ class ReviewViewSet(viewsets.ModelViewSet):
         if Review.objects.filter(user=self.request.user, store=store).exists():
             raise ValidationError({"error": "Ya has dejado una reseña para esta tienda."})
             
-        review = serializer.save(user=self.request.user)
-        self._update_store_stats(store)
+        # El rating de la tienda lo actualiza la señal de Review (apps.interactions.ratings)
+        serializer.save(user=self.request.user)
 
     def update(self, request, *args, **kwargs):
         """
         Validación de seguridad para asegurar que solo el dueño edite.
         """
         instance = self.get_object()
-        if instance.user != request.user:
+        if instance.user_id != request.user.pk:
             return Response(
                 {"error": "No tienes permiso para editar esta reseña."}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         return super().update(request, *args, **kwargs)
 
-    def perform_update(self, serializer):
-        # Al actualizar, guardamos y recalculamos stats de la tienda
-        review = serializer.save()
-        self._update_store_stats(review.store)
-
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        store = instance.store
         
-        if instance.user != request.user:
+        if instance.user_id != request.user.pk:
             return Response(
                 {"error": "No tienes permiso para eliminar esta reseña."}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        response = super().destroy(request, *args, **kwargs)
-        self._update_store_stats(store)
-        return response
+        return super().destroy(request, *args, **kwargs)
     
 class WishlistViewSet(viewsets.ModelViewSet):
     serializer_class = WishlistSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # Acciones que modifican items: no necesitan precargar el grafo completo
+    ITEM_ACTIONS = ('toggle_item', 'update_quantity', 'clear_all')
+
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        queryset = Wishlist.objects.filter(user=self.request.user)
+        if self.action in self.ITEM_ACTIONS:
+            return queryset
+        return queryset.with_items()
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def _wants_delta(self, request):
+        value = request.query_params.get('delta', request.data.get('delta', ''))
+        return str(value).lower() in ('1', 'true', 'yes')
+
+    def _wishlist_response(self, wishlist):
+        # Se vuelve a leer con el grafo precargado; la instancia actual ya no refleja los items
+        wishlist = Wishlist.objects.with_items().get(pk=wishlist.pk)
+        serializer = self.get_serializer(wishlist)
+        return Response(serializer.data)
+
+    def _delta_response(self, wishlist, product_id, result):
+        """Solo el item afectado y los totales, sin re-serializar la lista entera."""
+        totals = WishlistItem.objects.filter(wishlist=wishlist).aggregate(
+            total_budget=budget_sum(), items_count=Count('id')
+        )
+        item = None
+        if result != 'removed':
+            item = WishlistItem.objects.get(wishlist=wishlist, component_id=product_id)
+            item.component = Component.objects.for_listing().get(pk=product_id)
+            item = WishlistItemSerializer(item, context=self.get_serializer_context()).data
+        return Response({
+            'wishlist': wishlist.pk,
+            'product_id': product_id,
+            'result': result,
+            'item': item,
+            'total_budget': totals['total_budget'],
+            'items_count': totals['items_count'],
+        })
+
     @action(detail=True, methods=['post'])
     def toggle_item(self, request, pk=None):
         wishlist = self.get_object()
         product_id = request.data.get('product_id')
-        item_qs = WishlistItem.objects.filter(wishlist=wishlist, component_id=product_id)
+        deleted, _ = WishlistItem.objects.filter(wishlist=wishlist, component_id=product_id).delete()
 
-        if item_qs.exists():
-            item_qs.delete()
+        if deleted:
+            result = 'removed'
         else:
             WishlistItem.objects.create(wishlist=wishlist, component_id=product_id, quantity=1)
-            
-        serializer = self.get_serializer(wishlist)
-        return Response(serializer.data)
+            result = 'added'
+
+        if self._wants_delta(request):
+            return self._delta_response(wishlist, product_id, result)
+        return self._wishlist_response(wishlist)
     
     @action(detail=True, methods=['post'])
     def clear_all(self, request, pk=None):
         wishlist = self.get_object()
         WishlistItem.objects.filter(wishlist=wishlist).delete()
         
-        serializer = self.get_serializer(wishlist)
-        return Response(serializer.data)
+        return self._wishlist_response(wishlist)
 
     @action(detail=True, methods=['post'])
     def update_quantity(self, request, pk=None):
@@ -124,17 +142,21 @@ class WishlistViewSet(viewsets.ModelViewSet):
             item = WishlistItem.objects.get(wishlist=wishlist, component_id=product_id)
             if quantity > 0:
                 item.quantity = quantity
-                item.save()
+                item.save(update_fields=['quantity'])
+                result = 'updated'
             else:
                 item.delete()
+                result = 'removed'
         except WishlistItem.DoesNotExist:
             return Response({'error': 'El item no está en la lista'}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = self.get_serializer(wishlist)
-        return Response(serializer.data)
+        if self._wants_delta(request):
+            return self._delta_response(wishlist, product_id, result)
+        return self._wishlist_response(wishlist)
 
     @action(detail=True, methods=['get'])
     def export_budget(self, request, pk=None):
+        # get_queryset ya trae items, componentes, tiendas y el total anotado
         wishlist = self.get_object()
         items = wishlist.wishlistitem_set.all()
         
@@ -142,7 +164,7 @@ class WishlistViewSet(viewsets.ModelViewSet):
             "project_name": wishlist.name,
             "user": wishlist.user.get_full_name() or wishlist.user.email,
             "date": wishlist.updated_at.strftime("%d/%m/%Y"),
-            "total_budget": sum(item.quantity * item.component.price for item in items),
+            "total_budget": wishlist.total_budget,
             "items": [
                 {
                     "component": item.component.name,
@@ -171,17 +193,14 @@ class WishlistViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], url_path='search-suggestions')
     def search_suggestions(self, request):
-        popular_queries = SearchHistory.objects.values('query').annotate(
-            total=Count('query')
-        ).order_by('-total')[:5]
-        
+        # Populares desde el rollup diario (caché en memoria); recientes por el índice (user, -created_at)
         user_recent = []
         if request.user.is_authenticated:
-            user_recent = SearchHistory.objects.filter(user=request.user).values('query')[:3]
+            user_recent = SearchHistory.objects.filter(user=request.user).values_list('query', flat=True)[:3]
 
         return Response({
-            'popular': [item['query'] for item in popular_queries],
-            'recent': [item['query'] for item in user_recent]
+            'popular': popular_queries(),
+            'recent': list(user_recent)
         })
 
     @action(detail=False, methods=['post'], url_path='save-search')
@@ -204,38 +223,6 @@ class AnalyticsViewSet(viewsets.ViewSet):
     permission_classes = [IsAdminUser]
 
     def list(self, request):
-        user_stats = User.objects.aggregate(
-            total_clientes=Count('id', filter=Q(role='cliente')),
-            total_proveedores=Count('id', filter=Q(role='proveedor')),
-            total_general=Count('id')
-        )
-        
-        top_stores = Store.objects.all().order_by('-rating', '-review_count')[:5]
-        
-        top_searches = SearchHistory.objects.values('query').annotate(
-            count=Count('query')).order_by('-count')[:5]
-
-        stock_demands = StockNotification.objects.values('component__name').annotate(
-            total=Count('id')).order_by('-total')[:5]
-
-        inventory_stats = Component.objects.aggregate(
-            total_value=Sum('price'),
-            out_of_stock=Count('id', filter=Q(stock=0)),
-            total_items=Count('id')
-        )
-
-        return Response({
-            'user_summary': {
-                'clientes': user_stats['total_clientes'],
-                'proveedores': user_stats['total_proveedores'],
-                'total': user_stats['total_general']
-            },
-            'top_stores': list(top_stores.values('name', 'rating', 'review_count')),
-            'top_searches': list(top_searches),
-            'stock_demands': list(stock_demands),
-            'inventory_summary': {
-                'total_value': float(inventory_stats['total_value']) if inventory_stats['total_value'] else 0,
-                'out_of_stock_count': inventory_stats['out_of_stock'],
-                'total_components': inventory_stats['total_items']
-            }
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        # Contadores + rollups cacheados (ver apps.interactions.metrics); ?refresh=1 recalcula
+        refresh = request.query_params.get('refresh') == '1'
+        return Response(analytics_summary(refresh=refresh), status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""Lecturas públicas del catálogo con el ORM asíncrono (ver core.async_views)."""
+from asgiref.sync import sync_to_async
+
+from core.async_views import async_api_view
+from core.pagination import ComponentPagination
+from .models import Category, Component
+from .serializers import CategorySerializer, ComponentSerializer
+from .views import ComponentViewSet
+
+# Parámetros que no filtran: si solo vienen estos, el queryset se arma sin consultar
+PAGINATION_PARAMS = {'cursor', 'page_size'}
+
+
+def _filter_components(request, queryset):
+    # Los mismos filter_backends y ComponentFilter que /api/components/
+    view = ComponentViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+    return view.filter_queryset(queryset)
+
+
+async def _serialize_components(queryset, request):
+    components = [component async for component in queryset.aiterator()]
+    return ComponentSerializer(components, many=True, context={'request': request}).data
+
+
+@async_api_view
+async def component_list(request):
+    """GET /api/async/components/ : mismos filtros, ?search= y cursor que /api/components/."""
+    queryset = Component.objects.for_listing()
+    if set(request.query_params) - PAGINATION_PARAMS:
+        # Validar ?category=/?store= y buscar con el backend sí consultan la base
+        queryset = await sync_to_async(_filter_components)(request, queryset)
+    paginator = ComponentPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = ComponentSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_data(serializer.data)
+
+
+@async_api_view
+async def component_detail(request, pk):
+    component = await Component.objects.for_listing().aget(pk=pk)
+    return ComponentSerializer(component, context={'request': request}).data
+
+
+@async_api_view
+async def price_comparison(request, pk):
+    component = await Component.objects.only('mpn_normalized').aget(pk=pk)
+    if not component.mpn_normalized:
+        return []
+    comparisons = Component.objects.for_listing().filter(
+        mpn_normalized=component.mpn_normalized
+    ).exclude(id=component.id)
+    return await _serialize_components(comparisons, request)
+
+
+@async_api_view
+async def category_list(request):
+    categories = [category async for category in Category.objects.all().aiterator()]
+    return CategorySerializer(categories, many=True, context={'request': request}).data
@@ -0,0 +1,119 @@
+"""
+Autocompletado por prefijo de nombres y MPN (acción `autocomplete` de
+ComponentViewSet).
+
+Cada proceso guarda un índice en memoria con dos arreglos ordenados:
+
+- nombres: una clave por cada palabra del nombre hasta el final
+  ("timer ne555 dip", "ne555 dip", "dip"), así "ne5" encuentra "Timer NE555";
+- MPN compactos ("lc1d32"), así "LC1-D3" encuentra "LC1D32".
+
+La búsqueda es un `bisect` más un recorrido hasta agotar el prefijo o llegar
+a AUTOCOMPLETE_MAX_RESULTS. El índice se reconstruye con una sola consulta
+cuando cambia la versión guardada en la caché compartida, que las señales de
+Component/Store y las escrituras masivas renuevan (`invalidate`).
+"""
+import threading
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import serializers
+
+from .models import Component
+from .search import compact_mpn, tokenize
+
+MAX_RESULTS = getattr(settings, 'AUTOCOMPLETE_MAX_RESULTS', 10)
+MIN_QUERY_LENGTH = 2
+VERSION_KEY = 'autocomplete:version'
+
+PRICE_FIELD = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+_lock = threading.Lock()
+_index = None
+
+
+def _lookup(keys, ids, prefix):
+    """Ids con alguna clave que empieza por `prefix`, en orden de clave."""
+    position = bisect_left(keys, prefix)
+    while position < len(keys) and keys[position].startswith(prefix):
+        yield ids[position]
+        position += 1
+
+
+class PrefixIndex:
+    def __init__(self, version, rows):
+        self.version = version
+        self.items = {}
+        names = []
+        mpns = []
+        for pk, name, mpn, store_name, price in rows:
+            self.items[pk] = {
+                'id': pk, 'name': name, 'mpn': mpn,
+                'store_name': store_name, 'price': PRICE_FIELD.to_representation(price),
+            }
+            tokens = tokenize(name)
+            names.extend((' '.join(tokens[i:]), pk) for i in range(len(tokens)))
+            if compact_mpn(mpn):
+                mpns.append((compact_mpn(mpn), pk))
+        names.sort()
+        mpns.sort()
+        self.name_keys = [key for key, _ in names]
+        self.name_ids = [pk for _, pk in names]
+        self.mpn_keys = [key for key, _ in mpns]
+        self.mpn_ids = [pk for _, pk in mpns]
+
+    def search(self, query, limit=MAX_RESULTS):
+        name_prefix = ' '.join(tokenize(query))
+        mpn_prefix = compact_mpn(query)
+        found = {}
+        # Primero coincidencias de MPN (más específicas), luego de nombre
+        for keys, ids, prefix in (
+            (self.mpn_keys, self.mpn_ids, mpn_prefix),
+            (self.name_keys, self.name_ids, name_prefix),
+        ):
+            if not prefix:
+                continue
+            for pk in _lookup(keys, ids, prefix):
+                found.setdefault(pk, self.items[pk])
+                if len(found) >= limit:
+                    return list(found.values())
+        return list(found.values())
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_index():
+    global _index
+    version = _current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            # Del primario: con una réplica atrasada el índice quedaría viejo
+            # hasta la próxima invalidación (ver core.db_router)
+            rows = Component.objects.using(DEFAULT_DB_ALIAS).values_list(
+                'pk', 'name', 'mpn', 'store__name', 'price',
+            ).iterator(chunk_size=2000)
+            _index = PrefixIndex(version, rows)
+        return _index
+
+
+def invalidate():
+    """Cada proceso reconstruye su índice en la próxima búsqueda."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def autocomplete(query, limit=MAX_RESULTS):
+    if len(query.strip()) < MIN_QUERY_LENGTH:
+        return []
+    return get_index().search(query, limit)
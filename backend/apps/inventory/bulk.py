@@ -0,0 +1,138 @@
+"""
+Actualización masiva de stock y precios (acción `bulk_update` de ComponentViewSet).
+
+En vez de un PATCH por componente: una consulta que resuelve y bloquea los
+componentes del proveedor (por id o MPN), validación de cada item con las
+reglas de ComponentSerializer y un `bulk_update` por lote, todo en una sola
+transacción. Si algún item es inválido no se aplica ninguno.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from apps.interactions.models import RestockEvent
+from .models import Component, ComponentChange, normalize_mpn
+from .serializers import ComponentSerializer
+from .stream import record_changes
+
+MAX_ITEMS = getattr(settings, 'COMPONENT_BULK_UPDATE_MAX_ITEMS', 1000)
+BATCH_SIZE = 500
+
+BULK_FIELDS = ['stock', 'price', 'offer_price', 'is_on_offer']
+
+
+class BulkItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    mpn = serializers.CharField(required=False, max_length=100)
+
+    def validate(self, data):
+        if ('id' in data) == ('mpn' in data):
+            raise serializers.ValidationError("Indica `id` o `mpn` (solo uno).")
+        return data
+
+
+class BulkResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Component
+        fields = ['id', 'mpn', *BULK_FIELDS]
+
+
+def _lookup_key(item):
+    return ('id', item['id']) if 'id' in item else ('mpn', normalize_mpn(item['mpn']))
+
+
+def apply_bulk_update(items, components):
+    """
+    `components` es el queryset de lo que el usuario puede modificar.
+    Devuelve (resultado, errores); con errores no se modifica nada.
+    """
+    if not isinstance(items, list) or not items:
+        return None, [{'index': None, 'errors': {'items': ['Envía una lista de cambios.']}}]
+    if len(items) > MAX_ITEMS:
+        return None, [{'index': None, 'errors': {'items': [f'Máximo {MAX_ITEMS} cambios por petición.']}}]
+
+    errors = []
+    keys = []
+    for index, item in enumerate(items):
+        target = BulkItemSerializer(data=item if isinstance(item, dict) else {})
+        if not target.is_valid():
+            errors.append({'index': index, 'errors': target.errors})
+            keys.append(None)
+        else:
+            keys.append(_lookup_key(target.validated_data))
+    if errors:
+        return None, errors
+
+    ids = [value for kind, value in keys if kind == 'id']
+    mpns = [value for kind, value in keys if kind == 'mpn']
+
+    with transaction.atomic():
+        # Una consulta: propiedad (el queryset ya viene filtrado) y bloqueo de filas;
+        # solo las de componentes, no las de la tienda y el dueño del join
+        found = list(
+            components.filter(Q(pk__in=ids) | Q(mpn_normalized__in=mpns)).select_for_update(of=('self',))
+        )
+        by_id = {component.pk: component for component in found}
+        by_mpn = {}
+        for component in found:
+            by_mpn.setdefault(component.mpn_normalized, []).append(component)
+
+        seen = set()
+        changed = []
+        fields = set()
+        previous_stock = {}
+        for index, (item, (kind, value)) in enumerate(zip(items, keys)):
+            if kind == 'id':
+                component = by_id.get(value)
+            else:
+                matches = by_mpn.get(value, [])
+                if len(matches) > 1:
+                    errors.append({'index': index, 'errors': {'mpn': ['El MPN existe en varias tiendas; usa `id`.']}})
+                    continue
+                component = matches[0] if matches else None
+            if component is None:
+                errors.append({'index': index, 'errors': {kind: ['Componente no encontrado.']}})
+                continue
+            if component.pk in seen:
+                errors.append({'index': index, 'errors': {kind: ['Componente repetido en la petición.']}})
+                continue
+            seen.add(component.pk)
+
+            data = {field: item[field] for field in BULK_FIELDS if field in item}
+            if not data:
+                errors.append({'index': index, 'errors': {'items': [f"Nada que actualizar ({', '.join(BULK_FIELDS)})."]}})
+                continue
+            # validate() compara oferta contra precio: le pasamos el estado resultante
+            current = {field: getattr(component, field) for field in ('price', 'offer_price', 'is_on_offer')}
+            serializer = ComponentSerializer(component, data={**current, **data}, partial=True)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+
+            previous_stock[component.pk] = component.stock
+            for field in data:
+                setattr(component, field, serializer.validated_data[field])
+            fields.update(data)
+            changed.append(component)
+
+        if errors:
+            transaction.set_rollback(True)
+            return None, errors
+
+        if fields:
+            Component.objects.bulk_update(changed, sorted(fields), batch_size=BATCH_SIZE)
+            record_changes([ComponentChange.of(component) for component in changed])
+
+        restocked = [
+            component.pk for component in changed
+            if previous_stock[component.pk] <= 0 < component.stock
+        ]
+        if restocked:
+            RestockEvent.objects.create(component_ids=restocked)
+
+    return {
+        'updated': len(changed),
+        'restocked': len(restocked),
+        'results': BulkResultSerializer(changed, many=True).data,
+    }, []
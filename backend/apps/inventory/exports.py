@@ -0,0 +1,291 @@
+"""
+Exportación del inventario en XLSX o CSV con memoria constante.
+
+Las filas se leen con `values_list(...).iterator(chunk_size=...)` y se escriben
+directamente a la respuesta (StreamingHttpResponse), así el primer byte sale
+antes de terminar de recorrer el inventario.
+
+El XLSX se arma a mano: es un zip con unas pocas partes XML fijas y la hoja,
+que se va comprimiendo por bloques a medida que llegan las filas. En la hoja
+el bloque <cols> (anchos) va antes que <sheetData>, por eso los anchos se
+calculan antes de empezar con una sola consulta agregada (MAX(LENGTH(...)))
+en vez de recorrer la hoja al final como hacía openpyxl.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max, TextField
+from django.db.models.functions import Cast, Length
+
+CHUNK_SIZE = getattr(settings, 'INVENTORY_EXPORT_CHUNK_SIZE', 2000)
+MAX_COLUMN_WIDTH = 60
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+
+class Column:
+    def __init__(self, header, fields, render=None, width=None, width_expression=None):
+        self.header = header
+        self.fields = fields
+        self.render = render or (lambda value: value)
+        self.width = width
+        self.width_expression = width_expression
+
+
+def _status(stock):
+    return 'Agotado' if stock <= 0 else 'Disponible'
+
+
+def _specs(specs):
+    if not isinstance(specs, dict):
+        return ''
+    return '; '.join(f'{key}: {value}' for key, value in specs.items())
+
+
+COLUMNS = {
+    'name': Column('Componente', ['name'], width_expression=Length('name')),
+    'mpn': Column('MPN', ['mpn'], width_expression=Length('mpn')),
+    'category': Column('Categoría', ['category__name'], width_expression=Length('category__name')),
+    'store': Column('Tienda', ['store__name'], width_expression=Length('store__name')),
+    'price': Column('Precio', ['price'], width=12),
+    'offer_price': Column('Precio oferta', ['offer_price'], width=12),
+    'is_on_offer': Column('En oferta', ['is_on_offer'], lambda value: 'Sí' if value else 'No', width=8),
+    'stock': Column('Stock', ['stock'], width=8),
+    'status': Column('Estatus', ['stock'], _status, width=10),
+    'specs': Column(
+        'Especificaciones', ['technical_specs'], _specs,
+        width_expression=Length(Cast('technical_specs', TextField())),
+    ),
+}
+
+DEFAULT_COLUMNS = ['name', 'mpn', 'price', 'stock', 'status']
+
+
+def parse_columns(value):
+    """Convierte ?columns=name,mpn,... en la lista de columnas. Devuelve (columnas, desconocidas)."""
+    if not value:
+        return list(DEFAULT_COLUMNS), []
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in COLUMNS]
+    return names, unknown
+
+
+def _fields(columns):
+    fields = []
+    for name in columns:
+        for field in COLUMNS[name].fields:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def iter_rows(queryset, columns):
+    """Filas ya formateadas, leyendo la base de datos por bloques."""
+    fields = _fields(columns)
+    positions = [[fields.index(field) for field in COLUMNS[name].fields] for name in columns]
+    for values in queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            COLUMNS[name].render(*(values[i] for i in position))
+            for name, position in zip(columns, positions)
+        ]
+
+
+def column_widths(queryset, columns):
+    """Ancho de cada columna a partir del valor más largo (una sola consulta)."""
+    expressions = {
+        name: Max(COLUMNS[name].width_expression)
+        for name in columns if COLUMNS[name].width_expression is not None
+    }
+    lengths = queryset.order_by().aggregate(**expressions) if expressions else {}
+    widths = []
+    for name in columns:
+        column = COLUMNS[name]
+        longest = lengths.get(name) or column.width or 0
+        widths.append(min(max(longest, len(column.header)) + 5, MAX_COLUMN_WIDTH))
+    return widths
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, columns):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel abra los acentos correctamente
+    yield '\ufeff' + writer.writerow([COLUMNS[name].header for name in columns])
+    for row in iter_rows(queryset, columns):
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+# --- XLSX -------------------------------------------------------------------
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{title}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilos: 1 = encabezado morado, 2 = "Agotado" en rojo, 3 = "Disponible" en verde
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="4">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="12"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFEF4444"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FF10B981"/><name val="Calibri"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF4F46E5"/><bgColor rgb="FF4F46E5"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="0" fontId="3" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+STATUS_STYLES = {'Agotado': 2, 'Disponible': 3}
+
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell(reference, value, style=0):
+    style_attr = f' s="{style}"' if style else ''
+    if value is None or value == '':
+        return f'<c r="{reference}"{style_attr}/>'
+    if isinstance(value, bool):
+        value = 'Sí' if value else 'No'
+    if isinstance(value, (int, float)) or hasattr(value, 'as_tuple'):  # Decimal
+        return f'<c r="{reference}"{style_attr}><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub('', str(value)))
+    return f'<c r="{reference}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(number, values, letters, styles):
+    cells = ''.join(
+        _cell(f'{letter}{number}', value, style_for(value) if style_for else 0)
+        for letter, value, style_for in zip(letters, values, styles)
+    )
+    return f'<row r="{number}">{cells}</row>'
+
+
+class _Pipe:
+    """Salida del zip: acumula lo escrito hasta que el generador lo entrega."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_xlsx(queryset, columns, title='Inventario de Tienda', rows_per_chunk=500):
+    letters = [_column_letter(i) for i in range(len(columns))]
+    widths = column_widths(queryset, columns)
+    header_styles = [lambda value: 1] * len(columns)
+    row_styles = [
+        (lambda value: STATUS_STYLES.get(value, 0)) if name == 'status' else None
+        for name in columns
+    ]
+
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES_XML)
+        archive.writestr('_rels/.rels', ROOT_RELS_XML)
+        archive.writestr('xl/workbook.xml', WORKBOOK_XML.format(title=escape(title[:31])))
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS_XML)
+        archive.writestr('xl/styles.xml', STYLES_XML)
+        yield pipe.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            cols = ''.join(
+                f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                for i, width in enumerate(widths, start=1)
+            )
+            header = _row(1, [COLUMNS[name].header for name in columns], letters, header_styles)
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                f'<cols>{cols}</cols><sheetData>{header}'
+            ).encode())
+
+            buffer = []
+            for number, values in enumerate(iter_rows(queryset, columns), start=2):
+                buffer.append(_row(number, values, letters, row_styles))
+                if len(buffer) >= rows_per_chunk:
+                    sheet.write(''.join(buffer).encode())
+                    buffer = []
+                    yield pipe.drain()
+            sheet.write((''.join(buffer) + '</sheetData></worksheet>').encode())
+    yield pipe.drain()
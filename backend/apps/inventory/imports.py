@@ -0,0 +1,272 @@
+"""
+Importación masiva del inventario de una tienda desde CSV o XLSX.
+
+El archivo se lee fila a fila (csv.reader / openpyxl en modo read_only) y
+se procesa por bloques de INVENTORY_IMPORT_CHUNK_SIZE filas:
+
+1. Cada fila se valida con las reglas de ComponentSerializer, sin consultas:
+   la categoría se resuelve contra un mapa nombre -> id en memoria.
+2. El bloque se guarda con un único `bulk_create(update_conflicts=True)` sobre
+   (tienda, mpn_normalized): crea lo nuevo y actualiza lo existente.
+3. Como bulk_create no dispara señales, se reindexan búsqueda y
+   especificaciones del bloque, se publican sus filas en el stream de cambios
+   y se registra un solo RestockEvent con los componentes que pasaron de 0 a >0.
+
+Los encabezados aceptan los nombres de los campos o los de la exportación
+(exports.COLUMNS), así un archivo exportado se puede volver a importar.
+"""
+import csv
+import io
+import json
+import time
+import unicodedata
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from apps.interactions.models import RestockEvent
+from .exports import COLUMNS
+from .models import STREAM_FIELDS, Category, Component, ComponentChange, normalize_mpn
+from .search import get_search_backend
+from .serializers import ComponentSerializer
+from .specs import index_specs
+from .stream import record_changes
+
+CHUNK_SIZE = getattr(settings, 'INVENTORY_IMPORT_CHUNK_SIZE', 500)
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FIELDS = [
+    'name', 'mpn', 'category', 'description', 'price', 'offer_price', 'is_on_offer',
+    'stock', 'datasheet_url', 'technical_specs', 'is_available',
+]
+REQUIRED_COLUMNS = {'name', 'mpn', 'category', 'price'}
+
+TRUE_VALUES = {'si', 'sí', 'true', '1', 'yes', 'y', 'on'}
+FALSE_VALUES = {'no', 'false', '0', 'n', 'off'}
+
+
+def _header_key(value):
+    value = unicodedata.normalize('NFKD', str(value or '').strip().lower())
+    return ''.join(c for c in value if not unicodedata.combining(c))
+
+
+HEADER_ALIASES = {
+    **{_header_key(field): field for field in IMPORT_FIELDS},
+    'specs': 'technical_specs',
+    'nombre': 'name',
+    'categoria': 'category',
+    'descripcion': 'description',
+    **{
+        _header_key(column.header): name if name != 'specs' else 'technical_specs'
+        for name, column in COLUMNS.items() if name in IMPORT_FIELDS or name == 'specs'
+    },
+}
+
+
+class ComponentImportSerializer(ComponentSerializer):
+    """Las reglas de ComponentSerializer, con la categoría por nombre."""
+    category = serializers.CharField(max_length=50)
+    # La exportación no incluye descripción; así un archivo exportado se puede reimportar
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+    class Meta(ComponentSerializer.Meta):
+        fields = IMPORT_FIELDS
+
+    def validate_category(self, value):
+        return ' '.join(value.split())
+
+
+# --- Lectura -----------------------------------------------------------------
+
+def _parse_specs(value):
+    if value in (None, ''):
+        return {}
+    if isinstance(value, dict):
+        return value
+    value = str(value).strip()
+    if value.startswith('{'):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value  # El serializer lo rechaza como especificación inválida
+    # Formato de la exportación: "Voltaje: 5V; Corriente: 1A"
+    specs = {}
+    for pair in value.split(';'):
+        key, _, spec_value = pair.partition(':')
+        if key.strip():
+            specs[key.strip()] = spec_value.strip()
+    return specs
+
+
+def _clean_row(raw, columns):
+    row = {}
+    for header, value in zip(columns, raw):
+        if header is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if header == 'technical_specs':
+            value = _parse_specs(value)
+        elif value == '' or value is None:
+            continue
+        elif header in ('is_on_offer', 'is_available') and isinstance(value, str):
+            lowered = value.lower()
+            value = True if lowered in TRUE_VALUES else False if lowered in FALSE_VALUES else value
+        row[header] = value
+    return row
+
+
+def _map_headers(headers):
+    columns = [HEADER_ALIASES.get(_header_key(header)) for header in headers]
+    missing = REQUIRED_COLUMNS - set(columns)
+    if missing:
+        raise ValidationError({'file': f"Faltan columnas obligatorias: {', '.join(sorted(missing))}."})
+    return columns
+
+
+def read_csv(file):
+    """Devuelve (columnas, filas); las filas se leen a demanda."""
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    columns = _map_headers(next(reader, []))
+    rows = (_clean_row(raw, columns) for raw in reader if any(cell.strip() for cell in raw))
+    return columns, rows
+
+
+def read_xlsx(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    sheet_rows = workbook.active.iter_rows(values_only=True)
+    try:
+        columns = _map_headers(next(sheet_rows, ()))
+    except ValidationError:
+        workbook.close()
+        raise
+
+    def rows():
+        try:
+            for raw in sheet_rows:
+                if any(cell not in (None, '') for cell in raw):
+                    yield _clean_row(raw, columns)
+        finally:
+            workbook.close()
+
+    return columns, rows()
+
+
+def read_rows(file, filename):
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx(file)
+    if filename.lower().endswith('.csv'):
+        return read_csv(file)
+    raise ValidationError({'file': 'Formato no soportado; usa .csv o .xlsx.'})
+
+
+# --- Escritura ---------------------------------------------------------------
+
+class InventoryImporter:
+    def __init__(self, store, chunk_size=CHUNK_SIZE, create_categories=True):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.create_categories = create_categories
+        self.categories = {name.lower(): pk for pk, name in Category.objects.values_list('pk', 'name')}
+        self.validator = ComponentImportSerializer()
+        self.report = {
+            'rows': 0, 'created': 0, 'updated': 0, 'failed': 0,
+            'restocked': 0, 'errors': [], 'seconds': 0.0, 'rows_per_second': 0.0,
+        }
+
+    def _error(self, line, errors):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'row': line, 'errors': errors})
+
+    def _resolve_categories(self, names):
+        missing = {name for name in names if name.lower() not in self.categories}
+        if missing and self.create_categories:
+            Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+            for pk, name in Category.objects.filter(name__in=missing).values_list('pk', 'name'):
+                self.categories[name.lower()] = pk
+
+    def _save_chunk(self, chunk, update_fields):
+        # Dentro del archivo, la última aparición de un MPN gana
+        by_key = {}
+        for line, data in chunk:
+            key = normalize_mpn(data['mpn'])
+            if key in by_key:
+                self._error(by_key[key][0], {'mpn': [f'Repetido más abajo en la fila {line}.']})
+            by_key[key] = (line, data)
+
+        self._resolve_categories({data['category'] for _, data in by_key.values()})
+        objs = []
+        for line, data in by_key.values():
+            category_id = self.categories.get(data['category'].lower())
+            if category_id is None:
+                self._error(line, {'category': [f"La categoría \"{data['category']}\" no existe."]})
+                continue
+            values = {field: value for field, value in data.items() if field != 'category'}
+            objs.append(Component(store=self.store, category_id=category_id, **values))
+        if not objs:
+            return
+
+        keys = [normalize_mpn(obj.mpn) for obj in objs]
+        with transaction.atomic():
+            previous_stock = dict(
+                Component.objects.filter(store=self.store, mpn_normalized__in=keys)
+                .values_list('mpn_normalized', 'stock')
+            )
+            Component.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['store', 'mpn_normalized'],
+                update_fields=update_fields,
+            )
+            saved = list(
+                Component.objects.filter(store=self.store, mpn_normalized__in=keys)
+                .only('pk', 'store_id', 'mpn_normalized', 'technical_specs', *STREAM_FIELDS)
+            )
+            get_search_backend().index([component.pk for component in saved])
+            index_specs(saved)
+            record_changes([ComponentChange.of(component) for component in saved])
+
+            restocked = [
+                component.pk for component in saved
+                if previous_stock.get(component.mpn_normalized, 1) <= 0 < component.stock
+            ]
+            if restocked:
+                RestockEvent.objects.create(component_ids=restocked)
+
+        self.report['created'] += len(objs) - len(previous_stock)
+        self.report['updated'] += len(previous_stock)
+        self.report['restocked'] += len(restocked)
+
+    def run(self, columns, rows):
+        """
+        `columns` son los campos presentes en el archivo: solo esos se
+        sobrescriben en los componentes que ya existían.
+        """
+        started = time.monotonic()
+        update_fields = [
+            field for field in IMPORT_FIELDS if field in columns and field != 'mpn'
+        ] + ['mpn', 'mpn_normalized']
+        chunk = []
+        for line, row in enumerate(rows, start=2):  # La fila 1 es el encabezado
+            self.report['rows'] += 1
+            try:
+                data = self.validator.run_validation(row)
+            except ValidationError as exc:
+                self._error(line, exc.detail)
+                continue
+            chunk.append((line, data))
+            if len(chunk) >= self.chunk_size:
+                self._save_chunk(chunk, update_fields)
+                chunk = []
+        if chunk:
+            self._save_chunk(chunk, update_fields)
+
+        elapsed = time.monotonic() - started
+        self.report['seconds'] = round(elapsed, 3)
+        self.report['rows_per_second'] = round(self.report['rows'] / elapsed, 1) if elapsed else 0.0
+        return self.report
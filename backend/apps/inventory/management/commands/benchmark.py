@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import ENDPOINTS, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra un conjunto sintético (revertido al terminar), mide los endpoints más usados "
+        "y reporta percentiles de latencia, consultas y memoria en JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=20)
+        parser.add_argument('--components', type=int, default=2000)
+        parser.add_argument('--reviews', type=int, default=500)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--searches', type=int, default=2000)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1, help="Semilla del generador aleatorio")
+        parser.add_argument('--warm', action='store_true',
+                            help="No vaciar la caché entre peticiones (mide las respuestas cacheadas)")
+        parser.add_argument('--only', nargs='+', metavar='ENDPOINT',
+                            help=f"Subconjunto de: {', '.join(name for name, *_ in ENDPOINTS)}")
+        parser.add_argument('--output', help="Archivo donde guardar el JSON (por defecto, stdout)")
+
+    def handle(self, *args, **options):
+        names = {name for name, *_ in ENDPOINTS}
+        unknown = set(options['only'] or ()) - names
+        if unknown:
+            raise CommandError(f"Endpoints desconocidos: {', '.join(sorted(unknown))}")
+        if options['stores'] < 1 or options['components'] < 1 or options['users'] < 1 or options['iterations'] < 1:
+            raise CommandError("--stores, --components, --users e --iterations deben ser mayores que 0.")
+
+        report = run(
+            iterations=options['iterations'], warm=options['warm'], only=options['only'],
+            stores=options['stores'], components=options['components'], reviews=options['reviews'],
+            users=options['users'], searches=options['searches'], rng_seed=options['seed'],
+        )
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.inventory.imports import CHUNK_SIZE, InventoryImporter, read_rows
+from apps.stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "Importa (crea o actualiza por MPN) el inventario de una tienda desde un .csv o .xlsx"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--store', type=int, required=True, help="id de la tienda destino")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--no-create-categories', action='store_true',
+                            help="Rechaza las filas con categorías inexistentes en vez de crearlas")
+
+    def handle(self, *args, **options):
+        try:
+            store = Store.objects.get(pk=options['store'])
+        except Store.DoesNotExist:
+            raise CommandError(f"La tienda {options['store']} no existe.")
+
+        importer = InventoryImporter(
+            store,
+            chunk_size=options['chunk_size'],
+            create_categories=not options['no_create_categories'],
+        )
+        with open(options['path'], 'rb') as file:
+            try:
+                columns, rows = read_rows(file, options['path'])
+                report = importer.run(columns, rows)
+            except ValidationError as exc:
+                raise CommandError(json.dumps(exc.detail, ensure_ascii=False))
+
+        for error in report['errors']:
+            self.stderr.write(f"Fila {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} filas: {report['created']} creadas, {report['updated']} actualizadas, "
+            f"{report['failed']} con errores, {report['restocked']} repuestas "
+            f"({report['seconds']}s, {report['rows_per_second']} filas/s)"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.stream import RETENTION_HOURS, prune_changes
+
+
+class Command(BaseCommand):
+    help = "Borra los eventos del stream de cambios más antiguos que la retención"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=RETENTION_HOURS,
+                            help="Horas de eventos a conservar (COMPONENT_STREAM_RETENTION_HOURS)")
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} eventos anteriores a {options['hours']} horas eliminados"))
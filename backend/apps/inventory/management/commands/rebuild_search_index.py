@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de componentes"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Índice reconstruido con {type(backend).__name__}"))
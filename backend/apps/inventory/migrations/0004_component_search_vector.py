@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 14:29
+
+import logging
+
+import django.contrib.postgres.search
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def create_search_indexes(apps, schema_editor):
+    # El índice GIN y el de trigramas solo existen en PostgreSQL;
+    # en SQLite se usa el índice invertido en memoria.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("""
+        UPDATE inventory_component SET search_vector =
+            setweight(to_tsvector('spanish', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce(mpn, '')), 'B')
+            || setweight(to_tsvector('simple', coalesce(technical_specs::text, '')), 'C')
+            || setweight(to_tsvector('spanish', coalesce(description, '')), 'D')
+    """)
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS component_search_vector_idx "
+        "ON inventory_component USING gin (search_vector)"
+    )
+    problem = _install_trigram(schema_editor)
+    if problem:
+        # Sin trigramas la búsqueda sigue funcionando (PostgresSearchBackend lo comprueba)
+        logger.info(
+            "%s: se omite el índice de trigramas del MPN. Para activarlo, como superusuario: "
+            "CREATE EXTENSION pg_trgm; CREATE INDEX component_mpn_trgm_idx "
+            "ON inventory_component USING gin (mpn gin_trgm_ops);",
+            problem,
+        )
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS component_mpn_trgm_idx "
+        "ON inventory_component USING gin (mpn gin_trgm_ops)"
+    )
+
+
+def _install_trigram(schema_editor):
+    """None si pg_trgm queda instalada; si no, el motivo. Crearla exige privilegios."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            return None
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return "pg_trgm no está disponible en este servidor"
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION pg_trgm")
+    except DatabaseError as error:
+        return f"No se pudo instalar pg_trgm con este usuario ({str(error).strip().splitlines()[0]})"
+    return None
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS component_mpn_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS component_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_alter_component_mpn'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 6.0 on 2026-10-18 14:31
+
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia congelada de apps.inventory.specs al crear esta migración: los cambios
+# posteriores del parser no deben alterar lo que hace.
+SI_PREFIXES = {
+    'p': Decimal('1e-12'), 'n': Decimal('1e-9'), 'u': Decimal('1e-6'),
+    'µ': Decimal('1e-6'), 'μ': Decimal('1e-6'), 'm': Decimal('1e-3'),
+    'k': Decimal('1e3'), 'K': Decimal('1e3'), 'M': Decimal('1e6'), 'G': Decimal('1e9'),
+}
+UNITS = {
+    'v': 'v', 'vac': 'v', 'vdc': 'v', 'a': 'a', 'w': 'w',
+    'ohm': 'ohm', 'ohms': 'ohm', 'ω': 'ohm', 'Ω': 'ohm',
+    'f': 'f', 'h': 'h', 'hz': 'hz', 'awg': 'awg', 'ah': 'ah', '%': '%',
+}
+TEMPERATURE_KEY_RE = re.compile(r'temp|kelvin|cct')
+QUANTITY_RE = re.compile(r'^\s*#?\s*([-+]?\d+(?:[.,]\d+)?)\s*(\S*)')
+
+
+def _strip_accents(value):
+    value = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in value if not unicodedata.combining(c))
+
+
+def normalize_key(key):
+    return re.sub(r'[^a-z0-9]+', '_', _strip_accents(str(key)).lower()).strip('_')[:100]
+
+
+def normalize_value(value):
+    return ' '.join(_strip_accents(str(value)).lower().split())[:255]
+
+
+def parse_quantity(value, key):
+    match = QUANTITY_RE.match(str(value))
+    if not match:
+        return None, ''
+    number, suffix = match.groups()
+    try:
+        number = Decimal(number.replace(',', '.'))
+    except InvalidOperation:
+        return None, ''
+    if suffix and suffix[0] in '/-x' and len(suffix) > 1:
+        return None, ''
+    if not suffix:
+        rest = str(value)[match.end():].split()
+        suffix = rest[0] if rest else ''
+    if suffix == 'K' and TEMPERATURE_KEY_RE.search(normalize_key(key)):
+        return float(number), 'k'
+    unit = UNITS.get(suffix) or UNITS.get(suffix.lower())
+    if unit is None and suffix and suffix[0] in SI_PREFIXES:
+        remainder = suffix[1:]
+        base_unit = (UNITS.get(remainder) or UNITS.get(remainder.lower())) if remainder else ''
+        if base_unit is not None:
+            return float(number * SI_PREFIXES[suffix[0]]), base_unit
+    return float(number), unit or ''
+
+
+def index_existing_specs(apps, schema_editor):
+    Component = apps.get_model('inventory', 'Component')
+    ComponentSpec = apps.get_model('inventory', 'ComponentSpec')
+    rows = []
+    for pk, specs in Component.objects.values_list('pk', 'technical_specs').iterator():
+        if not isinstance(specs, dict):
+            continue
+        for key, value in specs.items():
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            numeric_value, unit = parse_quantity(value, key)
+            rows.append(ComponentSpec(
+                component_id=pk, key=normalize_key(key), value=normalize_value(value),
+                raw_value=str(value)[:255], numeric_value=numeric_value, unit=unit,
+            ))
+    ComponentSpec.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_component_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentSpec',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=255)),
+                ('raw_value', models.CharField(max_length=255)),
+                ('numeric_value', models.FloatField(blank=True, null=True)),
+                ('unit', models.CharField(blank=True, max_length=20)),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spec_values', to='inventory.component')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'value', 'component'], name='spec_key_value_idx'), models.Index(fields=['key', 'numeric_value'], name='spec_key_numeric_idx')],
+            },
+        ),
+        migrations.RunPython(index_existing_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_mpn(value):
+    # Copia congelada de apps.inventory.models.normalize_mpn al crear la migración
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    return re.sub(r'[^A-Z0-9]', '', value.upper())[:100]
+
+
+def fill_mpn_normalized(apps, schema_editor):
+    Component = apps.get_model('inventory', 'Component')
+    batch = []
+    for component in Component.objects.only('pk', 'mpn').iterator(chunk_size=2000):
+        component.mpn_normalized = normalize_mpn(component.mpn)
+        batch.append(component)
+        if len(batch) >= 2000:
+            Component.objects.bulk_update(batch, ['mpn_normalized'])
+            batch = []
+    Component.objects.bulk_update(batch, ['mpn_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_componentspec'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='mpn_normalized',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_mpn_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['mpn_normalized', 'store'], name='component_mpn_norm_idx'),
+        ),
+    ]
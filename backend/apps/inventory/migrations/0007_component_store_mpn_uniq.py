@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 14:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+MAX_LISTED = 50
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    La restricción única no admite dos componentes de una tienda con el mismo
+    MPN normalizado. No los fusionamos ni renombramos por nuestra cuenta (tienen
+    stock, listas de deseos, avisos...): se aborta con la lista de repetidos para
+    que se resuelvan a mano antes de volver a migrar.
+    """
+    Component = apps.get_model('inventory', 'Component')
+    groups = list(
+        Component.objects.values('store_id', 'mpn_normalized')
+        .annotate(total=Count('id')).filter(total__gt=1)
+        .order_by('store_id', 'mpn_normalized')
+    )
+    if not groups:
+        return
+    listed = []
+    for group in groups[:MAX_LISTED]:
+        components = Component.objects.filter(
+            store_id=group['store_id'], mpn_normalized=group['mpn_normalized']
+        ).order_by('pk').values_list('pk', 'mpn')
+        listed.append(
+            f"  tienda {group['store_id']}, {group['mpn_normalized']}: "
+            + ', '.join(f'componente {pk} ({mpn})' for pk, mpn in components)
+        )
+    if len(groups) > MAX_LISTED:
+        listed.append(f'  ... y {len(groups) - MAX_LISTED} grupos más')
+    raise RuntimeError(
+        "Hay componentes con el mismo MPN en una misma tienda. Fusiónalos o "
+        "corrige su MPN antes de aplicar esta migración:\n" + '\n'.join(listed)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_component_mpn_normalized'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='component',
+            constraint=models.UniqueConstraint(fields=('mpn_normalized', 'store'), name='component_store_mpn_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='component',
+            name='component_mpn_norm_idx',
+        ),
+    ]
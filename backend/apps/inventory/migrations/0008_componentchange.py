@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_component_store_mpn_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('component_id', models.BigIntegerField()),
+                ('store_id', models.BigIntegerField()),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('offer_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_on_offer', models.BooleanField(default=False)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store_id', 'id'], name='change_store_idx'), models.Index(fields=['component_id', 'id'], name='change_component_idx'), models.Index(fields=['created_at'], name='change_created_idx')],
+            },
+        ),
+    ]
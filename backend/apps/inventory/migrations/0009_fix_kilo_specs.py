@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def fix_kilo_specs(apps, schema_editor):
+    # Antes "10K" se indexaba como 10 kelvin con cualquier clave; fuera de las
+    # claves de temperatura es kilo: 10000 sin unidad
+    ComponentSpec = apps.get_model('inventory', 'ComponentSpec')
+    ComponentSpec.objects.filter(unit='k').exclude(key__regex=r'temp|kelvin|cct').update(
+        numeric_value=F('numeric_value') * 1000, unit='',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_componentchange'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_kilo_specs, migrations.RunPython.noop),
+    ]
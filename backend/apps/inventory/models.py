@@ -1,4 +1,9 @@
-from django.db import models
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, When
 from apps.stores.models import Store
 
 # Create your models here.
@@ -12,11 +17,103 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+def normalize_mpn(value):
+    """MPN comparable entre tiendas: "lc1-d32", "LC1 D32" y "LC1D32" -> "LC1D32"."""
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    return re.sub(r'[^A-Z0-9]', '', value.upper())[:100]
+
+
+METRIC_FIELDS = {'price', 'stock'}
+STREAM_FIELDS = ('stock', 'price', 'offer_price', 'is_on_offer')
+AUTOCOMPLETE_FIELDS = {'name', 'mpn', 'price', 'store', 'store_id'}
+# Columnas derivadas que ninguna respuesta expone: reescribirlas no invalida nada
+DERIVED_FIELDS = {'search_vector', 'mpn_normalized'}
+
+
+def _bulk_written(fields):
+    """
+    Las escrituras masivas no disparan señales: se invalidan las respuestas
+    cacheadas y se marcan para recalcular los contadores del panel y el índice
+    de autocompletado si tocan sus campos.
+    """
+    from apps.interactions.metrics import mark_stale
+    from core.cache import bump
+    from .autocomplete import invalidate
+
+    if fields <= DERIVED_FIELDS:
+        # Reindexado tras un save(), que ya invalidó con sus señales
+        return
+    bump('components')
+    if METRIC_FIELDS & fields:
+        mark_stale('inventory')
+    if AUTOCOMPLETE_FIELDS & fields:
+        invalidate()
+
+
+class ComponentQuerySet(models.QuerySet):
+    # mpn_normalized se deriva de mpn; estas variantes masivas lo mantienen al día
+
+    def update(self, **kwargs):
+        _bulk_written(set(kwargs))
+        if 'mpn' in kwargs and 'mpn_normalized' not in kwargs:
+            if isinstance(kwargs['mpn'], str):
+                kwargs['mpn_normalized'] = normalize_mpn(kwargs['mpn'])
+            else:
+                # Expresión SQL: recalculamos en Python sobre las filas afectadas
+                with transaction.atomic(using=self.db):
+                    pks = list(self.values_list('pk', flat=True))
+                    rows = super().update(**kwargs)
+                    manager = self.model._default_manager.db_manager(self.db)
+                    components = list(manager.filter(pk__in=pks).only('mpn'))
+                    for component in components:
+                        component.mpn_normalized = normalize_mpn(component.mpn)
+                    manager.bulk_update(components, ['mpn_normalized'], batch_size=1000)
+                return rows
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.mpn_normalized = normalize_mpn(obj.mpn)
+        _bulk_written(METRIC_FIELDS | AUTOCOMPLETE_FIELDS)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        _bulk_written(set(fields))
+        if 'mpn' in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.mpn_normalized = normalize_mpn(obj.mpn)
+            if 'mpn_normalized' not in fields:
+                fields.append('mpn_normalized')
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def for_listing(self):
+        """
+        Trae tienda y categoría en el mismo JOIN y el conteo de listas de deseos
+        anotado, para que ComponentSerializer no haga consultas por fila.
+        """
+        return self.select_related('store', 'category').annotate(
+            wishlist_count=Count('in_wishlists', distinct=True)
+        )
+
+    def with_effective_price(self):
+        """Anota `effective_price`: el precio de oferta si está activa, si no el normal."""
+        return self.annotate(effective_price=Case(
+            When(Q(is_on_offer=True, offer_price__isnull=False), then=F('offer_price')),
+            default=F('price'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+
+
 class Component(models.Model):
     store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='products')
     category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='components')
     name = models.CharField(max_length=255)
     mpn = models.CharField(max_length=100, verbose_name="Manufacturer Part Number")
+    # Mayúsculas y sin signos, para comparar precios entre tiendas (ver normalize_mpn)
+    mpn_normalized = models.CharField(max_length=100, editable=False, default='')
     description = models.TextField()
     
     # Precios y stock
@@ -35,6 +132,91 @@ class Component(models.Model):
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Vector de búsqueda (solo PostgreSQL), lo mantiene apps.inventory.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ComponentQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Clave de las importaciones masivas (upsert por tienda + MPN); su
+            # índice también sirve a price_comparison y /compare
+            models.UniqueConstraint(fields=['mpn_normalized', 'store'], name='component_store_mpn_uniq'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stock con el que se cargó, para detectar reposiciones (0 -> >0) al guardar
+        if 'stock' in field_names:
+            instance._loaded_stock = instance.stock
+        # Precio con el que se cargó, para los contadores del inventario
+        if 'price' in field_names:
+            instance._loaded_price = instance.price
+        # Estado publicado en el stream de cambios (apps.inventory.stream)
+        if all(field in field_names for field in STREAM_FIELDS):
+            instance._loaded_stream = tuple(getattr(instance, field) for field in STREAM_FIELDS)
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.mpn_normalized = normalize_mpn(self.mpn)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'mpn' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'mpn_normalized'}
+        # Los receptores de post_save (p.ej. el outbox de reposiciones) escriben
+        # en la misma transacción que el componente
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.mpn})"
     
+
+
+class ComponentChange(models.Model):
+    """
+    Cambio de stock/precio/oferta publicado en el stream de cambios
+    (apps.inventory.stream). El id es el Last-Event-ID con el que un cliente
+    retoma el stream; sin FK para conservar los eventos de borrado.
+    """
+    component_id = models.BigIntegerField()
+    store_id = models.BigIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    offer_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    is_on_offer = models.BooleanField(default=False)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store_id', 'id'], name='change_store_idx'),
+            models.Index(fields=['component_id', 'id'], name='change_component_idx'),
+            models.Index(fields=['created_at'], name='change_created_idx'),
+        ]
+
+    @classmethod
+    def of(cls, component, deleted=False):
+        return cls(
+            component_id=component.pk, store_id=component.store_id, deleted=deleted,
+            **{field: getattr(component, field) for field in STREAM_FIELDS},
+        )
+
+
+class ComponentSpec(models.Model):
+    """Copia normalizada de Component.technical_specs para filtrar con índices."""
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='spec_values')
+    key = models.CharField(max_length=100)
+    value = models.CharField(max_length=255)
+    raw_value = models.CharField(max_length=255)
+    numeric_value = models.FloatField(null=True, blank=True)
+    unit = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'value', 'component'], name='spec_key_value_idx'),
+            models.Index(fields=['key', 'numeric_value'], name='spec_key_numeric_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key}={self.raw_value}"
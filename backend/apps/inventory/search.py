@@ -0,0 +1,273 @@
+"""
+Motor de búsqueda de componentes.
+
+`ComponentSearchFilter` reemplaza al SearchFilter de DRF (OR de ILIKE '%term%',
+que obliga a recorrer toda la tabla) y delega en un backend intercambiable:
+
+- PostgresSearchBackend: columna `search_vector` (tsvector) con pesos
+  nombre > mpn > specs > descripción, índice GIN, orden por ts_rank y
+  búsqueda aproximada por trigramas (pg_trgm) para MPN mal escritos.
+- InMemorySearchBackend: índice invertido en Python para SQLite (tests y
+  desarrollo). Vive en el proceso, así que no está pensado para producción.
+
+El backend se elige con settings.COMPONENT_SEARCH_BACKEND (ruta punteada);
+por defecto se usa el de PostgreSQL si la base de datos lo es.
+"""
+import difflib
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, TextField, Value, When
+from django.db.models.functions import Cast, Greatest
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .models import Component
+
+SEARCHABLE_FIELDS = {'name', 'mpn', 'description', 'technical_specs'}
+
+# Mismos pesos por defecto que ts_rank: {D, C, B, A}
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+MAX_RESULTS = getattr(settings, 'COMPONENT_SEARCH_MAX_RESULTS', 1000)
+FUZZY_THRESHOLD = getattr(settings, 'COMPONENT_SEARCH_FUZZY_THRESHOLD', 0.3)
+
+
+def normalize_text(value):
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    return ''.join(c for c in value if not unicodedata.combining(c)).lower()
+
+
+def tokenize(value):
+    return re.findall(r'[a-z0-9]+', normalize_text(value))
+
+
+def compact_mpn(value):
+    # "LC1-D32" y "lc1 d32" -> "lc1d32"
+    return ''.join(tokenize(value))
+
+
+class BaseSearchBackend:
+    def search(self, queryset, query):
+        """Filtra `queryset` por `query` y lo anota con `search_rank` (mayor es mejor)."""
+        raise NotImplementedError
+
+    def index(self, component_ids):
+        """(Re)indexa los componentes dados tras crearlos o modificarlos."""
+        raise NotImplementedError
+
+    def remove(self, component_ids):
+        """Saca del índice componentes eliminados."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Reconstruye el índice completo."""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = getattr(settings, 'COMPONENT_SEARCH_CONFIG', 'spanish')
+
+    def _vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return (
+            SearchVector('name', weight='A', config=self.config)
+            + SearchVector('mpn', weight='B', config='simple')
+            + SearchVector(Cast('technical_specs', TextField()), weight='C', config='simple')
+            + SearchVector('description', weight='D', config=self.config)
+        )
+
+    def _has_trigram(self):
+        if not hasattr(self, '_trigram'):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                self._trigram = cursor.fetchone() is not None
+        return self._trigram
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+        search_query = (
+            SearchQuery(query, config=self.config, search_type='websearch')
+            | SearchQuery(query, config='simple', search_type='websearch')
+        )
+        matches = Q(search_vector=search_query)
+        rank = SearchRank(F('search_vector'), search_query)
+        if self._has_trigram():
+            # MPN mal escritos: el operador % usa pg_trgm.similarity_threshold,
+            # que fija signals.set_trigram_threshold al abrir la conexión
+            matches |= Q(mpn__trigram_similar=query)
+            rank = Greatest(rank, TrigramSimilarity('mpn', query))
+        # ts_rank devuelve real; lo pasamos a double para que el valor que viaja
+        # en el cursor de paginación se compare exacto contra la base de datos
+        return queryset.filter(matches).annotate(search_rank=Cast(rank, FloatField()))
+
+    def index(self, component_ids):
+        Component.objects.filter(pk__in=list(component_ids)).update(search_vector=self._vector())
+
+    def remove(self, component_ids):
+        # La fila ya no existe; el vector se fue con ella
+        pass
+
+    def rebuild(self):
+        Component.objects.update(search_vector=self._vector())
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)  # token -> {component_id: peso}
+        self._documents = {}                # component_id -> (tokens, mpn compacto)
+        self._mpns = defaultdict(set)       # mpn compacto -> {component_id}
+        self._loaded = False
+
+    def _documents_for(self, rows):
+        for pk, name, mpn, description, specs in rows:
+            weights = defaultdict(float)
+            fields = (
+                (name, 'A'),
+                (mpn, 'B'),
+                (' '.join(f'{k} {v}' for k, v in (specs or {}).items()), 'C'),
+                (description, 'D'),
+            )
+            for text, weight in fields:
+                for token in tokenize(text):
+                    weights[token] += WEIGHTS[weight]
+            mpn_key = compact_mpn(mpn)
+            if mpn_key:
+                weights[mpn_key] += WEIGHTS['B']
+            yield pk, mpn_key, weights
+
+    def _rows(self, queryset):
+        return queryset.values_list(
+            'pk', 'name', 'mpn', 'description', 'technical_specs'
+        ).iterator(chunk_size=2000)
+
+    def _discard(self, pk):
+        tokens, mpn_key = self._documents.pop(pk, ((), None))
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(pk, None)
+                if not postings:
+                    del self._postings[token]
+        if mpn_key in self._mpns:
+            self._mpns[mpn_key].discard(pk)
+            if not self._mpns[mpn_key]:
+                del self._mpns[mpn_key]
+
+    def _add(self, documents):
+        for pk, mpn_key, weights in documents:
+            self._discard(pk)
+            self._documents[pk] = (tuple(weights), mpn_key)
+            for token, weight in weights.items():
+                self._postings[token][pk] = weight
+            if mpn_key:
+                self._mpns[mpn_key].add(pk)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._add(self._documents_for(self._rows(Component.objects.all())))
+                self._loaded = True
+
+    def _score(self, query):
+        terms = tokenize(query)
+        if not terms:
+            return {}
+
+        scores = None
+        for term in terms:
+            matches = self._postings.get(term, {})
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {pk: score + matches[pk] for pk, score in scores.items() if pk in matches}
+            if not scores:
+                break
+        if scores:
+            return scores
+
+        # Búsqueda aproximada sobre los MPN, equivalente al fallback de trigramas
+        fuzzy = {}
+        target = compact_mpn(query)
+        for candidate in difflib.get_close_matches(target, list(self._mpns), n=20, cutoff=0.6):
+            ratio = difflib.SequenceMatcher(None, target, candidate).ratio()
+            for pk in self._mpns[candidate]:
+                fuzzy[pk] = max(fuzzy.get(pk, 0.0), ratio)
+        return fuzzy
+
+    def search(self, queryset, query):
+        self._ensure_loaded()
+        with self._lock:
+            scores = self._score(query)
+        if not scores:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:MAX_RESULTS]
+        return queryset.filter(pk__in=[pk for pk, _ in ranked]).annotate(
+            search_rank=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in ranked],
+                output_field=FloatField(),
+            )
+        )
+
+    def index(self, component_ids):
+        if not self._loaded:
+            return
+        documents = list(self._documents_for(
+            self._rows(Component.objects.filter(pk__in=list(component_ids)))
+        ))
+        with self._lock:
+            self._add(documents)
+
+    def remove(self, component_ids):
+        if not self._loaded:
+            return
+        with self._lock:
+            for pk in component_ids:
+                self._discard(pk)
+
+    def rebuild(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._mpns.clear()
+            self._loaded = False
+        self._ensure_loaded()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'COMPONENT_SEARCH_BACKEND', None)
+                if path:
+                    _backend = import_string(path)()
+                elif connection.vendor == 'postgresql':
+                    _backend = PostgresSearchBackend()
+                else:
+                    _backend = InMemorySearchBackend()
+    return _backend
+
+
+class ComponentSearchFilter(filters.BaseFilterBackend):
+    """Aplica ?search= con el backend configurado, ordenando por relevancia."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query).order_by('-search_rank', '-id')
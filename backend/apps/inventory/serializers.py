@@ -26,8 +26,11 @@ class ComponentSerializer(serializers.ModelSerializer):
         ]
         
     def get_times_in_wishlist(self, obj):
-        # Número de veces en listas de deseos
-        return obj.in_wishlists.count()
+        # Número de veces en listas de deseos (anotado por Component.objects.for_listing())
+        count = getattr(obj, 'wishlist_count', None)
+        if count is None:
+            count = obj.in_wishlists.count()
+        return count
     
     def get_stock_status(self, obj):
         # Detección de baja disponibilidad
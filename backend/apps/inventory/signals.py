@@ -0,0 +1,75 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.stores.models import Store
+from core.cache import bump
+from .autocomplete import invalidate
+from .models import AUTOCOMPLETE_FIELDS, STREAM_FIELDS, Category, Component, ComponentChange
+from .search import FUZZY_THRESHOLD, SEARCHABLE_FIELDS, get_search_backend
+from .specs import index_specs
+from .stream import record_changes
+
+@receiver(post_save, sender=Component)
+def index_component(sender, instance, created, update_fields=None, **kwargs):
+    """Mantiene el índice de búsqueda al día cuando cambian los campos buscables."""
+    if update_fields is not None and not SEARCHABLE_FIELDS.intersection(update_fields):
+        return
+    get_search_backend().index([instance.pk])
+
+@receiver(connection_created)
+def set_trigram_threshold(sender, connection, **kwargs):
+    """Umbral del operador % (trigram_similar) de la búsqueda aproximada por MPN."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET pg_trgm.similarity_threshold = %s', [FUZZY_THRESHOLD])
+
+@receiver(post_delete, sender=Component)
+def unindex_component(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+@receiver(post_save, sender=Component)
+def index_component_specs(sender, instance, created, update_fields=None, **kwargs):
+    """Sincroniza ComponentSpec con technical_specs."""
+    if update_fields is not None and 'technical_specs' not in update_fields:
+        return
+    index_specs([instance])
+
+@receiver(post_save, sender=Component)
+@receiver(post_delete, sender=Component)
+def invalidate_autocomplete(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not AUTOCOMPLETE_FIELDS.intersection(update_fields):
+        return
+    invalidate()
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def invalidate_autocomplete_stores(sender, instance, update_fields=None, **kwargs):
+    # El índice guarda el nombre de la tienda
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    invalidate()
+
+@receiver(post_save, sender=Component)
+@receiver(post_delete, sender=Component)
+def invalidate_component_responses(sender, instance, **kwargs):
+    bump('components')
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, instance, **kwargs):
+    bump('categories')
+
+@receiver(post_save, sender=Component)
+def stream_component_change(sender, instance, created, update_fields=None, **kwargs):
+    """Publica stock/precio/oferta en el stream solo si cambiaron (ver stream.py)."""
+    if update_fields is not None and not set(STREAM_FIELDS).intersection(update_fields):
+        return
+    current = tuple(getattr(instance, field) for field in STREAM_FIELDS)
+    if not created and getattr(instance, '_loaded_stream', None) == current:
+        return
+    instance._loaded_stream = current
+    record_changes([ComponentChange.of(instance)])
+
+@receiver(post_delete, sender=Component)
+def stream_component_delete(sender, instance, **kwargs):
+    record_changes([ComponentChange.of(instance, deleted=True)])
@@ -0,0 +1,172 @@
+"""
+Índice normalizado de especificaciones técnicas.
+
+`Component.technical_specs` es un JSON libre ({"Voltaje": "5V", "Corriente": "1A"}).
+Filtrar sobre él obliga a extraer el JSON de cada fila, así que cada par
+clave/valor se copia a `ComponentSpec` con la clave normalizada, el valor en
+texto normalizado y, si se puede interpretar, el valor numérico en la unidad base
+("4.7kΩ" -> 4700 ohm, "100uF" -> 0.0001 f). Sobre esa tabla indexada se resuelven
+los filtros `spec.<clave>=` y los rangos `spec.<clave>__gte=5V`.
+"""
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Min
+
+from .models import ComponentSpec
+
+SI_PREFIXES = {
+    'p': Decimal('1e-12'),
+    'n': Decimal('1e-9'),
+    'u': Decimal('1e-6'),
+    'µ': Decimal('1e-6'),
+    'μ': Decimal('1e-6'),
+    'm': Decimal('1e-3'),
+    'k': Decimal('1e3'),
+    'K': Decimal('1e3'),
+    'M': Decimal('1e6'),
+    'G': Decimal('1e9'),
+}
+
+UNITS = {
+    'v': 'v', 'vac': 'v', 'vdc': 'v',
+    'a': 'a',
+    'w': 'w',
+    'ohm': 'ohm', 'ohms': 'ohm', 'ω': 'ohm', 'Ω': 'ohm',
+    'f': 'f',
+    'h': 'h',
+    'hz': 'hz',
+    'awg': 'awg',
+    'ah': 'ah',
+    '%': '%',
+}
+
+# "K" solo es kelvin en claves de temperatura ("Temperatura de color": "6500K");
+# en las demás es kilo ("Resistencia": "10K" -> 10000)
+TEMPERATURE_KEY_RE = re.compile(r'temp|kelvin|cct')
+
+QUANTITY_RE = re.compile(r'^\s*#?\s*([-+]?\d+(?:[.,]\d+)?)\s*(\S*)')
+
+SPEC_LOOKUPS = {'exact', 'contains', 'gt', 'gte', 'lt', 'lte'}
+
+
+def _strip_accents(value):
+    value = unicodedata.normalize('NFKD', value)
+    return ''.join(c for c in value if not unicodedata.combining(c))
+
+
+def normalize_key(key):
+    return re.sub(r'[^a-z0-9]+', '_', _strip_accents(str(key)).lower()).strip('_')[:100]
+
+
+def normalize_value(value):
+    return ' '.join(_strip_accents(str(value)).lower().split())[:255]
+
+
+def is_temperature_key(key):
+    return bool(TEMPERATURE_KEY_RE.search(normalize_key(key)))
+
+
+def parse_quantity(value, key=''):
+    """
+    Interpreta "5V", "4.7kΩ", "100 uF", "#12 AWG" o "10k"; `key` es la clave
+    de la especificación (decide si "6500K" son kelvin).
+    Devuelve (valor en unidad base, unidad) o (None, '') si no es numérico.
+    """
+    match = QUANTITY_RE.match(str(value))
+    if not match:
+        return None, ''
+    number, suffix = match.groups()
+    try:
+        number = Decimal(number.replace(',', '.'))
+    except InvalidOperation:
+        return None, ''
+
+    # Si después del número viene otra cifra ("120/240V") no es un valor simple
+    if suffix and suffix[0] in '/-x' and len(suffix) > 1:
+        return None, ''
+
+    if not suffix:
+        # La unidad puede venir separada: "12 AWG"
+        rest = str(value)[match.end():].split()
+        suffix = rest[0] if rest else ''
+
+    if suffix == 'K' and is_temperature_key(key):
+        return float(number), 'k'
+    unit = UNITS.get(suffix) or UNITS.get(suffix.lower())
+    if unit is None and suffix and suffix[0] in SI_PREFIXES:
+        remainder = suffix[1:]
+        base_unit = (UNITS.get(remainder) or UNITS.get(remainder.lower())) if remainder else ''
+        if base_unit is not None:
+            # "mAh" -> miliamperios hora, "10k" -> 10000 sin unidad
+            return float(number * SI_PREFIXES[suffix[0]]), base_unit
+    return float(number), unit or ''
+
+
+def build_spec_rows(component_id, technical_specs):
+    rows = []
+    if not isinstance(technical_specs, dict):
+        return rows
+    for key, value in technical_specs.items():
+        if value is None or isinstance(value, (dict, list)):
+            continue
+        numeric_value, unit = parse_quantity(value, key)
+        rows.append(ComponentSpec(
+            component_id=component_id,
+            key=normalize_key(key),
+            value=normalize_value(value),
+            raw_value=str(value)[:255],
+            numeric_value=numeric_value,
+            unit=unit,
+        ))
+    return rows
+
+
+def index_specs(components):
+    """Reemplaza las filas de especificaciones de los componentes dados (2 consultas)."""
+    components = list(components)
+    if not components:
+        return
+    ComponentSpec.objects.filter(component_id__in=[c.pk for c in components]).delete()
+    rows = []
+    for component in components:
+        rows.extend(build_spec_rows(component.pk, component.technical_specs))
+    ComponentSpec.objects.bulk_create(rows, batch_size=1000)
+
+
+def spec_filter(key, lookup, value):
+    """Subconsulta de ids de componente que cumplen `spec.<key>__<lookup>=value`."""
+    specs = ComponentSpec.objects.filter(key=normalize_key(key))
+    if lookup in ('gt', 'gte', 'lt', 'lte'):
+        numeric_value, unit = parse_quantity(value, key)
+        if numeric_value is None:
+            return None
+        specs = specs.filter(**{f'numeric_value__{lookup}': numeric_value})
+        if unit:
+            specs = specs.filter(unit=unit)
+    elif lookup == 'contains':
+        specs = specs.filter(value__contains=normalize_value(value))
+    else:
+        specs = specs.filter(value=normalize_value(value))
+    return specs.values('component_id')
+
+
+def facet_counts(queryset):
+    """
+    Conteo de componentes por clave/valor de especificación dentro de `queryset`,
+    en una sola consulta agregada.
+    """
+    rows = (
+        ComponentSpec.objects
+        .filter(component_id__in=queryset.order_by().values('pk'))
+        .values('key', 'value')
+        .annotate(label=Min('raw_value'), count=Count('component_id', distinct=True))
+        .order_by('key', '-count', 'value')
+    )
+    facets = {}
+    for row in rows:
+        facets.setdefault(row['key'], []).append(
+            {'value': row['label'], 'count': row['count']}
+        )
+    return facets
@@ -0,0 +1,313 @@
+"""
+Stream de cambios de stock, precio y oferta de los componentes.
+
+1. Cada cambio se guarda en `ComponentChange` dentro de la misma transacción
+   (señales de Component, `bulk.apply_bulk_update` e importaciones). Su id es
+   el id del evento.
+2. El backend lo difunde a todos los workers cuando la transacción confirma:
+   - LocalBackend: directamente al hub de este proceso (un solo worker).
+   - PostgresNotifyBackend: `pg_notify` (se entrega al hacer COMMIT) y un hilo
+     por proceso con LISTEN que lo reenvía al hub local.
+   Se elige con settings.COMPONENT_STREAM_BACKEND (ruta punteada); por
+   defecto el de PostgreSQL si la base de datos lo es.
+3. `StreamHub` reparte los eventos a las colas asyncio de las conexiones SSE
+   abiertas en el proceso (`event_stream`, servido por ASGI).
+
+Un cliente que se reconecta con Last-Event-ID recibe primero lo que se
+perdió desde la tabla; si son más de COMPONENT_STREAM_REPLAY_LIMIT eventos
+recibe `event: reset` y debe recargar la lista completa. Los clientes que
+hacen polling usan la acción `changes` con `?since=`.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .models import ComponentChange
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'component_changes'
+REPLAY_LIMIT = getattr(settings, 'COMPONENT_STREAM_REPLAY_LIMIT', 500)
+KEEPALIVE_SECONDS = getattr(settings, 'COMPONENT_STREAM_KEEPALIVE', 15)
+RETENTION_HOURS = getattr(settings, 'COMPONENT_STREAM_RETENTION_HOURS', 24)
+QUEUE_SIZE = 1000
+# pg_notify admite hasta 8000 bytes por mensaje
+NOTIFY_BATCH = 40
+
+PRICE_FIELD = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+def serialize(change):
+    return {
+        'id': change.pk,
+        'component': change.component_id,
+        'store': change.store_id,
+        'stock': change.stock,
+        'price': PRICE_FIELD.to_representation(change.price),
+        'offer_price': PRICE_FIELD.to_representation(change.offer_price) if change.offer_price is not None else None,
+        'is_on_offer': change.is_on_offer,
+        'deleted': change.deleted,
+    }
+
+
+def matches(event, store=None, components=None):
+    if store is not None and event['store'] != store:
+        return False
+    if components is not None and event['component'] not in components:
+        return False
+    return True
+
+
+# --- Hub en proceso -------------------------------------------------------------
+
+class StreamHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self):
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @staticmethod
+    def _put(queue, events):
+        try:
+            queue.put_nowait(events)
+        except asyncio.QueueFull:
+            # Cliente lento: se le corta el stream y retoma con Last-Event-ID
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def dispatch(self, events):
+        """Entrega `events` a cada conexión abierta; se puede llamar desde cualquier hilo."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, events)
+            except RuntimeError:  # El loop de esa conexión ya cerró
+                self.unsubscribe((loop, queue))
+
+
+hub = StreamHub()
+
+
+# --- Backends entre workers -------------------------------------------------------
+
+class LocalBackend:
+    def publish(self, events):
+        transaction.on_commit(lambda: hub.dispatch(events))
+
+    def start(self):
+        pass
+
+
+class PostgresNotifyBackend:
+    # application_name de la sesión LISTEN, para reconocerla en pg_stat_activity
+    APPLICATION_NAME = 'component-stream'
+
+    def __init__(self):
+        self._thread = None
+        self._raw = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def publish(self, events):
+        with connection.cursor() as cursor:
+            for start in range(0, len(events), NOTIFY_BATCH):
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(events[start:start + NOTIFY_BATCH])])
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._listen_forever, name='component-stream', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo y cierra su sesión (si no, bloquea p.ej. borrar la base de tests)."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            raw = self._raw
+            if self._thread.is_alive() and raw is not None:
+                # Sigue esperando en el socket: cerrarlo corta la espera
+                raw.close()
+                self._thread.join(timeout=5)
+
+    def _listen_forever(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as exc:  # Conexión caída: reintentar
+                if self._stopped.is_set():
+                    break
+                logger.warning("Stream de componentes: LISTEN interrumpido (%s)", exc)
+                time.sleep(1)
+
+    def _listen(self):
+        wrapper = connections['default']
+        # Conexión propia, fuera del pool si lo hay (core.dbpool): LISTEN la ocupa siempre
+        params = {**wrapper.get_connection_params(), 'application_name': self.APPLICATION_NAME}
+        raw = self._raw = wrapper.Database.connect(**params)
+        try:
+            raw.autocommit = True
+            raw.cursor().execute(f'LISTEN {CHANNEL}')
+            while not self._stopped.is_set():
+                for payload in self._wait(raw):
+                    hub.dispatch(json.loads(payload))
+        finally:
+            self._raw = None
+            raw.close()
+
+    @staticmethod
+    def _wait(raw):
+        """Payloads recibidos en hasta 1 s, con psycopg2 o psycopg 3."""
+        if hasattr(raw, 'poll'):
+            if select.select([raw], [], [], 1) == ([], [], []):
+                return []
+            raw.poll()
+            payloads = [notify.payload for notify in raw.notifies]
+            raw.notifies.clear()
+            return payloads
+        return [notify.payload for notify in raw.notifies(timeout=1, stop_after=1)]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'COMPONENT_STREAM_BACKEND', None)
+            if path is None:
+                path = (
+                    'apps.inventory.stream.PostgresNotifyBackend' if connection.vendor == 'postgresql'
+                    else 'apps.inventory.stream.LocalBackend'
+                )
+            _backend = import_string(path)()
+        return _backend
+
+
+# --- Registro y lectura -------------------------------------------------------------
+
+def record_changes(changes):
+    """Guarda los ComponentChange dados y los publica al confirmar la transacción."""
+    if not changes:
+        return []
+    changes = ComponentChange.objects.bulk_create(changes, batch_size=1000)
+    events = [serialize(change) for change in changes]
+    get_backend().publish(events)
+    return events
+
+
+def _parse_id(value, name, errors):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        errors[name] = 'Debe ser un número entero.'
+
+
+def parse_filters(params, last_id=None):
+    """(store, components, last_id) desde los parámetros de la petición."""
+    errors = {}
+    store = _parse_id(params.get('store'), 'store', errors)
+    components = None
+    if params.get('components'):
+        try:
+            components = {int(value) for value in params['components'].split(',') if value.strip()}
+        except ValueError:
+            errors['components'] = 'Lista de ids separados por coma.'
+    last_id = _parse_id(last_id, 'last_event_id', errors)
+    if errors:
+        raise ValidationError(errors)
+    return store, components, last_id
+
+
+def latest_id():
+    return ComponentChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def changes_since(last_id, store=None, components=None, limit=None):
+    """
+    (eventos, reset): hasta `limit` eventos posteriores a `last_id`. Con más
+    pendientes se devuelve reset=True y ningún evento.
+    """
+    limit = limit or REPLAY_LIMIT
+    queryset = ComponentChange.objects.filter(id__gt=last_id).order_by('id')
+    if store is not None:
+        queryset = queryset.filter(store_id=store)
+    if components is not None:
+        queryset = queryset.filter(component_id__in=components)
+    rows = list(queryset[:limit + 1])
+    if len(rows) > limit:
+        return [], True
+    return [serialize(change) for change in rows], False
+
+
+def prune_changes(hours=RETENTION_HOURS):
+    cutoff = timezone.now() - timedelta(hours=hours)
+    return ComponentChange.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+# --- SSE ------------------------------------------------------------------------------
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: change\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(last_id=None, store=None, components=None):
+    get_backend().start()
+    subscription = hub.subscribe()
+    _, queue = subscription
+    try:
+        yield 'retry: 3000\n\n'
+        replayed = set()
+        if last_id is not None:
+            events, reset = await sync_to_async(changes_since)(last_id, store, components)
+            if reset:
+                yield f"id: {await sync_to_async(latest_id)()}\nevent: reset\ndata: {{}}\n\n"
+            for event in events:
+                replayed.add(event['id'])
+                yield format_event(event)
+
+        while True:
+            try:
+                events = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            if events is None:
+                return
+            for event in events:
+                # Lo enviado en la repetición también puede llegar en vivo. No se
+                # descarta por id menor: dos transacciones pueden confirmar en otro orden
+                if event['id'] in replayed:
+                    replayed.discard(event['id'])
+                elif matches(event, store, components):
+                    yield format_event(event)
+    finally:
+        hub.unsubscribe(subscription)
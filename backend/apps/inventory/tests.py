@@ -1,3 +1,971 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.interactions.models import RestockEvent, Wishlist, WishlistItem
+from apps.stores.models import Store
+from apps.users.models import User
+from core import loadtest
+from core.cache import versions
+from . import autocomplete, stream
+from .models import Category, Component, ComponentChange
+from .search import get_search_backend
+from .specs import parse_quantity
+
+
+class ComponentQueryCountTests(TestCase):
+    """El número de consultas no debe crecer con la cantidad de componentes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='cliente@test.com', username='cliente', password='x', role='cliente'
+        )
+        self.wishlist = Wishlist.objects.create(user=self.user)
+        self.category = Category.objects.create(name='Integrados')
+
+    def _count_queries(self, method, url, user=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries)
+
+    def _grow(self, count, in_wishlist=True):
+        # Cada llamada suma una tienda con los mismos MPN: price_comparison las encuentra
+        position = Store.objects.count()
+        owner = User.objects.create_user(
+            email=f'prov{position}@test.com', username=f'prov{position}', password='x', role='proveedor'
+        )
+        store = Store.objects.create(owner=owner, name=f'Tienda {position}', address='Calle 1')
+        components = [
+            Component.objects.create(
+                store=store, category=self.category, name=f'Temporizador {i}', mpn=f'NE555-{i}',
+                description='Temporizador', price=Decimal('1.50'), stock=10,
+            )
+            for i in range(count)
+        ]
+        if in_wishlist:
+            for component in components:
+                WishlistItem.objects.create(wishlist=self.wishlist, component=component)
+        return components
+
+    def test_list_query_count_is_constant(self):
+        self._grow(2)
+        small = self._count_queries('get', '/api/components/')
+        self._grow(8)
+        self.assertEqual(self._count_queries('get', '/api/components/'), small)
+
+    def test_retrieve_query_count(self):
+        component = self._grow(3)[0]
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/components/{component.pk}/')
+
+    def test_price_comparison_query_count_is_constant(self):
+        component = self._grow(2)[0]
+        small = self._count_queries('get', f'/api/components/{component.pk}/price_comparison/')
+        self._grow(8)
+        self.assertEqual(
+            self._count_queries('get', f'/api/components/{component.pk}/price_comparison/'), small
+        )
+
+    def test_recommendations_query_count_is_constant(self):
+        # Se mide sin caché: el costo en frío tampoco debe crecer con el catálogo
+        def count(user=None):
+            cache.clear()
+            return self._count_queries('get', '/api/components/recommendations/', user)
+
+        self._grow(2)
+        self._grow(2, in_wishlist=False)
+        anonymous = count()
+        with_wishlist = count(self.user)
+        self._grow(4)
+        self._grow(6, in_wishlist=False)
+        self.assertEqual(count(), anonymous)
+        self.assertEqual(count(self.user), with_wishlist)
+
+    def test_times_in_wishlist_uses_annotation(self):
+        component = self._grow(1)[0]
+        other = User.objects.create_user(email='otro@test.com', username='otro', password='x')
+        WishlistItem.objects.create(wishlist=Wishlist.objects.create(user=other), component=component)
+        response = self.client.get(f'/api/components/{component.pk}/')
+        self.assertEqual(response.json()['times_in_wishlist'], 2)
+
+
+class ComponentPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        self.store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        self.category = Category.objects.create(name='Integrados')
+
+    def _create(self, count, mpn='NE555'):
+        return [
+            Component.objects.create(
+                store=self.store, category=self.category, name=f'Temporizador {i}', mpn=f'{mpn}-{i}',
+                description='Temporizador', price=Decimal('1.50'), stock=10,
+            )
+            for i in range(count)
+        ]
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(row['id'] for row in data['results'])
+            url = data['next']
+        return ids
+
+    def test_cursor_walk_returns_every_component_once(self):
+        components = self._create(7)
+        ids = self._walk('/api/components/?page_size=2')
+        self.assertEqual(ids, sorted((c.pk for c in components), reverse=True))
+
+    def test_previous_link_returns_previous_page(self):
+        self._create(5)
+        first = self.client.get('/api/components/?page_size=2').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_page_size_is_capped(self):
+        self._create(3)
+        data = self.client.get('/api/components/?page_size=100000').json()
+        self.assertEqual(len(data['results']), 3)
+
+    def test_cursor_combines_with_filters_and_search(self):
+        self._create(4, mpn='LM317')
+        self._create(3, mpn='NE555')
+        ids = self._walk('/api/components/?page_size=2&search=LM317&max_price=5')
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(
+            {mpn.split('-')[0] for mpn in Component.objects.filter(pk__in=ids).values_list('mpn', flat=True)},
+            {'LM317'},
+        )
+
+
+class ComponentSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        category = Category.objects.create(name='Integrados')
+        self.contactor = Component.objects.create(
+            store=store, category=category, name='Contactor de Potencia 32A', mpn='LC1-D32',
+            description='Temporizador', technical_specs={'Corriente': '32A', 'Bobina': '220V AC'},
+            price=Decimal('1.50'), stock=10,
+        )
+        self.relay = Component.objects.create(
+            store=store, category=category, name='Relé 12V', mpn='RLY-12',
+            description='Sirve como contactor auxiliar', price=Decimal('1.50'), stock=10,
+        )
+
+    def _search(self, term):
+        return [row['id'] for row in self.client.get('/api/components/', {'search': term}).json()['results']]
+
+    def test_name_match_ranks_above_description_match(self):
+        self.assertEqual(self._search('contactor'), [self.contactor.pk, self.relay.pk])
+
+    def test_matches_mpn_and_specs(self):
+        self.assertEqual(self._search('LC1-D32'), [self.contactor.pk])
+        self.assertEqual(self._search('bobina 220V'), [self.contactor.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.relay.name = 'Optoacoplador'
+        self.relay.description = ''
+        self.relay.save()
+        self.assertEqual(self._search('contactor'), [self.contactor.pk])
+        self.contactor.delete()
+        self.assertEqual(self._search('contactor'), [])
+
+    def test_misspelled_mpn_falls_back_to_fuzzy_match(self):
+        if connection.vendor == 'postgresql' and not get_search_backend()._has_trigram():
+            self.skipTest('pg_trgm no está disponible')
+        self.assertEqual(self._search('LC1D23'), [self.contactor.pk])
+
+
+class SpecFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        specs = [
+            {'Voltaje': '5V', 'Encapsulado': 'DIP-8', 'Montaje': 'THT'},
+            {'Voltaje': '12V', 'Encapsulado': 'SOIC-8', 'Montaje': 'SMD'},
+            {'voltaje': '3.3 V', 'Corriente': '500mA', 'Montaje': 'SMD'},
+            {'Curva': 'C'},
+        ]
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        category = Category.objects.create(name='Integrados')
+        self.components = [
+            Component.objects.create(
+                store=store, category=category, name=f'Temporizador {i}', mpn=f'NE555-{i}',
+                description='Temporizador', technical_specs=spec, price=Decimal('1.50'), stock=10,
+            )
+            for i, spec in enumerate(specs)
+        ]
+
+    def _ids(self, params):
+        response = self.client.get('/api/components/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['id'] for row in response.json()['results']}
+
+    def _pks(self, *indexes):
+        return {self.components[i].pk for i in indexes}
+
+    def test_numeric_range_with_units(self):
+        self.assertEqual(self._ids({'spec.voltaje__gte': '5V'}), self._pks(0, 1))
+        self.assertEqual(self._ids({'spec.voltaje__lt': '5000mV'}), self._pks(2))
+        self.assertEqual(self._ids({'spec.corriente__lte': '0.5A'}), self._pks(2))
+
+    def test_uppercase_k_is_kelvin_only_for_temperatures(self):
+        self.assertEqual(parse_quantity('10K', 'Resistencia'), (10000.0, ''))
+        self.assertEqual(parse_quantity('6500K', 'Temperatura de color'), (6500.0, 'k'))
+        self.components[3].technical_specs = {'Resistencia': '10K'}
+        self.components[3].save()
+        self.assertEqual(self._ids({'spec.resistencia__gte': '4.7k'}), self._pks(3))
+
+    def test_exact_and_legacy_filters_ignore_key_case(self):
+        self.assertEqual(self._ids({'spec.montaje': 'smd'}), self._pks(1, 2))
+        self.assertEqual(self._ids({'montaje': 'SMD', 'encapsulado': 'soic'}), self._pks(1))
+
+    def test_invalid_numeric_filter_is_rejected(self):
+        response = self.client.get('/api/components/', {'spec.voltaje__gte': 'alto'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_specs_follow_component_updates(self):
+        component = self.components[3]
+        component.technical_specs = {'Voltaje': '24V'}
+        component.save()
+        self.assertEqual(self._ids({'spec.voltaje__gt': '12V'}), self._pks(3))
+
+    def test_facets_count_current_result_set(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/components/facets/', {'montaje': 'SMD'})
+        facets = response.json()
+        self.assertEqual(facets['montaje'], [{'value': 'SMD', 'count': 2}])
+        self.assertEqual({f['value'] for f in facets['voltaje']}, {'12V', '3.3 V'})
+        self.assertNotIn('curva', facets)
+
+
+class InventoryExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        store = Store.objects.create(owner=self.owner, name='Tienda', address='Calle 1')
+        category = Category.objects.create(name='Integrados')
+        self.components = [
+            Component.objects.create(
+                store=store, category=category, name=f'Temporizador {i}', mpn=mpn,
+                description='Temporizador', price=Decimal('1.50'), stock=stock, technical_specs=specs,
+            )
+            for i, (mpn, stock, specs) in enumerate([
+                ('NE555', 0, {'Voltaje': '5V'}), ('NE555-1', 10, {}), ('NE555-2', 10, {}),
+            ])
+        ]
+        # De otra tienda
+        other = User.objects.create_user(email='otro@test.com', username='otro', password='x', role='proveedor')
+        other_store = Store.objects.create(owner=other, name='Otra', address='Calle 2')
+        for i in range(2):
+            Component.objects.create(
+                store=other_store, category=category, name=f'Regulador {i}', mpn=f'LM317-{i}',
+                description='Regulador', price=Decimal('1.50'), stock=10,
+            )
+        self.client.force_authenticate(self.owner)
+
+    def _download(self, params=''):
+        response = self.client.get(f'/api/components/download_excel/{params}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_xlsx_is_streamed_and_readable(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(BytesIO(self._download()))
+        sheet = workbook.active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('Componente', 'MPN', 'Precio', 'Stock', 'Estatus'))
+        self.assertEqual(len(rows), 4)  # Solo los de su tienda
+        self.assertIn(('Temporizador 0', 'NE555', 1.5, 0, 'Agotado'), rows)
+        self.assertEqual(sheet.column_dimensions['A'].width, len('Temporizador 0') + 5)
+        self.assertEqual(sheet['A1'].fill.fgColor.rgb, 'FF4F46E5')
+
+    def test_csv_with_selected_columns(self):
+        content = self._download('?output=csv&columns=name,category,store,offer_price,specs')
+        lines = content.decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'Componente,Categoría,Tienda,Precio oferta,Especificaciones')
+        self.assertIn(f'Temporizador 0,Integrados,{self.components[0].store.name},,Voltaje: 5V', lines)
+        self.assertEqual(len(lines), 4)
+
+    def test_export_honours_listing_filters(self):
+        content = self._download('?output=csv&columns=name&max_price=1&search=temporizador')
+        self.assertEqual(content.decode('utf-8-sig').splitlines(), ['Componente'])
+        content = self._download('?output=csv&columns=name,stock&mpn=ne555&is_available=true')
+        self.assertEqual(content.decode('utf-8-sig').splitlines(), ['Componente,Stock', 'Temporizador 0,0'])
+
+    def test_query_count_does_not_grow_with_inventory(self):
+        with CaptureQueriesContext(connection) as small:
+            self._download('?columns=name,category,store,specs')
+        store = self.components[0].store
+        Component.objects.bulk_create([
+            Component(store=store, category=self.components[0].category, name=f'Extra {i}',
+                      mpn=f'NE556-{i}', description='-', price=Decimal('2'), stock=1)
+            for i in range(20)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            self._download('?columns=name,category,store,specs')
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_unknown_column_or_format_is_rejected(self):
+        self.assertEqual(self.client.get('/api/components/download_excel/?columns=name,secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/components/download_excel/?output=pdf').status_code, 400)
+
+
+class MpnComparisonTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name='Integrados')
+        # Una tienda por componente: una tienda no puede repetir MPN
+        self.stores = []
+        for i in range(4):
+            owner = User.objects.create_user(
+                email=f'prov{i}@test.com', username=f'prov{i}', password='x', role='proveedor'
+            )
+            self.stores.append(Store.objects.create(owner=owner, name=f'Tienda {i}', address='Calle 1'))
+        self.a, self.b, self.c = (
+            Component.objects.create(
+                store=store, category=self.category, name='Contactor', mpn=mpn,
+                description='-', price=Decimal('1.50'), stock=10,
+            )
+            for store, mpn in zip(self.stores, ['LC1-D32', 'lc1 d32', 'NE555'])
+        )
+
+    def test_normalized_mpn_follows_every_write_path(self):
+        self.assertEqual(self.a.mpn_normalized, 'LC1D32')
+        Component.objects.filter(pk=self.c.pk).update(mpn='ne-555p')
+        self.c.refresh_from_db()
+        self.assertEqual(self.c.mpn_normalized, 'NE555P')
+
+        self.c.mpn = 'LM 317'
+        Component.objects.bulk_update([self.c], ['mpn'])
+        self.c.refresh_from_db()
+        self.assertEqual(self.c.mpn_normalized, 'LM317')
+
+        created = Component.objects.bulk_create([Component(
+            store=self.c.store, category=self.c.category, name='x', mpn='bc-547', description='', price=1,
+        )])
+        self.assertEqual(Component.objects.get(pk=created[0].pk).mpn_normalized, 'BC547')
+
+        self.c.mpn = 'tl/431'
+        self.c.save(update_fields=['mpn'])
+        self.c.refresh_from_db()
+        self.assertEqual(self.c.mpn_normalized, 'TL431')
+
+    def test_price_comparison_matches_variants(self):
+        data = self.client.get(f'/api/components/{self.a.pk}/price_comparison/').json()
+        self.assertEqual([row['id'] for row in data], [self.b.pk])
+        ids = [row['id'] for row in self.client.get('/api/components/?mpn=lc1d32').json()['results']]
+        self.assertEqual(sorted(ids), [self.a.pk, self.b.pk])
+
+    def test_compare_returns_cheapest_in_stock_offer_per_mpn(self):
+        self.b.is_on_offer, self.b.offer_price = True, Decimal('1.20')
+        self.b.save()
+        cheap_but_empty = Component.objects.create(
+            store=self.stores[3], category=self.category, name='Contactor', mpn='LC1D32',
+            description='-', price=Decimal('0.50'), stock=0,
+        )
+
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/components/compare/?mpns=lc1-d32,NE555,XYZ').json()
+        self.assertEqual(data['not_found'], ['XYZ'])
+        first, second = data['results']
+        self.assertEqual(first['mpn'], 'lc1-d32')
+        self.assertEqual(
+            [(o['component'], o['effective_price']) for o in first['offers']],
+            [(cheap_but_empty.pk, '0.50'), (self.b.pk, '1.20'), (self.a.pk, '1.50')],
+        )
+        self.assertEqual(first['cheapest']['component'], self.b.pk)
+        self.assertEqual(first['total_stock'], 20)
+        self.assertEqual(second['cheapest']['component'], self.c.pk)
+
+    def test_compare_requires_mpns(self):
+        self.assertEqual(self.client.get('/api/components/compare/').status_code, 400)
+
+
+class InventoryImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        self.store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        self.category = Category.objects.create(name='Integrados')
+        self.existing = [
+            Component.objects.create(
+                store=self.store, category=self.category, name=f'Temporizador {i}', mpn=mpn,
+                description='Temporizador', price=Decimal('1.50'), stock=0,
+            )
+            for i, mpn in enumerate(['LC1-D32', 'LC1-D32-1'])
+        ]
+        self.client.force_authenticate(owner)
+
+    def _upload(self, content, name='inventario.csv', params=''):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        upload = SimpleUploadedFile(name, content.encode() if isinstance(content, str) else content)
+        return self.client.post(f'/api/components/import/{params}', {'file': upload}, format='multipart')
+
+    def _csv(self, rows):
+        header = 'nombre,mpn,categoría,precio,precio oferta,en oferta,stock,especificaciones\n'
+        return header + ''.join(f'{row}\n' for row in rows)
+
+    def test_upsert_validates_rows_and_aggregates_restock(self):
+        response = self._upload(self._csv([
+            'Contactor 32A,lc1d32,Integrados,20.00,,No,5,Corriente: 32A',
+            'Contactor 32A v2,LC1 D32 1,Integrados,21.00,,No,3,',
+            'Resistencia 4.7k,RES-4K7,Pasivos,0.10,,No,100,Valor: 4.7kΩ',
+            'Sin precio,X-1,Pasivos,abc,,No,1,',
+            'Oferta mala,X-2,Pasivos,1.00,2.00,Sí,1,',
+        ]))
+        self.assertEqual(response.status_code, 200, response.content)
+        report = response.json()
+        self.assertEqual(
+            (report['rows'], report['created'], report['updated'], report['failed'], report['restocked']),
+            (5, 1, 2, 2, 2),
+        )
+        self.assertEqual([error['row'] for error in report['errors']], [5, 6])
+        self.assertIn('price', report['errors'][0]['errors'])
+        self.assertIn('offer_price', report['errors'][1]['errors'])
+
+        updated = Component.objects.get(pk=self.existing[0].pk)
+        self.assertEqual((updated.name, updated.stock, updated.mpn), ('Contactor 32A', 5, 'lc1d32'))
+        self.assertEqual(updated.description, 'Temporizador')  # No venía en el archivo
+        self.assertEqual(Component.objects.filter(store=self.store).count(), 3)
+
+        event = RestockEvent.objects.get()
+        self.assertEqual(sorted(event.component_ids), sorted(c.pk for c in self.existing))
+
+        created = Component.objects.get(mpn_normalized='RES4K7')
+        self.assertEqual(created.category.name, 'Pasivos')
+        ids = [row['id'] for row in self.client.get('/api/components/?spec.valor__gte=4k').json()['results']]
+        self.assertEqual(ids, [created.pk])
+        ids = [row['id'] for row in self.client.get('/api/components/?search=resistencia').json()['results']]
+        self.assertEqual(ids, [created.pk])
+
+    def test_unknown_categories_can_be_rejected(self):
+        report = self._upload(
+            self._csv(['Nuevo,NEW-1,Inexistente,1.00,,No,1,']), params='?create_categories=false'
+        ).json()
+        self.assertEqual(report['failed'], 1)
+        self.assertIn('category', report['errors'][0]['errors'])
+
+    def test_non_numeric_store_is_rejected(self):
+        response = self._upload(self._csv(['Nuevo,NEW-1,Integrados,1.00,,No,1,']), params='?store=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('store', response.json())
+
+    def test_exported_xlsx_can_be_reimported(self):
+        exported = b''.join(self.client.get(
+            '/api/components/download_excel/?columns=name,mpn,category,price,stock,specs'
+        ).streaming_content)
+        owner = User.objects.create_user(email='otro@test.com', username='otro', password='x', role='proveedor')
+        target = Store.objects.create(owner=owner, name='Otra', address='Calle 2')
+        Component.objects.create(
+            store=target, category=self.category, name='Otro', mpn='OTRO', description='-', price=Decimal('1.50'),
+        )
+        self.client.force_authenticate(owner)
+        report = self._upload(exported, name='inventario.xlsx').json()
+        self.assertEqual((report['created'], report['failed']), (2, 0))
+        self.assertEqual(
+            sorted(Component.objects.filter(store=target).values_list('mpn_normalized', flat=True)),
+            ['LC1D32', 'LC1D321', 'OTRO'],
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def run(count, prefix):
+            content = self._csv([f'Pieza {i},{prefix}-{i},Integrados,1.00,,No,1,' for i in range(count)])
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._upload(content).json()['created'], count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(40, 'B'), run(3, 'A'))
+
+    def test_missing_columns_and_duplicate_api_create_are_rejected(self):
+        self.assertEqual(self._upload('nombre,precio\nx,1\n').status_code, 400)
+        response = self.client.post('/api/components/', {
+            'category': self.existing[0].category_id, 'name': 'Dup', 'mpn': 'lc1d32',
+            'description': '-', 'price': '1.00',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_management_command(self):
+        import tempfile
+        from django.core.management import CommandError, call_command
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as file:
+            file.write(self._csv(['Pieza,CMD-1,Integrados,1.00,,No,1,']))
+        out = io.StringIO()
+        call_command('import_components', file.name, store=self.store.pk, stdout=out)
+        self.assertIn('1 creadas', out.getvalue())
+        self.assertTrue(Component.objects.filter(mpn_normalized='CMD1').exists())
+
+
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        category = Category.objects.create(name='Integrados')
+        self.components = [
+            Component.objects.create(
+                store=store, category=category, name=f'Contactor {i}', mpn=mpn,
+                description='-', price=Decimal('1.50'), stock=stock,
+            )
+            for i, (mpn, stock) in enumerate([('LC1-D32', 0), ('LC1-D32-1', 10), ('LC1-D32-2', 10)])
+        ]
+        other = User.objects.create_user(email='otro@test.com', username='otro', password='x', role='proveedor')
+        self.foreign = Component.objects.create(
+            store=Store.objects.create(owner=other, name='Otra', address='Calle 2'), category=category,
+            name='Contactor', mpn='LC1-D32', description='-', price=Decimal('1.50'), stock=10,
+        )
+        self.client.force_authenticate(owner)
+        self.url = '/api/components/bulk_update/'
+
+    def _post(self, items):
+        return self.client.post(self.url, {'items': items}, format='json')
+
+    def test_updates_by_id_and_mpn_in_one_write(self):
+        items = [
+            {'id': self.components[0].pk, 'stock': 12},
+            {'mpn': 'lc1 d32 1', 'price': '3.00', 'offer_price': '2.50', 'is_on_offer': True},
+            {'id': self.components[2].pk, 'stock': 0},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post(items)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.json()['updated'], response.json()['restocked']), (3, 1))
+        # lock+lectura, contadores del panel, bulk_update, stream de cambios, outbox
+        # (+ pg_notify en PostgreSQL, savepoint/transacción según motor)
+        self.assertLessEqual(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]), 7)
+        if connection.features.has_select_for_update_of:
+            # Solo se bloquean los componentes, no la tienda ni el dueño del join
+            locks = [q['sql'] for q in ctx.captured_queries if 'FOR UPDATE' in q['sql']]
+            self.assertEqual(len(locks), 1)
+            self.assertTrue(locks[0].endswith('FOR UPDATE OF "inventory_component"'), locks[0])
+
+        a, b, c = (Component.objects.get(pk=x.pk) for x in self.components)
+        self.assertEqual((a.stock, b.price, b.offer_price, b.is_on_offer, c.stock),
+                         (12, Decimal('3.00'), Decimal('2.50'), True, 0))
+        self.assertEqual(RestockEvent.objects.get().component_ids, [a.pk])
+
+    def test_invalid_item_rolls_back_everything(self):
+        response = self._post([
+            {'id': self.components[0].pk, 'stock': 5},
+            {'id': self.components[1].pk, 'offer_price': '9.00', 'is_on_offer': True},  # >= precio
+            {'id': self.foreign.pk, 'stock': 1},  # De otra tienda
+            {'mpn': 'NOEXISTE', 'stock': 1},
+            {'stock': 1},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['index'] for e in response.json()['errors']], [4])
+
+        response = self._post([
+            {'id': self.components[0].pk, 'stock': 5},
+            {'id': self.components[1].pk, 'offer_price': '9.00', 'is_on_offer': True},
+            {'id': self.foreign.pk, 'stock': 1},
+            {'mpn': 'NOEXISTE', 'stock': 1},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual([e['index'] for e in errors], [1, 2, 3])
+        self.assertIn('offer_price', errors[0]['errors'])
+        self.assertEqual(Component.objects.get(pk=self.components[0].pk).stock, 0)
+        self.assertFalse(RestockEvent.objects.exists())
+
+
+    def test_non_numeric_store_is_rejected(self):
+        staff = User.objects.create_user(email='staff@test.com', username='staff', password='x', is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.post(f'{self.url}?store=abc', {'items': [{'id': self.components[0].pk, 'stock': 1}]},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('store', response.json())
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        category = Category.objects.create(name='Integrados')
+        self.timers = [
+            Component.objects.create(
+                store=store, category=category, name=f'Temporizador {i}', mpn=f'NE555-{i}',
+                description='Temporizador', price=Decimal('1.50'), stock=10,
+            )
+            for i in range(3)
+        ]
+        self.relay = Component.objects.create(
+            store=store, category=category, name='Contactor Schneider', mpn='LC1-D32',
+            description='-', price=Decimal('1.50'), stock=10,
+        )
+
+    def _get(self, q):
+        return self.client.get('/api/components/autocomplete/', {'q': q})
+
+    def test_prefix_on_name_words_and_mpn(self):
+        response = self._get('schnei')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{
+            'id': self.relay.pk, 'name': 'Contactor Schneider', 'mpn': 'LC1-D32',
+            'store_name': self.relay.store.name, 'price': '1.50',
+        }])
+        self.assertEqual([row['id'] for row in self._get('lc1 d3').json()], [self.relay.pk])
+        self.assertEqual(len(self._get('ne555').json()), 3)
+        self.assertEqual(self._get('n').json(), [])
+
+    def test_results_are_capped_and_served_from_memory(self):
+        self._get('temp')
+        with self.assertNumQueries(0):
+            rows = autocomplete.autocomplete('temp', limit=2)
+        self.assertEqual(len(rows), 2)
+
+    def test_signals_invalidate_the_index(self):
+        self.assertEqual(len(self._get('temporizador').json()), 3)
+        self.timers[0].name = 'Oscilador'
+        self.timers[0].save()
+        self.timers[1].delete()
+        self.assertEqual([row['id'] for row in self._get('temporizador').json()], [self.timers[2].pk])
+        self.assertEqual([row['id'] for row in self._get('oscil').json()], [self.timers[0].pk])
+
+        Component.objects.filter(pk=self.timers[2].pk).update(price=Decimal('2.00'))
+        self.assertEqual(self._get('temporizador').json()[0]['price'], '2.00')
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        owner = User.objects.create_user(email='prov@test.com', username='prov', password='x', role='proveedor')
+        store = Store.objects.create(owner=owner, name='Tienda', address='Calle 1')
+        category = Category.objects.create(name='Integrados')
+        self.components = [
+            Component.objects.create(
+                store=store, category=category, name=f'Temporizador {i}', mpn=f'NE555-{i}',
+                description='Temporizador', price=Decimal('1.50'), stock=10,
+            )
+            for i in range(3)
+        ]
+
+    def test_repeated_reads_are_served_from_cache(self):
+        first = self.client.get('/api/components/?min_price=1&max_price=5')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        with self.assertNumQueries(0):
+            # Mismos parámetros en otro orden: misma entrada
+            second = self.client.get('/api/components/?max_price=5&min_price=1')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                '/api/components/?min_price=1&max_price=5', HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+    def test_save_bumps_components_once(self):
+        before = versions(['components'])['components']
+        component = self.components[0]
+        component.price = Decimal('2.00')
+        component.save()
+        # El reindexado del vector de búsqueda no vuelve a invalidar
+        self.assertEqual(versions(['components'])['components'], before + 1)
+
+    def test_signals_invalidate_dependent_namespaces(self):
+        component = self.components[0]
+        url = f'/api/components/{component.pk}/'
+        etag = self.client.get(url)['ETag']
+        categories_etag = self.client.get('/api/categories/')['ETag']
+
+        component.name = 'Oscilador'
+        component.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Oscilador')
+        # Otro espacio de nombres: las categorías siguen en caché
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=categories_etag).status_code, 304)
+
+        category = component.category
+        category.name = 'Lógica'
+        category.save()
+        self.assertEqual(self.client.get(url).json()['category_name'], 'Lógica')
+
+        Component.objects.filter(pk=component.pk).update(price=Decimal('3.00'))
+        self.assertEqual(self.client.get(url).json()['price'], '3.00')
+
+    def test_management_listing_is_not_cached(self):
+        owner = self.components[0].store.owner
+        self.client.force_authenticate(owner)
+        self.client.get('/api/components/?manage=true')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/components/?manage=true')
+        self.assertGreater(len(ctx.captured_queries), 0)
+        self.assertNotIn('ETag', response)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_reports_every_endpoint_and_rolls_back(self):
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'benchmark', stores=3, components=30, users=5, reviews=5, searches=10,
+                iterations=2, output=output.name, stdout=io.StringIO(),
+            )
+            with open(output.name) as file:
+                report = json.load(file)
+        self.assertEqual(report['dataset']['components'], 30)
+        for name, result in report['endpoints'].items():
+            self.assertEqual(result['status'], 200, name)
+            self.assertEqual(set(result['ms']), {'p50', 'p90', 'p99', 'max', 'mean'})
+            self.assertGreater(result['queries']['max'], 0, name)
+        self.assertFalse(Component.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+
+class AsyncCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name='Integrados')
+        stores = []
+        for i in range(2):
+            owner = User.objects.create_user(
+                email=f'prov{i}@test.com', username=f'prov{i}', password='x', role='proveedor'
+            )
+            stores.append(Store.objects.create(owner=owner, name=f'Tienda {i}', address='Calle 1'))
+        self.components = [
+            Component.objects.create(
+                store=stores[0], category=category, name=f'Temporizador {i}', mpn=f'NE555-{i}',
+                description='Temporizador', price=Decimal('1.50'), stock=10,
+            )
+            for i in range(3)
+        ]
+        # Mismo MPN en otra tienda
+        self.match = Component.objects.create(
+            store=stores[1], category=category, name='Temporizador', mpn='NE555-0',
+            description='Temporizador', price=Decimal('1.50'), stock=10,
+        )
+
+    def assertSameAsSync(self, url):
+        sync = self.client.get(url)
+        response = self.client.get(loadtest.async_url(url))
+        self.assertEqual(response.status_code, sync.status_code, url)
+        data, expected = response.json(), sync.json()
+        if isinstance(expected, dict) and 'results' in expected:
+            # Los enlaces de página apuntan a su propio camino
+            self.assertEqual(data['results'], expected['results'], url)
+            if expected['next']:
+                self.assertTrue(data['next'].startswith('http://testserver/api/async/components/'))
+        else:
+            self.assertEqual(data, expected, url)
+        return data
+
+    def test_responses_match_sync_views(self):
+        pk = self.components[0].pk
+        for url in [
+            '/api/components/', '/api/components/?search=temporizador',
+            f'/api/components/?min_price=1&category={self.components[0].category_id}',
+            '/api/components/?category=999999', '/api/components/?spec.voltaje__gte=abc',
+            f'/api/components/{pk}/', '/api/categories/',
+        ]:
+            self.assertSameAsSync(url)
+        self.assertEqual([row['id'] for row in self.assertSameAsSync(f'/api/components/{pk}/price_comparison/')],
+                         [self.match.pk])
+
+    def test_cursor_pages_and_errors(self):
+        seen, url = [], '/api/async/components/?page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+        self.assertEqual(sorted(seen), sorted(c.pk for c in self.components + [self.match]))
+
+        self.assertEqual(self.client.get('/api/async/components/?cursor=roto').status_code, 404)
+        self.assertEqual(self.client.get('/api/async/components/999999/').status_code, 404)
+        response = self.client.post('/api/async/components/', {})
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
+
+    async def test_served_without_sync_view(self):
+        response = await AsyncClient().get('/api/async/components/?search=temporizador')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 4)
+
+
+class LoadtestTests(TransactionTestCase):
+    # Con DB_REPLICAS las peticiones GET leen de las réplicas (espejos de default)
+    databases = '__all__'
+
+    def test_compare_drives_both_paths_through_asgi(self):
+        Category.objects.create(name='Integrados')
+        results = asyncio.run(loadtest.compare([('categories', '/api/categories/')], concurrency=2, total=4))
+        for path in ('sync', 'async'):
+            self.assertEqual(results['categories'][path]['requests'], 4)
+            self.assertEqual(results['categories'][path]['errors'], 0)
+        self.assertGreater(results['categories']['speedup'], 0)
+
+    def test_command_validates_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', concurrency=0, stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('loadtest', only=['nada'], stdout=io.StringIO())
+
+
+class ComponentStreamTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(name='Integrados')
+        stores = []
+        for i in range(2):
+            owner = User.objects.create_user(
+                email=f'prov{i}@test.com', username=f'prov{i}', password='x', role='proveedor'
+            )
+            stores.append(Store.objects.create(owner=owner, name=f'Tienda {i}', address='Calle 1'))
+        self.components = [
+            Component.objects.create(
+                store=stores[0], category=category, name=f'Temporizador {i}', mpn=f'NE555-{i}',
+                description='Temporizador', price=Decimal('1.50'), stock=10,
+            )
+            for i in range(2)
+        ]
+        self.other = Component.objects.create(
+            store=stores[1], category=category, name='Amplificador', mpn='LM358',
+            description='-', price=Decimal('1.50'), stock=10,
+        )
+        self.store_id = stores[0].pk
+        self.start = stream.latest_id()
+
+    def _events(self, **params):
+        return self.client.get('/api/components/changes/', {'since': self.start, **params}).json()
+
+    def test_only_stream_fields_produce_events(self):
+        component = Component.objects.get(pk=self.components[0].pk)
+        component.name = 'Otro nombre'
+        component.save()
+        component.stock = 0
+        component.save(update_fields=['stock'])
+        component.delete()
+        events = self._events()['events']
+        self.assertEqual([(e['component'], e['stock'], e['deleted']) for e in events], [
+            (self.components[0].pk, 0, False), (self.components[0].pk, 0, True),
+        ])
+        self.assertEqual(events[0]['price'], '1.50')
+
+    def test_polling_resumes_and_filters(self):
+        cursor = self.client.get('/api/components/changes/').json()
+        self.assertEqual(cursor, {'events': [], 'last_id': self.start, 'reset': False})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for component in (self.components[1], self.other):
+                component.price = Decimal('2.00')
+                component.save()
+        data = self._events(store=self.store_id)
+        self.assertEqual([e['component'] for e in data['events']], [self.components[1].pk])
+        self.assertEqual(self._events(since=data['last_id'], store=self.store_id)['events'], [])
+        self.assertEqual(len(self._events(components=f'{self.other.pk},{self.components[0].pk}')['events']), 1)
+
+        with mock.patch.object(stream, 'REPLAY_LIMIT', 1):
+            self.assertEqual(self._events(), {'events': [], 'last_id': stream.latest_id(), 'reset': True})
+        self.assertEqual(self.client.get('/api/components/changes/?since=x').status_code, 400)
+
+    def test_bulk_update_publishes_changes(self):
+        self.client.force_authenticate(self.components[0].store.owner)
+        self.client.post('/api/components/bulk_update/', {'items': [
+            {'id': self.components[0].pk, 'stock': 3}, {'id': self.components[1].pk, 'stock': 4},
+        ]}, format='json')
+        self.assertEqual([e['stock'] for e in self._events()['events']], [3, 4])
+
+    @mock.patch.object(stream, '_backend', stream.LocalBackend())
+    async def test_sse_replays_from_last_event_id_then_streams(self):
+        component = await Component.objects.aget(pk=self.components[0].pk)
+        component.stock = 7
+        await component.asave()
+        response = await AsyncClient().get(
+            f'/api/components/stream/?store={self.store_id}', headers={'Last-Event-ID': str(self.start)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        replayed = (await anext(chunks)).decode()
+        self.assertIn('event: change', replayed)
+        self.assertIn('"stock": 7', replayed)
+
+        # En vivo: el evento repetido se descarta, el de otra tienda no se envía
+        live = [
+            json.loads(replayed.split('data: ')[1]),
+            {**stream.serialize(ComponentChange(pk=10 ** 6, component_id=self.other.pk, store_id=self.other.store_id,
+                                                stock=1, price=Decimal('1'))), 'store': self.other.store_id},
+            {**json.loads(replayed.split('data: ')[1]), 'id': 10 ** 6 + 1, 'stock': 8},
+        ]
+        next_chunk = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        stream.hub.dispatch(live)
+        self.assertIn(b'"stock": 8', await asyncio.wait_for(next_chunk, 1))
+        await chunks.aclose()
+
+    def test_prune_keeps_recent_events(self):
+        ComponentChange.objects.update(created_at=timezone.now() - timezone.timedelta(hours=48))
+        Component.objects.filter(pk=self.components[0].pk).get().delete()
+        self.assertEqual(stream.prune_changes(hours=24), 3)
+        self.assertEqual(ComponentChange.objects.count(), 1)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'LISTEN/NOTIFY solo en PostgreSQL')
+class PostgresStreamBackendTests(TransactionTestCase):
+    def test_notify_reaches_listener_after_commit(self):
+        backend = stream.PostgresNotifyBackend()
+        received = threading.Event()
+        payloads = []
+
+        def dispatch(events):
+            payloads.append(events)
+            received.set()
+
+        with mock.patch.object(stream.hub, 'dispatch', dispatch):
+            backend.start()
+            self.addCleanup(backend.stop)
+            threading.Event().wait(0.5)  # LISTEN establecido
+            with transaction.atomic():
+                backend.publish([{'id': 1, 'stock': 5}])
+                threading.Event().wait(0.2)
+                self.assertFalse(received.is_set())
+            self.assertTrue(received.wait(5))
+        self.assertEqual(payloads, [[{'id': 1, 'stock': 5}]])
+
+        # stop() cierra la sesión LISTEN: si quedara abierta no se podría borrar la base de tests
+        def listeners():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT count(*) FROM pg_stat_activity WHERE application_name = %s',
+                    [backend.APPLICATION_NAME],
+                )
+                return cursor.fetchone()[0]
+
+        self.assertEqual(listeners(), 1)
+        backend.stop()
+        self.assertEqual(listeners(), 0)
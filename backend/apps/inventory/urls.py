@@ -1,11 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ComponentViewSet
+from . import async_views
+from .views import CategoryViewSet, ComponentViewSet, component_stream
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
 router.register(r'components', ComponentViewSet, basename='component')
 
 urlpatterns = [
+    # Antes del router, que tomaría "stream" como id de componente
+    path('components/stream/', component_stream, name='component-stream'),
+    # Lecturas públicas asíncronas (ver core.async_views)
+    path('async/components/', async_views.component_list, name='async-component-list'),
+    path('async/components/<int:pk>/', async_views.component_detail, name='async-component-detail'),
+    path('async/components/<int:pk>/price_comparison/', async_views.price_comparison,
+         name='async-component-price-comparison'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,43 +1,102 @@
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django_filters import rest_framework as django_filters 
-from .models import Category, Component
+from .models import Category, Component, normalize_mpn
 from .serializers import CategorySerializer, ComponentSerializer
-from django.http import HttpResponse
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl import Workbook
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from apps.interactions.models import StockNotification
+from apps.interactions.recommendations import recommended_components
+from core.cache import CachedResponseMixin
+from core.pagination import ComponentPagination
+from apps.stores.models import Store
+from . import exports, stream
+from .autocomplete import autocomplete
+from .bulk import apply_bulk_update
+from .imports import InventoryImporter, read_rows
+from .search import ComponentSearchFilter
+from .specs import SPEC_LOOKUPS, facet_counts, spec_filter
+
+COMPARE_MAX_MPNS = getattr(settings, 'COMPONENT_COMPARE_MAX_MPNS', 100)
+
+# Mismo formato que los precios de ComponentSerializer ("12.50")
+PRICE_FIELD = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+def store_param(request):
+    """?store=<id> de las acciones masivas; None si no se indicó."""
+    value = request.query_params.get('store')
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({'store': 'Se esperaba el id numérico de una tienda.'})
 
 class ComponentFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name="price", lookup_expr='lte')
     
-    mpn = django_filters.CharFilter(field_name="mpn", lookup_expr='iexact')
+    mpn = django_filters.CharFilter(method='filter_mpn')
     
-    valor = django_filters.CharFilter(field_name="technical_specs__valor", lookup_expr='icontains')
-    voltaje = django_filters.CharFilter(field_name="technical_specs__voltaje", lookup_expr='icontains')
-    tolerancia = django_filters.CharFilter(field_name="technical_specs__tolerancia", lookup_expr='icontains')
-    encapsulado = django_filters.CharFilter(field_name="technical_specs__encapsulado", lookup_expr='icontains')
-    montaje = django_filters.CharFilter(field_name="technical_specs__montaje", lookup_expr='iexact')
+    # Filtros técnicos resueltos sobre el índice ComponentSpec (ver specs.py)
+    valor = django_filters.CharFilter(field_name="valor", lookup_expr='contains', method='filter_spec')
+    voltaje = django_filters.CharFilter(field_name="voltaje", lookup_expr='contains', method='filter_spec')
+    tolerancia = django_filters.CharFilter(field_name="tolerancia", lookup_expr='contains', method='filter_spec')
+    encapsulado = django_filters.CharFilter(field_name="encapsulado", lookup_expr='contains', method='filter_spec')
+    montaje = django_filters.CharFilter(field_name="montaje", lookup_expr='exact', method='filter_spec')
 
     class Meta:
         model = Component
         fields = ['category', 'is_available', 'store']
 
-class CategoryViewSet(viewsets.ModelViewSet):
+    def filter_mpn(self, queryset, name, value):
+        return queryset.filter(mpn_normalized=normalize_mpn(value))
+
+    def filter_spec(self, queryset, name, value):
+        lookup = self.filters[name].lookup_expr
+        return self._apply_spec(queryset, name, lookup, value)
+
+    def _apply_spec(self, queryset, key, lookup, value):
+        component_ids = spec_filter(key, lookup, value)
+        if component_ids is None:
+            raise ValidationError({f'spec.{key}__{lookup}': 'Se esperaba un valor numérico, p.ej. 5V.'})
+        return queryset.filter(pk__in=component_ids)
+
+    def filter_queryset(self, queryset):
+        """
+        Además de los filtros declarados acepta cualquier especificación:
+        ?spec.<clave>=valor, ?spec.<clave>__contains=..., ?spec.<clave>__gte=5V, etc.
+        """
+        queryset = super().filter_queryset(queryset)
+        for param, value in self.data.items():
+            if not param.startswith('spec.') or value == '':
+                continue
+            key, _, lookup = param[len('spec.'):].partition('__')
+            lookup = lookup or 'exact'
+            if not key or lookup not in SPEC_LOOKUPS:
+                raise ValidationError({param: 'Filtro de especificación no soportado.'})
+            queryset = self._apply_spec(queryset, key, lookup, value)
+        return queryset
+
+class CategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespaces = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny] 
 
-class ComponentViewSet(viewsets.ModelViewSet):
+class ComponentViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    # Muestra nombres de tienda y categoría (ver core.cache)
+    cache_namespaces = ('components', 'stores', 'categories')
     serializer_class = ComponentSerializer
-    filter_backends = [django_filters.DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [django_filters.DjangoFilterBackend, ComponentSearchFilter]
     filterset_class = ComponentFilter
-    search_fields = ['name', 'mpn', 'description', 'technical_specs__valor', 'technical_specs__encapsulado']
+    pagination_class = ComponentPagination
 
     def get_queryset(self):
-        queryset = Component.objects.all()
+        queryset = Component.objects.for_listing()
         is_management = self.request.query_params.get('manage', None)
         
         if is_management and self.request.user.is_authenticated:
@@ -45,30 +104,67 @@ class ComponentViewSet(viewsets.ModelViewSet):
                 return queryset.filter(store__owner=self.request.user)
         return queryset
 
+    def _check_unique_mpn(self, store, mpn, exclude=None):
+        duplicates = Component.objects.filter(store=store, mpn_normalized=normalize_mpn(mpn))
+        if exclude is not None:
+            duplicates = duplicates.exclude(pk=exclude)
+        if duplicates.exists():
+            raise ValidationError({'mpn': 'Tu tienda ya tiene un componente con este MPN.'})
+
     def perform_create(self, serializer):
-        from .models import Store 
-        user_store = Store.objects.get(owner=self.request.user)
+        user_store = self.request.user.store
+        self._check_unique_mpn(user_store, serializer.validated_data['mpn'])
         serializer.save(store=user_store)
 
+    def perform_update(self, serializer):
+        if 'mpn' in serializer.validated_data:
+            instance = serializer.instance
+            self._check_unique_mpn(instance.store_id, serializer.validated_data['mpn'], exclude=instance.pk)
+        serializer.save()
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'recommendations', 'price_comparison']:
+        if self.action in ['list', 'retrieve', 'recommendations', 'price_comparison', 'facets', 'compare', 'autocomplete', 'changes']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
     
     @action(detail=False, methods=['get'])
     def recommendations(self, request):
-        if request.user.is_authenticated:
-            user_interests = Component.objects.filter(in_wishlists__user=request.user).values_list('category', flat=True)
-            if user_interests.exists():
-                recommended = Component.objects.filter(category__in=user_interests).exclude(in_wishlists__user=request.user).distinct()[:5]
-            else:
-                recommended = Component.objects.all().order_by('?')[:5]
-        else:
-            recommended = Component.objects.all().order_by('?')[:5]
-            
+        # Precalculadas y cacheadas (ver apps.interactions.recommendations)
+        recommended = recommended_components(request.user, limit=5)
         serializer = self.get_serializer(recommended, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Sugerencias por prefijo de nombre o MPN (?q=), servidas desde un índice
+        en memoria: solo id, nombre, mpn, tienda y precio.
+        """
+        return Response(autocomplete(request.query_params.get('q', '')))
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Polling del stream de cambios: eventos posteriores a ?since= (filtrables
+        con ?store= o ?components=1,2). Sin `since` devuelve solo el último id,
+        desde el que seguir. Con `reset` el cliente debe recargar la lista.
+        """
+        store, components, since = stream.parse_filters(request.query_params, request.query_params.get('since'))
+        if since is None:
+            return Response({'events': [], 'last_id': stream.latest_id(), 'reset': False})
+        events, reset = stream.changes_since(since, store, components)
+        last_id = events[-1]['id'] if events else stream.latest_id() if reset else since
+        return Response({'events': events, 'last_id': last_id, 'reset': reset})
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Conteo por clave/valor de especificación para el resultado actual
+        (acepta los mismos filtros y ?search= que el listado).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(facet_counts(queryset))
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def toggle_notification(self, request, pk=None):
         """Activa o desactiva el seguimiento de stock para un componente"""
@@ -91,11 +187,11 @@ class ComponentViewSet(viewsets.ModelViewSet):
         """Devuelve solo los componentes seguidos por el usuario que tienen stock bajo"""
         # Filtramos componentes que tengan una StockNotification activa para este usuario
         # y que además cumplan la condición de stock (ej. < 10)
-        queryset = Component.objects.filter(
+        queryset = Component.objects.for_listing().filter(
             stocknotification__user=request.user,
             stocknotification__is_active=True,
             stock__lt=10
-        ).distinct().order_by('stock')
+        ).order_by('stock')
         
         low_stock = queryset.filter(stock__gt=0)
         out_of_stock = queryset.filter(stock__lte=0)
@@ -110,64 +206,173 @@ class ComponentViewSet(viewsets.ModelViewSet):
     def price_comparison(self, request, pk=None):
         component = self.get_object()
         
-        if not component.mpn:
+        if not component.mpn_normalized:
             return Response([])
 
-        # Buscamos coincidencias
-        comparisons = Component.objects.filter(
-            mpn__iexact=component.mpn
+        # Coincidencias por MPN normalizado ("LC1-D32" == "lc1d32"), con índice
+        comparisons = Component.objects.for_listing().filter(
+            mpn_normalized=component.mpn_normalized
         ).exclude(id=component.id)
 
         # IMPORTANTE: Usar el serializador para que devuelva store_name e imagen
         serializer = self.get_serializer(comparisons, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def compare(self, request):
+        """
+        Mejor oferta y stock por tienda para varios MPN en una sola consulta
+        (presupuestos de BOM): ?mpns=LC1-D32,NE555,...
+        """
+        requested = [mpn.strip() for mpn in request.query_params.get('mpns', '').split(',') if mpn.strip()]
+        if not requested:
+            raise ValidationError({'mpns': 'Indica al menos un MPN.'})
+        if len(requested) > COMPARE_MAX_MPNS:
+            raise ValidationError({'mpns': f'Máximo {COMPARE_MAX_MPNS} MPN por consulta.'})
+
+        wanted = {}
+        for mpn in requested:
+            wanted.setdefault(normalize_mpn(mpn), mpn)
+        wanted.pop('', None)
+
+        offers = (
+            Component.objects.with_effective_price()
+            .filter(mpn_normalized__in=list(wanted), is_available=True)
+            .order_by('mpn_normalized', 'effective_price', '-stock', 'id')
+            .values(
+                'id', 'name', 'mpn', 'mpn_normalized', 'store_id', 'store__name',
+                'price', 'offer_price', 'is_on_offer', 'effective_price', 'stock',
+            )
+        )
+
+        results = {
+            normalized: {'mpn': mpn, 'normalized': normalized, 'cheapest': None, 'total_stock': 0, 'offers': []}
+            for normalized, mpn in wanted.items()
+        }
+        seen_stores = set()
+        for offer in offers:
+            entry = results[offer['mpn_normalized']]
+            # Ya vienen ordenadas por precio: nos quedamos con la mejor de cada tienda
+            if (offer['mpn_normalized'], offer['store_id']) in seen_stores:
+                continue
+            seen_stores.add((offer['mpn_normalized'], offer['store_id']))
+            row = {
+                'component': offer['id'],
+                'name': offer['name'],
+                'mpn': offer['mpn'],
+                'store': offer['store_id'],
+                'store_name': offer['store__name'],
+                'price': PRICE_FIELD.to_representation(offer['price']),
+                'offer_price': None if offer['offer_price'] is None else PRICE_FIELD.to_representation(offer['offer_price']),
+                'is_on_offer': offer['is_on_offer'],
+                'effective_price': PRICE_FIELD.to_representation(offer['effective_price']),
+                'stock': offer['stock'],
+            }
+            entry['offers'].append(row)
+            entry['total_stock'] += offer['stock']
+            if entry['cheapest'] is None and offer['stock'] > 0:
+                entry['cheapest'] = row
+
+        return Response({
+            'results': [entry for entry in results.values() if entry['offers']],
+            'not_found': [entry['mpn'] for entry in results.values() if not entry['offers']],
+        })
+
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        parser_classes=[MultiPartParser], permission_classes=[permissions.IsAuthenticated],
+    )
+    def import_inventory(self, request):
+        """
+        Carga masiva de componentes desde un .csv o .xlsx (campo `file`) a la
+        tienda del usuario; el staff puede indicar ?store=<id>. Crea o actualiza
+        por MPN y devuelve el resumen con los errores por fila.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Adjunta un archivo .csv o .xlsx.'})
+
+        store_id = store_param(request)
+        stores = Store.objects.all() if request.user.is_staff else Store.objects.filter(owner=request.user)
+        store = stores.filter(pk=store_id).first() if store_id is not None else stores.first()
+        if store is None:
+            raise ValidationError({'store': 'No tienes una tienda donde importar.'})
+
+        columns, rows = read_rows(upload, upload.name)
+        create_categories = request.query_params.get('create_categories', 'true').lower() != 'false'
+        report = InventoryImporter(store, create_categories=create_categories).run(columns, rows)
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk_update', permission_classes=[permissions.IsAuthenticated])
+    def bulk_update(self, request):
+        """
+        Cambia stock/precios de muchos componentes a la vez:
+        {"items": [{"id": 1, "stock": 10}, {"mpn": "LC1-D32", "price": "20.00"}, ...]}
+        Todo o nada: si algún item falla se devuelven los errores por índice.
+        """
+        store_id = store_param(request)
+        components = Component.objects.all()
+        if not request.user.is_staff:
+            components = components.filter(store__owner=request.user)
+        elif store_id is not None:
+            components = components.filter(store_id=store_id)
+
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        result, errors = apply_bulk_update(items, components)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
-    def download_excel(self, request): 
-        queryset = self.get_queryset()
+    def download_excel(self, request):
+        """
+        Exporta el inventario (con los mismos filtros y ?search= del listado).
+        ?output=xlsx|csv y ?columns=name,mpn,category,store,price,offer_price,
+        is_on_offer,stock,status,specs
+        """
+        output = request.query_params.get('output', 'xlsx')
+        if output not in ('xlsx', 'csv'):
+            raise ValidationError({'output': 'Formato no soportado; usa xlsx o csv.'})
+        columns, unknown = exports.parse_columns(request.query_params.get('columns'))
+        if unknown or not columns:
+            raise ValidationError({'columns': f"Columnas no soportadas: {', '.join(unknown)}. "
+                                              f"Disponibles: {', '.join(exports.COLUMNS)}."})
+
+        queryset = Component.objects.all()
         if not request.user.is_staff:
             queryset = queryset.filter(store__owner=request.user)
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Inventario de Tienda"
-
-        # 1. Definir Estilos
-        header_fill = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid") # Morado elegante
-        header_font = Font(color="FFFFFF", bold=True, size=12)
-        center_alignment = Alignment(horizontal="center", vertical="center")
-        border = Border(bottom=Side(style='thin', color="DDDDDD"))
-
-        # 2. Encabezados
-        headers = ['Componente', 'MPN', 'Precio', 'Stock', 'Estatus']
-        ws.append(headers)
-
-        # Aplicar estilos a los encabezados
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_alignment
-
-        # 3. Agregar Datos con formato condicional básico
-        for item in queryset:
-            status_text = "Agotado" if item.stock <= 0 else "Disponible"
-            row_data = [item.name, item.mpn, item.price, item.stock, status_text]
-            ws.append(row_data)
-            
-            # Estilo para la última celda (Estatus)
-            last_cell = ws.cell(row=ws.max_row, column=5)
-            if status_text == "Agotado":
-                last_cell.font = Font(color="EF4444", bold=True) # Rojo
-            else:
-                last_cell.font = Font(color="10B981", bold=True) # Verde
-
-        # 4. AUTO-AJUSTAR columnas (El toque final para que se vea bien)
-        for column_cells in ws.columns:
-            length = max(len(str(cell.value)) for cell in column_cells)
-            ws.column_dimensions[column_cells[0].column_letter].width = length + 5
-
-        # 5. Respuesta
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename=reporte_inventario.xlsx'
-        wb.save(response)
+        queryset = self.filter_queryset(queryset)
+        if not queryset.ordered:
+            queryset = queryset.order_by('-created_at', '-id')
+
+        if output == 'csv':
+            response = StreamingHttpResponse(
+                exports.stream_csv(queryset, columns), content_type=exports.CSV_CONTENT_TYPE
+            )
+        else:
+            response = StreamingHttpResponse(
+                exports.stream_xlsx(queryset, columns), content_type=exports.XLSX_CONTENT_TYPE
+            )
+        response['Content-Disposition'] = f'attachment; filename=reporte_inventario.{output}'
         return response
+
+
+async def component_stream(request):
+    """
+    GET /api/components/stream/?store=<id> o ?components=1,2 : Server-Sent
+    Events con los cambios de stock, precio y oferta. El navegador reenvía
+    Last-Event-ID al reconectar (también se acepta ?last_event_id=).
+    Necesita servirse por ASGI (core/asgi.py): bajo WSGI ocuparía un worker.
+    """
+    try:
+        store, components, last_id = stream.parse_filters(
+            request.GET, request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        )
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    response = StreamingHttpResponse(
+        stream.event_stream(last_id, store, components), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Sin buffer en nginx
+    return response
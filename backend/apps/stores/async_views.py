@@ -0,0 +1,22 @@
+"""Lecturas públicas de tiendas con el ORM asíncrono (ver core.async_views)."""
+from core.async_views import async_api_view
+from core.pagination import StorePagination
+from .models import Store
+from .serializers import StoreListSerializer, StoreSerializer
+from .views import filter_nearby, with_latest_reviews
+
+
+@async_api_view
+async def store_list(request):
+    """GET /api/async/stores/ : mismo listado (con ?lat=&lon=&radius=) que /api/stores/."""
+    queryset = filter_nearby(Store.objects.select_related('owner'), request.query_params)
+    paginator = StorePagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = StoreListSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_data(serializer.data)
+
+
+@async_api_view
+async def store_detail(request, pk):
+    store = await with_latest_reviews(Store.objects.select_related('owner')).aget(pk=pk)
+    return StoreSerializer(store, context={'request': request}).data
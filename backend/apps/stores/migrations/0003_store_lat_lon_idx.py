@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0002_store_rating_store_review_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['latitude', 'longitude'], name='store_lat_lon_idx'),
+        ),
+    ]
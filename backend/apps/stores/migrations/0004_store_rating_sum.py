@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 14:33
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_rating_sum(apps, schema_editor):
+    Store = apps.get_model('stores', 'Store')
+    Review = apps.get_model('interactions', 'Review')
+    totals = Review.objects.values('store_id').annotate(total=Sum('rating'))
+    stores = [Store(pk=row['store_id'], rating_sum=row['total']) for row in totals]
+    Store.objects.bulk_update(stores, ['rating_sum'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0003_store_lat_lon_idx'),
+        ('interactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,59 @@
+import math
+
 from django.db import models
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
 from django.conf import settings
 
+EARTH_RADIUS_KM = 6371.0088
+
+
+class StoreQuerySet(models.QuerySet):
+    def nearby(self, lat, lon, radius_km):
+        """
+        Tiendas dentro de `radius_km` alrededor de (lat, lon), ordenadas por cercanía.
+
+        Primero se descarta por caja delimitadora sobre el índice (latitude, longitude)
+        y solo a los candidatos se les calcula la distancia (haversine) en la base de datos.
+        Cada tienda devuelta trae el atributo `distance_km`.
+        """
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        # Cerca de los polos la caja cubre todas las longitudes
+        cos_lat = math.cos(math.radians(lat))
+        lon_delta = 180.0 if cos_lat < 1e-6 else min(180.0, lat_delta / cos_lat)
+
+        queryset = self.filter(
+            latitude__isnull=False,
+            longitude__isnull=False,
+            latitude__gte=lat - lat_delta,
+            latitude__lte=lat + lat_delta,
+        )
+        if lon_delta < 180.0:
+            min_lon, max_lon = lon - lon_delta, lon + lon_delta
+            if min_lon < -180.0 or max_lon > 180.0:
+                # La caja cruza el antimeridiano
+                queryset = queryset.filter(
+                    models.Q(longitude__gte=(min_lon + 540.0) % 360.0 - 180.0)
+                    | models.Q(longitude__lte=(max_lon + 540.0) % 360.0 - 180.0)
+                )
+            else:
+                queryset = queryset.filter(longitude__gte=min_lon, longitude__lte=max_lon)
+
+        store_lat = Radians(Cast(F('latitude'), FloatField()))
+        store_lon = Radians(Cast(F('longitude'), FloatField()))
+        user_lat = math.radians(lat)
+        user_lon = math.radians(lon)
+
+        haversine = (
+            Power(Sin((store_lat - Value(user_lat)) / 2), 2)
+            + Value(math.cos(user_lat)) * Cos(store_lat) * Power(Sin((store_lon - Value(user_lon)) / 2), 2)
+        )
+        queryset = queryset.annotate(
+            distance_km=Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(haversine))
+        )
+        return queryset.filter(distance_km__lte=radius_km).order_by('distance_km', 'id')
+
+
 # Create your models here.
 class Store(models.Model):
     owner = models.OneToOneField(
@@ -17,11 +70,20 @@ class Store(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
     review_count = models.PositiveIntegerField(default=0)
+    # Suma de estrellas; con review_count permite actualizar el promedio por deltas
+    rating_sum = models.PositiveIntegerField(default=0)
     
     # Imagen de la fachada de la tienda
     image = models.ImageField(upload_to='stores/', null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = StoreQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='store_lat_lon_idx'),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
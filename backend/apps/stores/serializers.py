@@ -1,15 +1,20 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Store
-from django.db.models import Avg
 from apps.interactions.serializers import ReviewSerializer
 
-class StoreSerializer(serializers.ModelSerializer):
+# Reseñas que se incluyen en el detalle de la tienda
+LATEST_REVIEWS = getattr(settings, 'STORE_DETAIL_REVIEWS', 5)
 
-    owner_email = serializers.ReadOnlyField(source='owner.email')    
+class StoreListSerializer(serializers.ModelSerializer):
+    """
+    Serializador liviano para el listado: lee rating y review_count ya
+    desnormalizados en Store, sin consultar las reseñas.
+    """
+    owner_email = serializers.ReadOnlyField(source='owner.email')
     rating_average = serializers.SerializerMethodField()
-    total_reviews = serializers.SerializerMethodField()
-    
-    reviews = ReviewSerializer(many=True, read_only=True)
+    total_reviews = serializers.ReadOnlyField(source='review_count')
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Store
@@ -18,19 +23,30 @@ class StoreSerializer(serializers.ModelSerializer):
             'description', 'address', 'latitude', 
             'longitude', 'image', 'created_at', 
             'rating_average', 'total_reviews',
-            'reviews',
+            'distance_km',
         ]
-        
+
     def get_rating_average(self, obj):
-        # Calcula el promedio de estrellas de esta tienda
-        average = obj.reviews.aggregate(Avg('rating'))['rating__avg']
-        return round(average, 1) if average else 0.0
-    
-    def get_total_reviews(self, obj):
-        # Cuenta cuántas personas han opinado
-        return obj.reviews.count()
-    
-    def get_rating(self, obj):
-        # Calculamos el promedio de reviews para esta tienda
-        average = obj.reviews.aggregate(Avg('rating'))['rating__avg']
-        return round(average, 1) if average else 0.0
\ No newline at end of file
+        return round(float(obj.rating), 1)
+
+    def get_distance_km(self, obj):
+        # Solo viene calculada cuando se consulta con ?lat=&lon=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+
+class StoreSerializer(StoreListSerializer):
+    """
+    Detalle de la tienda con sus últimas reseñas (StoreViewSet las precarga en
+    `latest_reviews`); el historial completo está en /stores/{id}/reviews/.
+    """
+    reviews = serializers.SerializerMethodField()
+
+    class Meta(StoreListSerializer.Meta):
+        fields = StoreListSerializer.Meta.fields + ['reviews']
+
+    def get_reviews(self, obj):
+        reviews = getattr(obj, 'latest_reviews', None)
+        if reviews is None:
+            reviews = obj.reviews.select_related('user').order_by('-created_at', '-id')[:LATEST_REVIEWS]
+        return ReviewSerializer(reviews, many=True, context=self.context).data
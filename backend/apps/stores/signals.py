@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import User
+from core.cache import bump
+from .models import Store
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def invalidate_store_responses(sender, instance, **kwargs):
+    # Los componentes muestran el nombre de la tienda
+    bump('stores')
+
+@receiver(post_save, sender=User)
+def invalidate_owner_email(sender, instance, created, update_fields=None, **kwargs):
+    # El listado de tiendas incluye owner_email y las reseñas el usuario
+    if created or (update_fields is not None and not {'email', 'username'}.intersection(update_fields)):
+        return
+    bump('stores')
@@ -1,3 +1,163 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache, caches
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.interactions.models import Review
+from apps.users.models import User
+from . import serializers
+from .models import Store
+from .serializers import StoreSerializer
+
+
+def make_store(name, lat, lon, **extra):
+    owner = User.objects.create_user(
+        email=f'{name}@test.com', username=name, password='x', role='proveedor'
+    )
+    return Store.objects.create(
+        owner=owner, name=name, address='Calle 1',
+        latitude=Decimal(str(lat)) if lat is not None else None,
+        longitude=Decimal(str(lon)) if lon is not None else None,
+        **extra
+    )
+
+
+class NearbyStoresTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Caracas como punto de referencia
+        self.near = make_store('cerca', 10.4806, -66.9036)
+        self.mid = make_store('media', 10.5000, -66.9036)    # ~2.2 km
+        self.far = make_store('lejos', 10.6806, -66.9036)    # ~22 km
+        self.no_coords = make_store('sin_coords', None, None)
+
+    def test_nearby_sorted_by_distance_with_distance_km(self):
+        response = self.client.get('/api/stores/', {'lat': 10.4806, 'lon': -66.9036})
+        rows = response.json()['results']
+        self.assertEqual([s['name'] for s in rows], ['cerca', 'media'])
+        self.assertAlmostEqual(rows[0]['distance_km'], 0.0, places=2)
+        self.assertAlmostEqual(rows[1]['distance_km'], 2.16, delta=0.05)
+
+    def test_radius_param_widens_search(self):
+        stores = Store.objects.nearby(10.4806, -66.9036, 30)
+        self.assertEqual([s.name for s in stores], ['cerca', 'media', 'lejos'])
+        self.assertAlmostEqual(stores[2].distance_km, 22.2, delta=0.2)
+
+    def test_non_finite_values_are_rejected(self):
+        for params in ({'radius': 'nan'}, {'radius': 'inf'}, {'lat': 'nan'}):
+            response = self.client.get('/api/stores/', {'lat': 10.4806, 'lon': -66.9036, **params})
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get('/api/async/stores/', {'lat': 10.4806, 'lon': -66.9036, 'radius': 'nan'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_without_coordinates_returns_all_stores(self):
+        response = self.client.get('/api/stores/')
+        rows = response.json()['results']
+        self.assertEqual(len(rows), 4)
+        self.assertIsNone(rows[0]['distance_km'])
+
+
+class StorePaginationTests(TestCase):
+    def test_pages_walk_rating_ties_without_duplicates(self):
+        for i in range(7):
+            make_store(f'tienda{i}', None, None, rating=Decimal('4.00') if i % 2 else Decimal('0'))
+        client = APIClient()
+        seen, url = [], '/api/stores/?page_size=3'
+        while url:
+            data = client.get(url).json()
+            seen.extend((s['id'], s['rating_average']) for s in data['results'])
+            url = data['next']
+        self.assertEqual(len({pk for pk, _ in seen}), 7)
+        self.assertEqual(len(seen), 7)
+
+
+class StoreSerializerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.stores = [make_store(f'tienda{i}', None, None) for i in range(3)]
+        for i in range(8):
+            user = User.objects.create_user(email=f'cli{i}@test.com', username=f'cli{i}', password='x')
+            for store in self.stores:
+                Review.objects.create(user=user, store=store, rating=1 + i % 5, comment=f'Reseña {i}')
+
+    def test_list_reads_denormalized_stats_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = self.client.get('/api/stores/').json()['results']
+        self.assertEqual(rows[0]['total_reviews'], 8)
+        self.assertEqual(rows[0]['rating_average'], 2.6)
+        self.assertNotIn('reviews', rows[0])
+
+    def test_retrieve_includes_latest_reviews_only(self):
+        store = self.stores[0]
+        with self.assertNumQueries(2):
+            data = self.client.get(f'/api/stores/{store.pk}/').json()
+        self.assertEqual(
+            [r['comment'] for r in data['reviews']],
+            [f'Reseña {i}' for i in range(7, 2, -1)],
+        )
+        self.assertEqual(data['reviews'][0]['user_email'], 'cli7@test.com')
+
+    def test_latest_reviews_without_prefetch_use_the_same_setting(self):
+        with mock.patch.object(serializers, 'LATEST_REVIEWS', 2):
+            data = StoreSerializer(self.stores[0]).data
+        self.assertEqual([r['comment'] for r in data['reviews']], ['Reseña 7', 'Reseña 6'])
+
+    def test_reviews_action_is_paginated(self):
+        store = self.stores[1]
+        first = self.client.get(f'/api/stores/{store.pk}/reviews/?page_size=5').json()
+        second = self.client.get(first['next']).json()
+        comments = [r['comment'] for r in first['results'] + second['results']]
+        self.assertEqual(comments, [f'Reseña {i}' for i in range(7, -1, -1)])
+        self.assertIsNone(second['next'])
+
+
+class StoreResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.store = make_store('tienda', None, None)
+        self.user = User.objects.create_user(email='cli@test.com', username='cli', password='x')
+
+    def test_detail_miss_is_stored_once(self):
+        backend = caches['default']
+        with mock.patch.object(backend, 'set', wraps=backend.set) as stored:
+            self.client.get(f'/api/stores/{self.store.pk}/')
+        self.assertEqual(stored.call_count, 1)
+
+    def test_reviews_invalidate_store_detail(self):
+        url = f'/api/stores/{self.store.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Review.objects.create(user=self.user, store=self.store, rating=4, comment='Bien')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_reviews'], 1)
+        self.assertEqual(self.client.get(f'/api/stores/{self.store.pk}/reviews/').json()['results'][0]['comment'], 'Bien')
+
+    def test_owner_email_change_invalidates_list(self):
+        self.client.get('/api/stores/')
+        self.store.owner.email = 'nuevo@test.com'
+        self.store.owner.save()
+        self.assertEqual(self.client.get('/api/stores/').json()['results'][0]['owner_email'], 'nuevo@test.com')
+
+
+class StoreAsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.near = make_store('cerca', 10.4806, -66.9036)
+        self.far = make_store('lejos', 10.6806, -66.9036)
+        user = User.objects.create_user(email='cli@test.com', username='cli', password='x')
+        Review.objects.create(user=user, store=self.near, rating=5, comment='Bien')
 
-# Create your tests here.
+    def test_responses_match_sync_views(self):
+        for url in ['/api/stores/', '/api/stores/?lat=10.4806&lon=-66.9036', f'/api/stores/{self.near.pk}/']:
+            expected = self.client.get(url).json()
+            data = self.client.get(url.replace('/api/', '/api/async/', 1)).json()
+            self.assertEqual(data.get('results', data), expected.get('results', expected), url)
+        self.assertEqual(data['reviews'][0]['comment'], 'Bien')
+        self.assertEqual(self.client.get('/api/async/stores/999999/').status_code, 404)
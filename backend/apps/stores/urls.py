@@ -1,10 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import StoreViewSet
 
 router = DefaultRouter()
 router.register(r'stores', StoreViewSet)
 
 urlpatterns = [
+    # Lecturas públicas asíncronas (ver core.async_views)
+    path('async/stores/', async_views.store_list, name='async-store-list'),
+    path('async/stores/<int:pk>/', async_views.store_detail, name='async-store-detail'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
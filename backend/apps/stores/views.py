@@ -1,8 +1,53 @@
+import math
+
 from rest_framework import viewsets, permissions, exceptions
-from rest_framework.response import Response
+from rest_framework.decorators import action
+from django.db.models import Prefetch
 from .models import Store
-from .serializers import StoreSerializer
-from geopy.distance import geodesic
+from .serializers import LATEST_REVIEWS, StoreListSerializer, StoreSerializer
+from apps.interactions.models import Review
+from apps.interactions.serializers import ReviewSerializer
+from django.conf import settings
+from core.cache import CachedResponseMixin
+from core.pagination import ReviewPagination, StorePagination
+
+# Radio de búsqueda por cercanía (km), configurable con ?radius=
+DEFAULT_RADIUS_KM = getattr(settings, 'STORE_NEARBY_DEFAULT_RADIUS_KM', 5.0)
+MAX_RADIUS_KM = getattr(settings, 'STORE_NEARBY_MAX_RADIUS_KM', 50.0)
+
+def with_latest_reviews(queryset):
+    """Precarga en `latest_reviews` las últimas reseñas que muestra StoreSerializer."""
+    return queryset.prefetch_related(Prefetch(
+        'reviews',
+        queryset=Review.objects.select_related('user').order_by('-created_at', '-id')[:LATEST_REVIEWS],
+        to_attr='latest_reviews',
+    ))
+
+
+def filter_nearby(queryset, params):
+    """
+    Aplica ?lat=&lon=&radius= (radio acotado a MAX_RADIUS_KM); valores no
+    numéricos se ignoran y nan/inf responden 400.
+    """
+    user_lat = params.get('lat')
+    user_lon = params.get('lon')
+
+    if user_lat and user_lon:
+        try:
+            values = {
+                'lat': float(user_lat),
+                'lon': float(user_lon),
+                'radius': float(params.get('radius', DEFAULT_RADIUS_KM)),
+            }
+        except ValueError:
+            return queryset
+        invalid = {name: "Debe ser un número finito." for name, value in values.items() if not math.isfinite(value)}
+        if invalid:
+            raise exceptions.ValidationError(invalid)
+        radius = min(max(values['radius'], 0.0), MAX_RADIUS_KM)
+        queryset = queryset.nearby(values['lat'], values['lon'], radius)
+    return queryset
+
 
 # 1. CLASE DE PERMISO PERSONALIZADA
 class IsStoreOwner(permissions.BasePermission):
@@ -22,33 +67,24 @@ class IsStoreOwner(permissions.BasePermission):
         return is_owner and is_provider
 
 # 2. VISTA COMPLETA
-class StoreViewSet(viewsets.ModelViewSet):
+class StoreViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    cache_namespaces = ('stores',)
+    cached_actions = ('list', 'retrieve', 'reviews')
     queryset = Store.objects.all()
     serializer_class = StoreSerializer
+    pagination_class = StorePagination
 
     def get_queryset(self):
         """
         Personalizamos el QuerySet para:
-        1. Filtrar por cercanía (geolocalización).
+        1. Filtrar por cercanía (geolocalización) con ?lat=&lon=&radius=,
+           ordenando por distancia.
         2. Filtrar por dueño cuando se usa el parámetro ?manage=true.
         """
-        queryset = Store.objects.all()
-        user_lat = self.request.query_params.get('lat')
-        user_lon = self.request.query_params.get('lon')
-
-        if user_lat and user_lon:
-            try:
-                user_location = (float(user_lat), float(user_lon))
-                valid_store_ids = []
-                for store in queryset:
-                    if store.latitude and store.longitude:
-                        store_location = (store.latitude, store.longitude)
-                        distance = geodesic(user_location, store_location).km
-                        if distance <= 5.0:  # Radio de 5km
-                            valid_store_ids.append(store.id)
-                queryset = queryset.filter(id__in=valid_store_ids)
-            except ValueError:
-                pass 
+        queryset = Store.objects.select_related('owner')
+        if self.action == 'retrieve':
+            queryset = with_latest_reviews(queryset)
+        queryset = filter_nearby(queryset, self.request.query_params)
 
         if self.action == 'list' and self.request.query_params.get('manage'):
             if self.request.user.is_authenticated and not self.request.user.is_staff:
@@ -56,6 +92,11 @@ class StoreViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return StoreListSerializer
+        return StoreSerializer
+
     def get_permissions(self):
         """
         Configuración de permisos según la acción:
@@ -63,7 +104,7 @@ class StoreViewSet(viewsets.ModelViewSet):
         - Actualizar y borrar: Solo el dueño (Proveedor).
         - Crear: Cualquier usuario autenticado (se valida el rol en perform_create).
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'reviews']:
             permission_classes = [permissions.AllowAny]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [permissions.IsAuthenticated, IsStoreOwner]
@@ -88,11 +129,15 @@ class StoreViewSet(viewsets.ModelViewSet):
         """
         serializer.save()
         
-    def retrieve(self, request, *args, **kwargs):
-        """
-        Este método responde a GET /api/stores/<id>/
-        Es el que llama tu refreshStoreData()
-        """
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
\ No newline at end of file
+    @action(detail=True, methods=['get'])
+    def reviews(self, request, pk=None):
+        """GET /api/stores/<id>/reviews/ : todas las reseñas, paginadas por cursor."""
+        return self.cached_response(self._reviews, request, pk=pk)
+
+    def _reviews(self, request, pk=None):
+        store = self.get_object()
+        queryset = Review.objects.filter(store=store).select_related('user')
+        paginator = ReviewPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ReviewSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
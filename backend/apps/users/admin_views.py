@@ -1,17 +1,26 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from apps.stores.models import Store
-from apps.inventory.models import Component
+from apps.interactions.metrics import platform_stats
+from core.dbpool import connection_stats
+from core.middleware import request_stats, reset_stats
 
 class PlatformStatsView(APIView):
     permission_classes = [IsAdminUser] # Solo para administradores de la UNEFA
 
     def get(self, request):
-        # Genera el reporte 
-        return Response({
-            "total_stores": Store.objects.count(),
-            "total_components": Component.objects.count(),
-            "low_stock_alerts": Component.objects.filter(stock__lte=5).count(),
-            "recent_registrations": Store.objects.order_by('-created_at')[:5].values('name', 'created_at')
-        })
\ No newline at end of file
+        # Genera el reporte desde los contadores cacheados; ?refresh=1 los recalcula.
+        # El estado de las conexiones (pool) es en vivo y de este proceso
+        stats = platform_stats(refresh=request.query_params.get('refresh') == '1')
+        return Response({**stats, 'database': connection_stats()})
+
+class RequestStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # Percentiles por vista de las últimas peticiones de este proceso (core.middleware)
+        return Response(request_stats())
+
+    def delete(self, request):
+        reset_stats()
+        return Response(status=204)
@@ -0,0 +1,88 @@
+"""
+Autenticación JWT sin consultar al usuario en cada petición.
+
+JWTAuthentication de simplejwt valida la firma y luego hace un SELECT del
+usuario por id; las vistas vuelven a leer su tienda. `CachedJWTAuthentication`
+valida igual, pero toma el usuario (con `user.store` ya resuelto) de la caché
+AUTH_USER_CACHE_ALIAS durante AUTH_USER_CACHE_TTL segundos. Con la caché
+caliente una petición autenticada no hace consultas de autenticación.
+
+Los tokens llevan en sus claims (`token_claims`) el rol, el email, la tienda
+y la huella de la contraseña. Si el rol o la huella ya no coinciden con el
+usuario (cambió la contraseña o le cambiaron el rol) el token se rechaza y
+hay que volver a iniciar sesión. Las señales de apps.users.signals borran la
+entrada al guardar o eliminar el usuario o su tienda. Con LocMemCache y
+varios workers la invalidación solo llega al proceso que escribió; el TTL
+corto acota ese desfase.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+CACHE_ALIAS = getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')
+CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+PASSWORD_CLAIM = api_settings.REVOKE_TOKEN_CLAIM
+
+
+def _cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def token_claims(user):
+    """Claims que se firman en el token de `user` (ver MyTokenObtainPairSerializer)."""
+    store = getattr(user, 'store', None)
+    return {
+        'role': user.role,
+        'email': user.email,
+        'store_id': store.pk if store is not None else None,
+        PASSWORD_CLAIM: get_md5_hash_password(user.password),
+    }
+
+
+def forget_user(user_id):
+    """Descarta el usuario cacheado; la próxima petición lo vuelve a leer."""
+    caches[CACHE_ALIAS].delete(_cache_key(user_id))
+
+
+def cached_user(user_id):
+    """El usuario con su tienda (o sin ella) ya cargada, desde la caché si está."""
+    key = _cache_key(user_id)
+    user = caches[CACHE_ALIAS].get(key)
+    if user is None:
+        # Del primario: tras cambiar la contraseña una réplica atrasada
+        # rechazaría el token nuevo (ver core.db_router)
+        user = User.objects.using(DEFAULT_DB_ALIAS).select_related('store').filter(pk=user_id).first()
+        if user is None:
+            return None
+        caches[CACHE_ALIAS].set(key, user, CACHE_TTL)
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # Los tokens emitidos antes de agregar los claims no los traen
+        claims = validated_token.payload
+        if PASSWORD_CLAIM in claims and claims[PASSWORD_CLAIM] != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        if 'role' in claims and claims['role'] != user.role:
+            raise AuthenticationFailed("El rol del usuario cambió; inicia sesión de nuevo.", code="role_changed")
+        return user
@@ -15,6 +15,14 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Rol con el que se cargó, para los contadores por rol (apps.interactions.metrics)
+        if 'role' in field_names:
+            instance._loaded_role = instance.role
+        return instance
+
     def __str__(self):
         return f"{self.email} ({self.role})"
     
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.db import transaction
 from apps.stores.models import Store
+from .authentication import token_claims
 from .models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
@@ -59,6 +60,14 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             return user    
     
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Rol, email, tienda y huella de la contraseña firmados en el token
+        token = super().get_token(user)
+        for claim, value in token_claims(user).items():
+            token[claim] = value
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
 
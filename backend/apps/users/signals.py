@@ -1,7 +1,12 @@
 from django.core.mail import send_mail
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django_rest_passwordreset.signals import reset_password_token_created
 
+from apps.stores.models import Store
+from .authentication import forget_user
+from .models import User
+
 @receiver(reset_password_token_created)
 def password_reset_token_created(sender, instance, reset_password_token, *args, **kwargs):
     # Contenido del correo
@@ -15,4 +20,19 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
         "soporte.unefa@gmail.com",
         # Destinatario
         [reset_password_token.user.email]
-    )
\ No newline at end of file
+    )
+
+# --- Usuario cacheado de la autenticación JWT (apps.users.authentication) ---
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # Contraseña, rol, is_active... cualquier cambio lo vuelve a leer
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def forget_store_owner(sender, instance, **kwargs):
+    # El usuario cacheado trae su tienda
+    forget_user(instance.owner_id)
@@ -1,3 +1,236 @@
-from django.test import TestCase
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection, connections, router
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.stores.models import Store
+from core import cache as response_cache, db_router, dbpool, middleware
+from .authentication import CachedJWTAuthentication
+from .models import User
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        middleware.reset_stats()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='x', is_staff=True
+        )
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/categories/')
+        timing = response['Server-Timing']
+        self.assertIn('total;dur=', timing)
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'size;desc="{len(response.content)} bytes"', timing)
+
+    async def test_async_views_count_queries_from_orm_threads(self):
+        response = await AsyncClient().get('/api/async/categories/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_stats_endpoint_is_admin_only_and_reports_percentiles(self):
+        for _ in range(3):
+            self.client.get('/api/categories/')
+        self.assertEqual(self.client.get('/api/request-stats/').status_code, 401)
+
+        self.client.force_authenticate(self.admin)
+        data = self.client.get('/api/request-stats/').json()
+        row = next(row for row in data['views'] if row['view'] == 'GET category-list')
+        self.assertEqual(row['count'], 3)
+        self.assertEqual(set(row['queries']), {'p50', 'p90', 'p99', 'max'})
+        self.assertGreater(row['size_bytes']['max'], 0)
+
+    def test_duplicate_queries_are_logged_above_threshold(self):
+        def n_plus_one(request):
+            for _ in range(3):
+                User.objects.filter(pk=self.admin.pk).exists()
+            return HttpResponse('ok')
+
+        handler = middleware.PerformanceMiddleware(n_plus_one)
+        with mock.patch.object(middleware, 'LOG_DUPLICATE_QUERIES', True), \
+                mock.patch.object(middleware, 'QUERY_THRESHOLD', 2), \
+                self.assertLogs('core.performance', 'WARNING') as logs:
+            handler(RequestFactory().get('/lento/'))
+        self.assertIn('3 consultas', logs.output[0])
+        self.assertIn('3x SELECT', logs.output[0])
+
+        with mock.patch.object(middleware, 'QUERY_THRESHOLD', 2), self.assertNoLogs('core.performance'):
+            handler(RequestFactory().get('/lento/'))
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(middleware._percentile(values, 50), 50)
+        self.assertEqual(middleware._percentile(values, 99), 99)
+        self.assertEqual(middleware._percentile([7], 99), 7)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='prov@test.com', username='prov', password='clave-1', role='proveedor'
+        )
+        self.store = Store.objects.create(owner=self.user, name='Tienda', address='Calle 1')
+
+    def _login(self, password='clave-1'):
+        response = self.client.post('/api/users/login/', {'email': 'prov@test.com', 'password': password})
+        return response.json()['access']
+
+    def _authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_token_carries_claims_and_cached_user_needs_no_queries(self):
+        token = self._login()
+        user, validated = self._authenticate(token)
+        self.assertEqual(
+            (validated['role'], validated['email'], validated['store_id']),
+            ('proveedor', 'prov@test.com', self.store.pk),
+        )
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(token)
+            self.assertEqual(user.store.name, 'Tienda')
+
+    def test_password_change_revokes_old_tokens(self):
+        token = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/wishlist/').status_code, 200)
+        response = self.client.post('/api/users/change-password/', {'old_password': 'clave-1', 'new_password': 'clave-2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/wishlist/').status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self._login("clave-2")}')
+        self.assertEqual(self.client.get('/api/wishlist/').status_code, 200)
+
+    def test_role_change_and_deleted_account_invalidate(self):
+        token = self._login()
+        self._authenticate(token)
+        self.user.role = 'cliente'
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/wishlist/').status_code, 401)
+
+        token = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.delete('/api/users/delete-account/').status_code, 204)
+        self.assertEqual(self.client.get('/api/wishlist/').status_code, 401)
+
+    def test_store_changes_refresh_cached_user(self):
+        token = self._login()
+        self._authenticate(token)
+        self.store.delete()
+        user, _ = self._authenticate(token)
+        self.assertFalse(hasattr(user, 'store'))
+
+
+class ConnectionStatsTests(TestCase):
+    def test_platform_stats_reports_connection_mode(self):
+        admin = User.objects.create_user(email='admin@test.com', username='admin', password='x', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        data = client.get('/api/platform-stats/').json()['database']['default']
+        self.assertEqual(data['vendor'], connection.vendor)
+        self.assertIn(data['mode'], ('pool', 'persistent', 'per_request'))
+        self.assertEqual(dbpool._mode({'CONN_MAX_AGE': 60}, None), 'persistent')
+        self.assertEqual(dbpool._mode({'CONN_MAX_AGE': None}, None), 'persistent')
+        self.assertEqual(dbpool._mode({'CONN_MAX_AGE': 0}, None), 'per_request')
+
+    # Sin tocar connection.pool al importar: crearía el pool contra la base real
+    @unittest.skipUnless(connection.settings_dict['OPTIONS'].get('pool'), 'Solo con el pool de psycopg 3 (DB_POOL=1)')
+    def test_pool_sizes_and_waits(self):
+        User.objects.exists()
+        stats = dbpool.connection_stats()['default']['pool']
+        self.assertLessEqual(stats['size'], stats['max_size'])
+        self.assertGreaterEqual(stats['requests'], 0)
+        self.assertIn('wait_ms', stats)
+
+
+@mock.patch.object(db_router, 'REPLICAS', ['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Solo decisiones de enrutado: 'replica1' no existe y no se consulta."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.routed = {}
+
+    def _view(self, request):
+        self.routed['read'] = router.db_for_read(User)
+        return HttpResponse('ok', status=201 if request.method == 'POST' else 200)
+
+    def _call(self, request, view=None):
+        return db_router.ReplicaRoutingMiddleware(view or self._view)(request)
+
+    def test_safe_requests_read_from_replica(self):
+        response = self._call(self.factory.get('/api/components/'))
+        self.assertEqual(self.routed['read'], 'replica1')
+        self.assertNotIn(db_router.PIN_HEADER, response)
+        # Fuera de una petición, el primario
+        self.assertEqual(router.db_for_read(User), 'default')
+
+    def test_writes_use_primary_and_pin_the_client(self):
+        response = self._call(self.factory.post('/api/wishlist/toggle_item/'))
+        self.assertEqual(self.routed['read'], 'default')
+        self.assertEqual(router.db_for_write(User), 'default')
+        until = response[db_router.PIN_HEADER]
+        self.assertEqual(response.cookies[db_router.PIN_COOKIE].value, until)
+        self.assertGreater(int(until), time.time())
+
+        self._call(self.factory.get('/api/wishlist/', headers={'X-DB-Pin-Until': until}))
+        self.assertEqual(self.routed['read'], 'default')
+        request = self.factory.get('/api/wishlist/')
+        request.COOKIES[db_router.PIN_COOKIE] = until
+        self._call(request)
+        self.assertEqual(self.routed['read'], 'default')
+
+    def test_failed_writes_do_not_pin(self):
+        response = self._call(self.factory.post('/api/reviews/'), lambda request: HttpResponse(status=400))
+        self.assertNotIn(db_router.PIN_HEADER, response)
+
+    def test_expired_or_invalid_pins_are_ignored(self):
+        now = time.time()
+        for value in (str(int(now) - 1), str(int(now) + 3600), 'x'):
+            self._call(self.factory.get('/api/components/', headers={'X-DB-Pin-Until': value}))
+            self.assertEqual(self.routed['read'], 'replica1', value)
+
+    def test_write_or_transaction_inside_get_reads_primary(self):
+        def view(request):
+            self.routed['before'] = router.db_for_read(User)
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                self.routed['atomic'] = router.db_for_read(User)
+            router.db_for_write(User)
+            self.routed['after'] = router.db_for_read(User)
+            return HttpResponse()
+
+        self._call(self.factory.get('/api/components/'), view)
+        self.assertEqual(self.routed, {'before': 'replica1', 'atomic': 'default', 'after': 'default'})
+
+    async def test_async_views_route_orm_threads(self):
+        async def view(request):
+            self.routed['read'] = await sync_to_async(router.db_for_read)(User)
+            return HttpResponse()
+
+        await self._call(self.factory.get('/api/async/components/'), view)
+        self.assertEqual(self.routed['read'], 'replica1')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(router.allow_migrate('replica1', 'users'), False)
+        self.assertIs(router.allow_migrate('default', 'users'), True)
+
+    def test_response_cache_keeps_replica_reads_briefly_after_a_write(self):
+        cache.clear()
+        token = db_router._read_alias.set('replica1')
+        try:
+            self.assertEqual(response_cache._fill_ttl(['components']), response_cache.CACHE_TTL)
+            response_cache.bump('components')
+            self.assertEqual(response_cache._fill_ttl(['components']), db_router.PIN_SECONDS)
+        finally:
+            db_router._read_alias.reset(token)
+        self.assertEqual(response_cache._fill_ttl(['components']), response_cache.CACHE_TTL)
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import UserViewSet, LoginView
-from .admin_views import PlatformStatsView
+from .admin_views import PlatformStatsView, RequestStatsView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -9,6 +9,7 @@ router.register(r'users', UserViewSet)
 urlpatterns = [
     path('users/login/', LoginView.as_view(), name='token_obtain_pair'),
     path('platform-stats/', PlatformStatsView.as_view(), name='platform-stats'), 
+    path('request-stats/', RequestStatsView.as_view(), name='request-stats'),
     
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -3,6 +3,11 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+El stream de cambios de componentes (/api/components/stream/, Server-Sent
+Events) debe servirse por aquí, p.ej. con uvicorn o daphne. Las lecturas
+públicas tienen también versión asíncrona bajo /api/async/ (ver
+core.async_views); `manage.py loadtest` compara ambos caminos.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -12,5 +17,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Sin pool, las conexiones no se reutilizan entre peticiones (ver DATABASES en settings)
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')
 
 application = get_asgi_application()
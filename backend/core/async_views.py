@@ -0,0 +1,56 @@
+"""
+Base de las lecturas públicas asíncronas (/api/async/...).
+
+DRF no tiene vistas asíncronas, así que son vistas `async def` de Django que
+reutilizan los serializers, filtros y paginación de los viewsets:
+
+- Las filas se leen con el ORM asíncrono (`aiterator`, `aget`). Los
+  serializers corren en el propio loop: los querysets ya traen todo lo que
+  leen (`for_listing`, `with_latest_reviews`), así que no consultan.
+- Lo que sí consulta al armar el queryset (validar ?category=, el backend de
+  ?search=) pasa por un único `sync_to_async` en la vista.
+- La respuesta es el mismo JSON que devuelve la vista síncrona.
+
+Solo GET y anónimas; las escrituras y ?manage= siguen en los viewsets. Sin
+la caché de respuestas de core.cache: su backend (LocMem, archivos) es
+síncrono y cada lectura costaría un salto a un hilo.
+"""
+import functools
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status_code)
+
+
+def _error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(detail, exc.status_code)
+
+
+def async_api_view(view):
+    """
+    Envuelve una vista `async def (request, ...)` que devuelve datos ya
+    serializados: recibe el Request de DRF (query_params, build_absolute_uri)
+    y traduce las excepciones de DRF y los 404 como lo haría un viewset.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = _error_response(MethodNotAllowed(request.method))
+            response['Allow'] = 'GET, HEAD'
+            return response
+        try:
+            data = await view(Request(request), *args, **kwargs)
+        except (Http404, ObjectDoesNotExist):
+            return _error_response(NotFound())
+        except APIException as exc:
+            return _error_response(exc)
+        return json_response(data)
+    return wrapper
@@ -0,0 +1,265 @@
+"""
+Benchmark reproducible de los endpoints más usados (comando `benchmark`).
+
+`seed()` crea un conjunto sintético con `bulk_create` (tiendas con
+coordenadas, componentes con technical_specs, reseñas, listas de deseos e
+historial de búsquedas) y reconstruye los índices que las señales no
+alimentan en escrituras masivas. `run()` recorre los ENDPOINTS con el
+cliente de pruebas de DRF y devuelve, por endpoint, percentiles de latencia,
+consultas SQL y pico de memoria (tracemalloc), listo para volcar como JSON y
+comparar entre commits.
+
+Todo corre dentro de una transacción que se revierte al final y con una
+caché local propia, así no deja datos ni entradas en la base o caché reales.
+Funciona en SQLite sin servicios externos.
+"""
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from decimal import Decimal
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.interactions.models import Review, SearchHistory, Wishlist, WishlistItem
+from apps.interactions.ratings import reconcile_store_ratings
+from apps.interactions.recommendations import build_cooccurrences
+from apps.interactions.searches import rebuild_daily
+from apps.inventory.models import Category, Component
+from apps.inventory.search import get_search_backend
+from apps.inventory.specs import index_specs
+from apps.stores.models import Store
+from apps.users.models import User
+
+# Centro de referencia (Caracas) para las coordenadas de las tiendas
+CENTER = (10.4806, -66.9036)
+
+FAMILIES = [
+    ('Resistencias', 'RES', ['Resistencia', 'Resistencia de precisión'], lambda r: {
+        'Valor': r.choice(['220Ω', '1kΩ', '4.7kΩ', '10kΩ', '100kΩ']),
+        'Tolerancia': r.choice(['1%', '5%']),
+        'Encapsulado': r.choice(['0805', '1206', 'Axial']),
+        'Montaje': r.choice(['SMD', 'THT']),
+    }),
+    ('Capacitores', 'CAP', ['Capacitor electrolítico', 'Capacitor cerámico'], lambda r: {
+        'Valor': r.choice(['10nF', '100nF', '10uF', '100uF', '1000uF']),
+        'Voltaje': r.choice(['16V', '25V', '50V']),
+        'Encapsulado': r.choice(['Radial', '0805']),
+        'Montaje': r.choice(['SMD', 'THT']),
+    }),
+    ('Integrados', 'IC', ['Temporizador NE555', 'Amplificador LM358', 'Regulador LM7805'], lambda r: {
+        'Voltaje': r.choice(['5V', '12V', '15V']),
+        'Encapsulado': r.choice(['DIP-8', 'SOIC-8', 'TO-220']),
+        'Montaje': r.choice(['SMD', 'THT']),
+    }),
+    ('Transistores', 'TR', ['Transistor NPN 2N2222', 'Transistor PNP BC557', 'MOSFET IRF540'], lambda r: {
+        'Voltaje': r.choice(['40V', '60V', '100V']),
+        'Corriente': r.choice(['200mA', '800mA', '33A']),
+        'Encapsulado': r.choice(['TO-92', 'TO-220']),
+    }),
+    ('Microcontroladores', 'MCU', ['ATmega328P', 'ESP32', 'STM32F103'], lambda r: {
+        'Voltaje': r.choice(['3.3V', '5V']),
+        'Frecuencia': r.choice(['16MHz', '72MHz', '240MHz']),
+        'Encapsulado': r.choice(['DIP-28', 'QFP-32', 'QFN-48']),
+    }),
+]
+
+SEARCH_TERMS = ['ne555', 'resistencia', 'capacitor 100uf', 'lm358', 'esp32', 'transistor', 'regulador']
+
+# (nombre, usuario, url); el usuario es None (anónimo), 'client' o 'admin'.
+# {component} se reemplaza por un componente con el MPN en varias tiendas.
+ENDPOINTS = [
+    ('components_list', None, '/api/components/'),
+    ('components_search', None, '/api/components/?search=temporizador'),
+    ('components_filter', None, '/api/components/?min_price=1&max_price=20&encapsulado=DIP'),
+    ('stores_nearby', None, f'/api/stores/?lat={CENTER[0]}&lon={CENTER[1]}&radius=10'),
+    ('price_comparison', None, '/api/components/{component}/price_comparison/'),
+    ('recommendations', 'client', '/api/components/recommendations/'),
+    ('wishlist', 'client', '/api/wishlist/'),
+    ('download_excel', 'admin', '/api/components/download_excel/'),
+    ('analytics', 'admin', '/api/analytics/'),
+]
+
+
+def seed(stores=20, components=2000, reviews=500, users=100, searches=2000, rng_seed=1):
+    rng = random.Random(rng_seed)
+    password = make_password('benchmark')
+    categories = {
+        name: Category.objects.get_or_create(name=name)[0] for name, *_ in FAMILIES
+    }
+
+    owners = User.objects.bulk_create([
+        User(email=f'bench-prov{i}@test.com', username=f'bench-prov{i}', password=password, role='proveedor')
+        for i in range(stores)
+    ])
+    store_objs = Store.objects.bulk_create([
+        Store(
+            owner=owner, name=f'Electrónica {i}', address=f'Calle {i}',
+            latitude=Decimal(f'{CENTER[0] + rng.uniform(-0.2, 0.2):.6f}'),
+            longitude=Decimal(f'{CENTER[1] + rng.uniform(-0.2, 0.2):.6f}'),
+        )
+        for i, owner in enumerate(owners)
+    ])
+
+    # La pieza j de cada tienda tiene el mismo MPN en todas: price_comparison encuentra varias
+    component_objs = []
+    for i in range(components):
+        store = store_objs[i % stores]
+        part = i // stores
+        category, prefix, names, specs = FAMILIES[part % len(FAMILIES)]
+        part_rng = random.Random(part)
+        price = Decimal(f'{rng.uniform(0.1, 40):.2f}')
+        on_offer = rng.random() < 0.1
+        component_objs.append(Component(
+            store=store, category=categories[category],
+            name=f'{part_rng.choice(names)} {part}', mpn=f'{prefix}-{part:05d}',
+            description=f'{category} para proyectos y reparaciones',
+            price=price, stock=rng.choice([0, 2, 5, 10, 50, 200]),
+            is_on_offer=on_offer, offer_price=(price * Decimal('0.8')).quantize(Decimal('0.01')) if on_offer else None,
+            technical_specs=specs(part_rng),
+        ))
+    component_objs = Component.objects.bulk_create(component_objs, batch_size=1000)
+    get_search_backend().index([component.pk for component in component_objs])
+    index_specs(component_objs)
+
+    clients = User.objects.bulk_create([
+        User(email=f'bench-cli{i}@test.com', username=f'bench-cli{i}', password=password)
+        for i in range(users)
+    ])
+    review_pairs = set()
+    while len(review_pairs) < min(reviews, users * stores):
+        review_pairs.add((rng.randrange(users), rng.randrange(stores)))
+    Review.objects.bulk_create([
+        Review(user=clients[u], store=store_objs[s], rating=rng.randint(1, 5), comment='Buena atención')
+        for u, s in review_pairs
+    ], batch_size=1000)
+    reconcile_store_ratings()
+
+    wishlists = Wishlist.objects.bulk_create([Wishlist(user=client) for client in clients])
+    WishlistItem.objects.bulk_create([
+        WishlistItem(wishlist=wishlist, component=component, quantity=rng.randint(1, 10))
+        for wishlist in wishlists
+        for component in rng.sample(component_objs, min(8, len(component_objs)))
+    ], batch_size=1000)
+    build_cooccurrences()
+
+    SearchHistory.objects.bulk_create([
+        SearchHistory(user=rng.choice(clients), query=rng.choice(SEARCH_TERMS)) for _ in range(searches)
+    ], batch_size=1000)
+    rebuild_daily()
+
+    admin = User.objects.create_user(
+        email='bench-admin@test.com', username='bench-admin', password='benchmark', is_staff=True
+    )
+    return {
+        'client': clients[0], 'admin': admin,
+        'component': component_objs[0].pk,
+        'store': store_objs[0].pk,
+        'dataset': {
+            'stores': stores, 'components': components, 'reviews': len(review_pairs),
+            'users': users, 'wishlist_items': len(wishlists) * min(8, len(component_objs)),
+            'searches': searches,
+        },
+    }
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def _request(client, url):
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure(client, url, iterations, warm):
+    """Latencias (ms), consultas y pico de memoria de `iterations` peticiones a `url`."""
+    if not warm:
+        cache.clear()
+    _request(client, url)  # Calentamiento (imports, índices en memoria)
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        if not warm:
+            cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = _request(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(ctx.captured_queries))
+
+    if not warm:
+        cache.clear()
+    tracemalloc.start()
+    _request(client, url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'iterations': iterations,
+        'ms': {
+            'p50': round(_percentile(timings, 50), 3),
+            'p90': round(_percentile(timings, 90), 3),
+            'p99': round(_percentile(timings, 99), 3),
+            'max': round(max(timings), 3),
+            'mean': round(sum(timings) / len(timings), 3),
+        },
+        'queries': {'min': min(queries), 'max': max(queries)},
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run(iterations=20, warm=False, only=None, **dataset):
+    endpoints = [endpoint for endpoint in ENDPOINTS if not only or endpoint[0] in only]
+    isolated = override_settings(
+        ALLOWED_HOSTS=['testserver'],
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}},
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    with isolated, transaction.atomic():
+        started = time.perf_counter()
+        seeded = seed(**dataset)
+        seed_seconds = time.perf_counter() - started
+
+        clients = {None: APIClient()}
+        for role in ('client', 'admin'):
+            clients[role] = APIClient()
+            clients[role].force_authenticate(seeded[role])
+
+        results = {}
+        for name, role, url in endpoints:
+            results[name] = measure(
+                clients[role], url.format(component=seeded['component']), iterations, warm
+            )
+        transaction.set_rollback(True)
+
+    return {
+        'revision': _git_revision(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'cache': 'warm' if warm else 'cold',
+        'dataset': seeded['dataset'],
+        'seed_seconds': round(seed_seconds, 2),
+        'endpoints': results,
+    }
@@ -0,0 +1,135 @@
+"""
+Caché de respuestas para las lecturas públicas del catálogo.
+
+`CachedResponseMixin` guarda los datos ya serializados de list/retrieve con
+una clave que combina la acción, los parámetros de la URL normalizados y la
+versión de cada espacio de nombres del que depende la vista
+(`cache_namespaces`). Las señales de los modelos llaman a `bump()`, que sube
+la versión del espacio afectado: las entradas anteriores dejan de
+alcanzarse y caducan solas, sin vaciar el resto de la caché.
+
+Las respuestas llevan ETag y Last-Modified; si el cliente envía un
+If-None-Match que coincide se responde 304 sin cuerpo.
+
+Con réplicas (core.db_router) una lectura justo después de `bump()` puede
+llegar a una réplica que aún no ve la escritura; esa respuesta se guarda solo
+DB_REPLICA_PIN_SECONDS para no dejar datos viejos con la versión nueva.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import db_router
+
+CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+CACHE_TTL = getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+# Parámetros que hacen la respuesta distinta por usuario: no se cachean
+PRIVATE_PARAMS = {'manage'}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(namespace):
+    return f'respcache:ns:{namespace}'
+
+
+def _bumped_key(namespace):
+    return f'respcache:bumped:{namespace}'
+
+
+def versions(namespaces):
+    keys = {namespace: _version_key(namespace) for namespace in namespaces}
+    found = _cache().get_many(keys.values())
+    result = {}
+    for namespace, key in keys.items():
+        if key not in found:
+            # Nunca reiniciar a un valor ya usado: si la versión se expulsó de
+            # la caché, entradas viejas con esa versión podrían seguir vivas
+            _cache().add(key, time.time_ns(), None)
+            found[key] = _cache().get(key)
+        result[namespace] = found[key]
+    return result
+
+
+def bump(*namespaces):
+    """Invalida todas las respuestas cacheadas que dependen de estos espacios."""
+    for namespace in namespaces:
+        try:
+            _cache().incr(_version_key(namespace))
+        except ValueError:
+            _cache().set(_version_key(namespace), time.time_ns(), None)
+    if db_router.REPLICAS:
+        _cache().set_many({_bumped_key(namespace): True for namespace in namespaces}, db_router.PIN_SECONDS)
+
+
+def _fill_ttl(namespaces):
+    if db_router.reading_from_replica() and _cache().get_many([_bumped_key(ns) for ns in namespaces]):
+        return db_router.PIN_SECONDS
+    return CACHE_TTL
+
+
+class CachedResponseMixin:
+    cache_namespaces = ()
+    cached_actions = ('list', 'retrieve')
+
+    def _response_cache_key(self, request):
+        params = sorted(
+            (name, value) for name, values in request.query_params.lists()
+            for value in values if value != ''
+        )
+        raw = json.dumps([
+            self.basename, self.action, sorted(self.kwargs.items()), request.get_host(),
+            params, sorted(versions(self.cache_namespaces).items()),
+        ], default=str)
+        return 'respcache:' + hashlib.md5(raw.encode()).hexdigest()
+
+    def _is_cacheable(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and self.action in self.cached_actions
+            and not PRIVATE_PARAMS.intersection(request.query_params)
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self._is_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        key = self._response_cache_key(request)
+        entry = _cache().get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = json.dumps(response.data, cls=JSONEncoder, sort_keys=True)
+            entry = {
+                'data': response.data,
+                'etag': quote_etag(hashlib.md5(body.encode()).hexdigest()),
+                'last_modified': time.time(),
+            }
+            _cache().set(key, entry, _fill_ttl(self.cache_namespaces))
+
+        if entry['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        # El navegador puede guardarla pero debe revalidar con el ETag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,124 @@
+"""
+Lecturas en réplicas de la base de datos (DB_REPLICAS en settings).
+
+`ReplicaRoutingMiddleware` elige una réplica al azar para cada petición con
+método seguro (GET, HEAD, OPTIONS) y `ReplicaRouter` le envía las lecturas de
+esa petición. Todo lo demás va al primario (`default`): escrituras, lecturas
+dentro de una transacción, comandos de gestión y cualquier código fuera de
+una petición. Si una vista segura escribe, el resto de la petición también
+lee del primario.
+
+Leer lo que uno acaba de escribir: la réplica puede ir unos instantes atrás.
+Tras una escritura correcta la respuesta lleva la cookie `db_pin_until` y la
+cabecera X-DB-Pin-Until con un epoch DB_REPLICA_PIN_SECONDS segundos en el
+futuro; mientras el cliente devuelva alguna de las dos (el frontend reenvía
+la cabecera desde api/axios.js) sus lecturas van al primario. Así, tras un
+`toggle_item` o una reseña, la lista siguiente ya las incluye.
+
+La elección viaja en una ContextVar, como el recorder de core.middleware:
+llega a los hilos donde el ORM asíncrono ejecuta las consultas.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICAS = getattr(settings, 'DATABASE_REPLICAS', [])
+PIN_SECONDS = getattr(settings, 'DB_REPLICA_PIN_SECONDS', 5)
+
+PIN_COOKIE = 'db_pin_until'
+PIN_HEADER = 'X-DB-Pin-Until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias de la réplica de la petición en curso; None = primario
+_read_alias = ContextVar('db_read_alias', default=None)
+
+
+def reading_from_replica():
+    return _read_alias.get() is not None
+
+
+def is_pinned(request):
+    """La petición trae un pin vigente (cookie o cabecera) al primario."""
+    now = time.time()
+    for value in (request.COOKIES.get(PIN_COOKIE), request.headers.get(PIN_HEADER)):
+        try:
+            # Un valor más lejano que el margen no lo emitió este servidor
+            if now < float(value) <= now + PIN_SECONDS + 1:
+                return True
+        except (TypeError, ValueError):
+            pass
+    return False
+
+
+def choose_replica(request):
+    if not REPLICAS or request.method not in SAFE_METHODS or is_pinned(request):
+        return None
+    return random.choice(REPLICAS)
+
+
+def pin(response):
+    """Marca la respuesta para que el cliente lea del primario un rato."""
+    until = str(int(time.time() + PIN_SECONDS))
+    response.set_cookie(PIN_COOKIE, until, max_age=PIN_SECONDS, httponly=True, samesite='Lax')
+    response[PIN_HEADER] = until
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Después de escribir, la petición debe ver su propia escritura
+        _read_alias.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplicas son la misma base
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación
+        if db in REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _read_alias.set(choose_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self._finish(request, response)
+
+    async def __acall__(self, request):
+        token = _read_alias.set(choose_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self._finish(request, response)
+
+    def _finish(self, request, response):
+        if REPLICAS and request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(response)
+        return response
@@ -0,0 +1,48 @@
+"""
+Estado de las conexiones a la base de datos para el panel de administración.
+
+Con DB_POOL=1 (ver DATABASES en settings) cada proceso tiene un pool de
+psycopg 3 por alias; `connection_stats()` devuelve su tamaño, conexiones
+libres y las esperas acumuladas (`get_stats()` de psycopg_pool). Sin pool
+informa el modo: persistentes (CONN_MAX_AGE > 0) o una por petición.
+Los números son de este proceso, como los de core.middleware.
+"""
+from django.db import connections
+
+# Claves de psycopg_pool.ConnectionPool.get_stats() que se exponen
+POOL_STATS = {
+    'pool_size': 'size',
+    'pool_available': 'available',
+    'requests_waiting': 'waiting',
+    'requests_num': 'requests',
+    'requests_queued': 'queued',
+    'requests_wait_ms': 'wait_ms',
+    'requests_errors': 'errors',
+    'connections_lost': 'lost',
+}
+
+
+def _mode(settings_dict, pool):
+    if pool is not None:
+        return 'pool'
+    max_age = settings_dict.get('CONN_MAX_AGE', 0)
+    return 'per_request' if max_age == 0 else 'persistent'
+
+
+def connection_stats():
+    result = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, 'pool', None)
+        entry = {
+            'vendor': connection.vendor,
+            'mode': _mode(connection.settings_dict, pool),
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE', 0),
+            'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        }
+        if pool is not None:
+            stats = pool.get_stats()
+            entry['pool'] = {'min_size': pool.min_size, 'max_size': pool.max_size, 'timeout': pool.timeout}
+            entry['pool'].update({name: stats.get(key, 0) for key, name in POOL_STATS.items()})
+        result[alias] = entry
+    return result
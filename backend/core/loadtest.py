@@ -0,0 +1,186 @@
+"""
+Throughput de las lecturas síncronas (/api/...) frente a las asíncronas
+(/api/async/..., ver core.async_views) con el mismo número de workers
+(comando `loadtest`).
+
+`run()` crea una base de datos de prueba aparte (como el runner de tests), la
+siembra con `core.benchmark.seed` y, por endpoint y camino, lanza `requests`
+peticiones con `concurrency` en vuelo contra la aplicación ASGI real, en este
+proceso y un único event loop: un worker de uvicorn/daphne. Reporta
+peticiones por segundo, percentiles de latencia, errores y el máximo de
+hilos vivos; al terminar destruye la base de prueba.
+
+La caché es DummyCache para comparar el trabajo de cada vista y no los
+aciertos de core.cache. Ojo al leer los resultados: el ORM asíncrono de
+Django aún ejecuta cada consulta en un hilo (sync_to_async); lo que se ahorra
+es tener la petición entera (middleware, serialización, render) en uno.
+"""
+import asyncio
+import platform
+import threading
+import time
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, connections, transaction
+from django.test.utils import override_settings
+
+from . import db_router
+from .benchmark import CENTER, _git_revision, _percentile, seed
+
+# (nombre, url síncrona); la asíncrona es la misma bajo /api/async/.
+# {component} y {store} se reemplazan por filas sembradas.
+ENDPOINTS = [
+    ('components_list', '/api/components/'),
+    ('components_search', '/api/components/?search=temporizador'),
+    ('component_detail', '/api/components/{component}/'),
+    ('price_comparison', '/api/components/{component}/price_comparison/'),
+    ('categories', '/api/categories/'),
+    ('stores_list', '/api/stores/'),
+    ('stores_nearby', f'/api/stores/?lat={CENTER[0]}&lon={CENTER[1]}&radius=10'),
+    ('store_detail', '/api/stores/{store}/'),
+]
+
+
+def async_url(url):
+    return url.replace('/api/', '/api/async/', 1)
+
+
+async def request(app, url):
+    """GET a la aplicación ASGI sin servidor de por medio; devuelve el status."""
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    body_sent = False
+    response = {}
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django escucha la desconexión hasta terminar; el cliente nunca corta
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    await app(scope, receive, send)
+    return response.get('status')
+
+
+async def drive(app, url, concurrency, total):
+    """`total` peticiones a `url` con `concurrency` en vuelo a la vez."""
+    timings = []
+    errors = 0
+    threads_peak = threading.active_count()
+    pending = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            status = await request(app, url)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors += 1
+
+    async def sample_threads():
+        nonlocal threads_peak
+        while True:
+            threads_peak = max(threads_peak, threading.active_count())
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample_threads())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        sampler.cancel()
+    seconds = time.perf_counter() - started
+
+    return {
+        'requests': total,
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'rps': round(total / seconds, 1),
+        'ms': {
+            'p50': round(_percentile(timings, 50), 3),
+            'p90': round(_percentile(timings, 90), 3),
+            'p99': round(_percentile(timings, 99), 3),
+            'max': round(max(timings), 3),
+        },
+        'threads_peak': threads_peak,
+    }
+
+
+async def compare(endpoints, concurrency, total):
+    """{nombre: {'sync': ..., 'async': ..., 'speedup': ...}} para las urls dadas."""
+    app = ASGIHandler()
+    results = {}
+    for name, url in endpoints:
+        # Calentamiento: imports, índices en memoria, primera conexión
+        await request(app, url)
+        await request(app, async_url(url))
+        sync_result = await drive(app, url, concurrency, total)
+        async_result = await drive(app, async_url(url), concurrency, total)
+        results[name] = {
+            'sync': sync_result,
+            'async': async_result,
+            'speedup': round(async_result['rps'] / sync_result['rps'], 2),
+        }
+    return results
+
+
+def run(concurrency=20, requests=200, only=None, **dataset):
+    endpoints = [endpoint for endpoint in ENDPOINTS if not only or endpoint[0] in only]
+    isolated = override_settings(
+        ALLOWED_HOSTS=['testserver'],
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    old_name = connection.settings_dict['NAME']
+    old_max_age = connection.settings_dict.get('CONN_MAX_AGE', 0)
+    # La base de prueba solo existe en el primario: sin réplicas durante la corrida
+    replicas, db_router.REPLICAS = db_router.REPLICAS, []
+    with isolated:
+        # Como bajo core/asgi.py: cada petición síncrona usa un hilo nuevo y su
+        # conexión no debe sobrevivirle (con pool, vuelve al pool)
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        # Cada petición usa su propia conexión desde otro hilo: los datos deben
+        # estar confirmados, así que se trabaja en una base de prueba descartable
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            started = time.perf_counter()
+            with transaction.atomic():
+                seeded = seed(**dataset)
+            seed_seconds = time.perf_counter() - started
+
+            endpoints = [
+                (name, url.format(component=seeded['component'], store=seeded['store']))
+                for name, url in endpoints
+            ]
+            results = asyncio.run(compare(endpoints, concurrency, requests))
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['CONN_MAX_AGE'] = old_max_age
+            db_router.REPLICAS = replicas
+
+    return {
+        'revision': _git_revision(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'workers': 1,
+        'concurrency': concurrency,
+        'dataset': seeded['dataset'],
+        'seed_seconds': round(seed_seconds, 2),
+        'endpoints': results,
+    }
@@ -0,0 +1,183 @@
+"""
+Instrumentación por petición.
+
+`PerformanceMiddleware` mide en cada petición el tiempo total, la cantidad y
+el tiempo de las consultas SQL (con `execute_wrapper`, sin depender de DEBUG),
+el tamaño de la respuesta y la vista que la atendió. Lo devuelve en la
+cabecera `Server-Timing` (visible en las DevTools del navegador) y guarda las
+últimas PERF_SAMPLE_SIZE muestras de cada vista en memoria del proceso;
+`request_stats()` las resume en percentiles para RequestStatsView.
+
+Con PERF_LOG_DUPLICATE_QUERIES=True, las peticiones que superan
+PERF_QUERY_THRESHOLD consultas registran en el logger `core.performance` las
+sentencias repetidas: casi siempre un N+1 en un serializer.
+
+Soporta los dos modos: bajo ASGI con vistas asíncronas no obliga a Django a
+pasar la petición por un hilo. Ahí el ORM consulta desde otros hilos (cada uno
+con su conexión), así que el recorder activo viaja en una ContextVar y cada
+conexión lleva un wrapper permanente que lo consulta.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('core.performance')
+
+SAMPLE_SIZE = getattr(settings, 'PERF_SAMPLE_SIZE', 500)
+LOG_DUPLICATE_QUERIES = getattr(settings, 'PERF_LOG_DUPLICATE_QUERIES', False)
+QUERY_THRESHOLD = getattr(settings, 'PERF_QUERY_THRESHOLD', 20)
+
+PERCENTILES = (50, 90, 99)
+METRICS = ('total_ms', 'queries', 'db_ms', 'size_bytes')
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=SAMPLE_SIZE))
+
+
+class QueryRecorder:
+    """`execute_wrapper` que cuenta y cronometra las consultas de la petición."""
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter() if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            if self.statements is not None:
+                self.statements[sql] += 1
+
+
+_active_recorder = ContextVar('performance_recorder', default=None)
+
+
+def _contextual_wrapper(execute, sql, params, many, context):
+    recorder = _active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_wrapper(connection):
+    if _contextual_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_contextual_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+connection_created.connect(_on_connection_created)
+for _connection in connections.all(initialized_only=True):
+    _install_wrapper(_connection)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return f"{request.method} {match.view_name or match._func_path}"
+
+
+def _record(view, sample):
+    with _lock:
+        _samples[view].append(sample)
+
+
+def _percentile(values, percent):
+    # Rango más cercano sobre la lista ya ordenada
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def request_stats():
+    with _lock:
+        snapshot = {view: list(samples) for view, samples in _samples.items()}
+    views = []
+    for view, samples in snapshot.items():
+        row = {'view': view, 'count': len(samples)}
+        for position, metric in enumerate(METRICS):
+            values = sorted(sample[position] for sample in samples if sample[position] is not None)
+            if values:
+                row[metric] = {f'p{p}': _percentile(values, p) for p in PERCENTILES}
+                row[metric]['max'] = values[-1]
+        views.append(row)
+    views.sort(key=lambda row: row['total_ms'][f'p{PERCENTILES[-1]}'], reverse=True)
+    return {'pid': os.getpid(), 'sample_size': SAMPLE_SIZE, 'views': views}
+
+
+def reset_stats():
+    with _lock:
+        _samples.clear()
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder(keep_sql=LOG_DUPLICATE_QUERIES)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        return self._finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder(keep_sql=LOG_DUPLICATE_QUERIES)
+        started = time.perf_counter()
+        token = _active_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _active_recorder.reset(token)
+        return self._finish(request, response, recorder, started)
+
+    def _finish(self, request, response, recorder, started):
+        total_ms = round((time.perf_counter() - started) * 1000, 2)
+        db_ms = round(recorder.seconds * 1000, 2)
+        # En las respuestas en streaming solo se mide hasta el primer byte
+        size = None if response.streaming else len(response.content)
+
+        view = _view_name(request)
+        _record(view, (total_ms, recorder.count, db_ms, size))
+
+        timings = [
+            f'total;dur={total_ms}',
+            f'db;dur={db_ms};desc="{recorder.count} queries"',
+        ]
+        if size is not None:
+            timings.append(f'size;desc="{size} bytes"')
+        response['Server-Timing'] = ', '.join(timings)
+
+        if recorder.statements is not None and recorder.count > QUERY_THRESHOLD:
+            duplicates = [(sql, times) for sql, times in recorder.statements.most_common() if times > 1]
+            if duplicates:
+                logger.warning(
+                    "%s %s: %d consultas, repetidas:\n%s", view, request.path, recorder.count,
+                    '\n'.join(f'  {times}x {sql}' for sql, times in duplicates),
+                )
+        return response
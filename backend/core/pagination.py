@@ -0,0 +1,152 @@
+import json
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación por cursor sobre la tupla completa de `ordering`.
+
+    El cursor de DRF solo guarda el primer campo del ordenamiento y resuelve los
+    empates con un OFFSET, que se vuelve caro cuando hay muchos valores repetidos
+    (por ejemplo tiendas con el mismo rating). Aquí el cursor guarda todos los
+    campos y la siguiente página se pide con
+    `WHERE (a, b) < (:a, :b)`, así el costo de la página K no depende de K.
+    El último campo del ordenamiento debe ser único (normalmente `id`).
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    # Ordenamientos alternativos cuando el queryset trae cierta anotación,
+    # p.ej. (('distance_km', ('distance_km', 'id')),)
+    annotated_orderings = ()
+
+    def get_ordering(self, request, queryset, view):
+        annotations = queryset.query.annotations
+        for annotation, ordering in self.annotated_orderings:
+            if annotation in annotations:
+                return ordering
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Igual que `paginate_queryset`, leyendo la página con el ORM asíncrono."""
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([instance async for instance in queryset.aiterator()])
+
+    def get_paginated_data(self, data):
+        """El cuerpo de `get_paginated_response`, para las vistas que no usan Response."""
+        return {'next': self.get_next_link(), 'previous': self.get_previous_link(), 'results': data}
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self._position = (0, False, None)
+        else:
+            self._position = self.cursor
+        (offset, reverse, current_position) = self._position
+
+        if reverse:
+            queryset = queryset.order_by(*self._reversed(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._keyset_filter(current_position, reverse))
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def _set_page(self, results):
+        (offset, reverse, current_position) = self._position
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _keyset_filter(self, position, reverse):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions = []
+        equal_prefix = Q()
+        for field, value in zip(self.ordering, values):
+            attr = field.lstrip('-')
+            lookup = 'lt' if reverse != field.startswith('-') else 'gt'
+            conditions.append(equal_prefix & Q(**{f'{attr}__{lookup}': value}))
+            equal_prefix &= Q(**{attr: value})
+        return reduce(operator.or_, conditions)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            attr = getattr(instance, field.lstrip('-'))
+            values.append(attr if isinstance(attr, (int, float)) else str(attr))
+        return json.dumps(values)
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+class ComponentPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+    annotated_orderings = (('search_rank', ('-search_rank', '-id')),)
+
+
+class ReviewPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class StorePagination(KeysetCursorPagination):
+    ordering = ('-rating', '-id')
+    annotated_orderings = (('distance_km', ('distance_km', 'id')),)
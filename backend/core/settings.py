@@ -1,7 +1,10 @@
+import copy
 from datetime import timedelta
 import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,6 +34,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_rest_passwordreset',
     'django_filters',
     
@@ -48,6 +52,10 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    # Primero, para medir la petición completa (ver core.middleware)
+    'core.middleware.PerformanceMiddleware',
+    # Lecturas de peticiones GET a las réplicas (ver core.db_router)
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -92,28 +100,114 @@ SIMPLE_JWT = {
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'electronics_db',
-        'USER': 'postgres',
-        'PASSWORD': '123',
-        'HOST': 'LOCALHOST',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'electronics_db'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', '123'),
+        'HOST': os.environ.get('DB_HOST', 'LOCALHOST'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
     }
 }
 
+# DB_ENGINE=sqlite para trabajar sin PostgreSQL (por ejemplo `manage.py benchmark`)
+if os.environ.get('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+    }
+
+# Conexiones a la base de datos (estado en core.dbpool y en /api/platform-stats/).
+# - DB_POOL=1: pool de psycopg 3 (psycopg[pool]) compartido por los hilos del
+#   proceso; sirve igual bajo WSGI y ASGI. Tamaño DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+#   y espera máxima DB_POOL_TIMEOUT s por una conexión libre.
+# - Sin pool: conexiones persistentes DB_CONN_MAX_AGE s. Bajo ASGI (core/asgi.py
+#   marca SERVER_INTERFACE=asgi) las vistas síncronas corren cada una en un hilo
+#   nuevo y su conexión persistente quedaría huérfana: ahí se cierra al terminar.
+# En ambos casos la conexión se verifica antes de reutilizarla (CONN_HEALTH_CHECKS).
+SERVER_INTERFACE = os.environ.get('SERVER_INTERFACE', 'wsgi')
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if os.environ.get('DB_POOL') == '1' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured("DB_POOL=1 necesita psycopg 3 con el pool: pip install 'psycopg[binary,pool]'")
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = (
+        0 if SERVER_INTERFACE == 'asgi' else int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    )
+
+# Réplicas de solo lectura (ver core.db_router). DB_REPLICAS es una lista
+# separada por comas de host[:puerto] de PostgreSQL (mismos nombre, usuario y
+# contraseña que el primario) o, con DB_ENGINE=sqlite, de archivos. En local:
+#   cp db.sqlite3 replica.sqlite3
+#   DB_ENGINE=sqlite DB_REPLICAS=replica.sqlite3 python manage.py runserver
+# (la copia no se sincroniza sola: sirve para ver el enrutado). En los tests
+# cada réplica apunta a la base de prueba del primario (TEST.MIRROR).
+DATABASE_REPLICAS = []
+for _position, _replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    _config = copy.deepcopy(DATABASES['default'])
+    if _config['ENGINE'] == 'django.db.backends.sqlite3':
+        _config['NAME'] = _replica.strip()
+    else:
+        _host, _, _port = _replica.strip().partition(':')
+        _config.update(HOST=_host, PORT=_port or _config['PORT'])
+    _config['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica{_position}'] = _config
+    DATABASE_REPLICAS.append(f'replica{_position}')
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Segundos que un cliente lee del primario después de escribir
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://localhost:3000",
 ]
+# El frontend guarda y reenvía el pin al primario de core.db_router
+CORS_ALLOW_HEADERS = (*default_headers, 'x-db-pin-until')
+CORS_EXPOSE_HEADERS = ['X-DB-Pin-Until']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication con el usuario cacheado (ver apps.users.authentication)
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 }
 
+# Caché compartida (respuestas del catálogo, métricas, autocompletado...).
+# LocMemCache vive en cada proceso: con varios workers usar FileBasedCache
+# (CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache y
+# CACHE_LOCATION=/ruta/compartida) o Redis, para que la invalidación llegue a todos.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'sistema-electronicos'),
+    }
+}
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+# Usuario autenticado por JWT (apps.users.authentication)
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
+# Instrumentación por petición (core.middleware). PERF_LOG_DUPLICATE_QUERIES
+# registra las SQL repetidas de las peticiones con más de PERF_QUERY_THRESHOLD consultas.
+PERF_SAMPLE_SIZE = int(os.environ.get('PERF_SAMPLE_SIZE', 500))
+PERF_LOG_DUPLICATE_QUERIES = os.environ.get('PERF_LOG_DUPLICATE_QUERIES', '') == '1'
+PERF_QUERY_THRESHOLD = int(os.environ.get('PERF_QUERY_THRESHOLD', 20))
+
+# Paginación por cursor (core.pagination). El cliente puede pedir ?page_size=
+# hasta API_MAX_PAGE_SIZE.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 20))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -5,16 +5,29 @@ const api = axios.create({
     headers: { 'Content-Type': 'application/json' },
 });
 
+// Tras una escritura el backend pide leer del primario unos segundos
+// (X-DB-Pin-Until); se reenvía tal cual y el servidor decide si sigue vigente
+let dbPinUntil = null;
+
 api.interceptors.request.use((config) => {
     const token = localStorage.getItem('token');
     if (token) {
         config.headers.Authorization = `Bearer ${token}`;
     }
+    if (dbPinUntil) {
+        config.headers['X-DB-Pin-Until'] = dbPinUntil;
+    }
     return config;
 });
 
 api.interceptors.response.use(
-    (response) => response,
+    (response) => {
+        const pinUntil = response.headers['x-db-pin-until'];
+        if (pinUntil) {
+            dbPinUntil = pinUntil;
+        }
+        return response;
+    },
     async (error) => {
         const originalRequest = error.config;
         const isAuthPath = originalRequest.url.includes('/users/login/') || 
@@ -46,4 +59,17 @@ api.interceptors.response.use(
     }
 );
 
+// Listas paginadas por cursor ({ next, previous, results }): sigue `next`
+// hasta el final y devuelve todas las filas
+export const getAllPages = async (url, config) => {
+    const rows = [];
+    let response = await api.get(url, config);
+    rows.push(...response.data.results);
+    while (response.data.next) {
+        response = await api.get(response.data.next);
+        rows.push(...response.data.results);
+    }
+    return rows;
+};
+
 export default api;
\ No newline at end of file
@@ -5,9 +5,11 @@ export const productService = {
         try {
             // Axios ignora automáticamente los parámetros si el objeto está vacío
             const response = await api.get('/components/', { params });
+            // La lista viene paginada por cursor: { next, previous, results }
             return {
                 success: true,
-                data: response.data
+                data: response.data.results,
+                next: response.data.next
             };
         } catch (error) {
             return {
@@ -17,6 +19,18 @@ export const productService = {
         }
     },
 
+    // Cambios de stock/precio en vivo (Server-Sent Events). EventSource reconecta
+    // solo y reenvía Last-Event-ID, así no se pierden eventos. Devuelve la función para cerrar.
+    subscribeToChanges: ({ store, components } = {}, onChange, onReset) => {
+        const params = new URLSearchParams();
+        if (store) params.set('store', store);
+        if (components?.length) params.set('components', components.join(','));
+        const source = new EventSource(`${api.defaults.baseURL}/components/stream/?${params}`);
+        source.addEventListener('change', (event) => onChange(JSON.parse(event.data)));
+        if (onReset) source.addEventListener('reset', onReset);
+        return () => source.close();
+    },
+
     toggleStockNotification: async (productId) => {
         try {
             const response = await api.post(`/components/${productId}/toggle_notification/`);
@@ -10,6 +10,15 @@ export const searchService = {
         }
     },
 
+    autocomplete: async (q) => {
+        try {
+            const response = await api.get('/components/autocomplete/', { params: { q } });
+            return { success: true, data: response.data };
+        } catch (error) {
+            return { success: false, message: 'Error al cargar sugerencias' };
+        }
+    },
+
     saveSearch: async (query) => {
         try {
             const response = await api.post('/wishlist/save-search/', { query });
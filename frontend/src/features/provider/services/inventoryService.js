@@ -1,9 +1,9 @@
-import api from "../../../api/axios";
+import api, { getAllPages } from "../../../api/axios";
 
 export const inventoryService = {
     getStoreData: async () => {
         const response = await api.get('/stores/?manage=true');
-        return response.data;
+        return response.data.results;
     },
 
     getStoreDetail: async (id) => {
@@ -28,8 +28,7 @@ export const inventoryService = {
     },
 
     getInventory: async () => {
-        const response = await api.get('/components/?manage=true');
-        return response.data;
+        return getAllPages('/components/?manage=true&page_size=100');
     },
 
     createComponent: async (componentData) => {
@@ -56,16 +55,19 @@ export const inventoryService = {
         return response.data;
     },
 
-    downloadInventoryExcel: async () => {
+    downloadInventoryExcel: async ({ output = 'xlsx', columns } = {}) => {
         try {
+            const params = { output };
+            if (columns && columns.length) params.columns = columns.join(',');
             const response = await api.get('/components/download_excel/', {
+                params,
                 responseType: 'blob'
             });
 
             const url = window.URL.createObjectURL(new Blob([response.data]));
             const link = document.createElement('a');
             link.href = url;
-            link.setAttribute('download', `Inventario_Zervidtronics_${new Date().getTime()}.xlsx`);
+            link.setAttribute('download', `Inventario_Zervidtronics_${new Date().getTime()}.${output}`);
             document.body.appendChild(link);
             link.click();
             link.parentNode.removeChild(link);
@@ -76,5 +78,19 @@ export const inventoryService = {
             console.error("Error al descargar el archivo:", error);
             throw error;
         }
+    },
+
+    importInventory: async (file) => {
+        const formData = new FormData();
+        formData.append('file', file);
+        const response = await api.post('/components/import/', formData, {
+            headers: { 'Content-Type': 'multipart/form-data' }
+        });
+        return response.data;
+    },
+
+    bulkUpdate: async (items) => {
+        const response = await api.post('/components/bulk_update/', { items });
+        return response.data;
     }
-};
\ No newline at end of file
+};
@@ -10,6 +10,7 @@ import { StoreReviewsList } from './StoreReviewsList';
 import { StoreApiMap } from '../../../storeApi/StoreApiMap';
 import { productService } from '../../products/services/productService';
 import { storeService } from '../services/storeService';
+import { reviewService } from '../services/reviewService';
 
 const MAPTILER_KEY = "Zz7Zqun983rj2N26CNUp";
 
@@ -18,12 +19,18 @@ export function StoreFullPage({ store, onClose, currentUser, onVoteSuccess }) {
     const [localStore, setLocalStore] = useState(store);
     const [products, setProducts] = useState([]);
     const [loadingProducts, setLoadingProducts] = useState(false);
+    const [reviews, setReviews] = useState(null);
 
 
     const refreshStoreData = async () => {
         try {
-            const updatedStore = await storeService.getStoreById(store.id);
+            // El detalle solo trae las últimas reseñas: la lista usa la página de /reviews/
+            const [updatedStore, reviewPage] = await Promise.all([
+                storeService.getStoreById(store.id),
+                reviewService.getStoreReviews(store.id),
+            ]);
             setLocalStore(updatedStore); 
+            setReviews(reviewPage);
             if (onVoteSuccess) onVoteSuccess(); 
         } catch (error) {
             console.error("Error actualizando datos:", error);
@@ -229,7 +236,7 @@ export function StoreFullPage({ store, onClose, currentUser, onVoteSuccess }) {
 
                         <div className="max-h-[600px] overflow-y-auto pr-2 custom-scrollbar">
                             <StoreReviewsList
-                                reviews={localStore.reviews || []} 
+                                reviews={reviews}
                                 currentUser={currentUser}
                                 onReviewDeleted={refreshStoreData} 
                                 storeId={localStore.id}
@@ -245,6 +252,8 @@ export function StoreFullPage({ store, onClose, currentUser, onVoteSuccess }) {
 export function StoreCard({ store, userLocation, currentUser, onVoteSuccess, userTesting }) {
     const [isPageOpen, setIsPageOpen] = React.useState(false);
     const distance = useMemo(() => {
+        // El backend ya la calcula cuando se consulta con ?lat=&lon=
+        if (store.distance_km != null) return Number(store.distance_km).toFixed(1);
         if (!userLocation || !store.latitude || !store.longitude) return null;
         return getDistance(userLocation.lat, userLocation.lon, store.latitude, store.longitude)?.toFixed(1);
     }, [userLocation, store]);
@@ -14,8 +14,8 @@ export const reviewService = {
 
     getStoreReviews: async (storeId) => {
         try {
-            const response = await api.get(`reviews/?store=${storeId}`);
-            return response.data;
+            const response = await api.get(`stores/${storeId}/reviews/`);
+            return response.data.results;
         } catch (error) {
             console.error("Error al obtener reseñas:", error);
             return [];
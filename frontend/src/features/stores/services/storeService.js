@@ -1,9 +1,8 @@
-import api from "../../../api/axios";
+import api, { getAllPages } from "../../../api/axios";
 
 export const storeService = {
     getStores : async () => {
-        const response = await api.get('/stores/');
-        return response.data
+        return getAllPages('/stores/');
     },
 
     getStoreById: async (id) => {